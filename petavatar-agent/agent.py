@@ -6,6 +6,9 @@ mapping personality to careers, generating avatars, and creating complete
 professional identity packages.
 """
 
+import os
+import asyncio
+
 from strands import Agent
 from strands.models.bedrock import BedrockModel
 from tools import (
@@ -13,6 +16,9 @@ from tools import (
     map_personality_to_career,
     generate_avatar_image,
     generate_identity_package,
+    render_avatar_image,
+    run_pet_analysis,
+    upload_image_to_s3,
 )
 
 
@@ -36,62 +42,133 @@ Important guidelines:
 
 When you receive an image and job_id, execute all four steps and return the complete results."""
 
+# The workflow is a fixed sequence, so by default run_workflow calls the
+# tools directly. Set USE_AGENT_PLANNER=true to have a Strands agent plan
+# the tool calls instead (costs an extra Claude planning turn per job).
+USE_AGENT_PLANNER = os.environ.get("USE_AGENT_PLANNER", "false").lower() == "true"
+
+
+def create_planner_agent(system_prompt: str = SYSTEM_PROMPT) -> Agent:
+    """
+    Create the Strands agent that plans and calls the workflow tools.
+
+    Args:
+        system_prompt: System prompt describing the workflow
+
+    Returns:
+        Configured Strands agent
+    """
+    return Agent(
+        model=BedrockModel(
+            model_id="anthropic.claude-3-5-sonnet-20241022-v2:0", region_name="us-east-1"
+        ),
+        tools=[
+            analyze_pet_image,
+            map_personality_to_career,
+            generate_avatar_image,
+            generate_identity_package,
+        ],
+        system_prompt=system_prompt,
+    )
+
+
+# Only build the agent when it is used
+agent = create_planner_agent() if USE_AGENT_PLANNER else None
 
-# Create the agent with Bedrock Claude model
-agent = Agent(
-    model=BedrockModel(
-        model_id="anthropic.claude-3-5-sonnet-20241022-v2:0", region_name="us-east-1"
-    ),
-    tools=[
-        analyze_pet_image,
-        map_personality_to_career,
-        generate_avatar_image,
-        generate_identity_package,
-    ],
-    system_prompt=SYSTEM_PROMPT,
-)
 
+async def run_workflow(image_s3_uri: str, job_id: str) -> dict:
+    """
+    Run the four-step avatar workflow with explicit orchestration.
+
+    Career mapping only needs the leading fields of the pet analysis, so it
+    starts as soon as the streamed analysis has produced them, while Claude
+    is still describing the pet. Avatar generation (Titan) and identity
+    package generation (Claude) only depend on the career and personality
+    profiles, so they run concurrently. The tools are synchronous boto3
+    calls, so each one runs in a worker thread.
+
+    Args:
+        image_s3_uri: S3 URI of the pet image
+        job_id: Unique job identifier for tracking
 
-def process_pet_avatar(image_base64: str, job_id: str) -> dict:
+    Returns:
+        Dictionary with the results of every workflow step
+    """
+    loop = asyncio.get_running_loop()
+    partial_profile = loop.create_future()
+
+    def on_partial(profile: dict) -> None:
+        loop.call_soon_threadsafe(partial_profile.set_result, profile)
+
+    analysis = asyncio.ensure_future(asyncio.to_thread(run_pet_analysis, image_s3_uri, on_partial))
+    await asyncio.wait({analysis, partial_profile}, return_when=asyncio.FIRST_COMPLETED)
+
+    # The embedding head path never reports a partial profile
+    early_profile = partial_profile.result() if partial_profile.done() else analysis.result()
+    personality_profile, career_profile = await asyncio.gather(
+        analysis,
+        asyncio.to_thread(map_personality_to_career, early_profile),
+    )
+
+    avatar, identity_package = await asyncio.gather(
+        asyncio.to_thread(render_avatar_image, career_profile, personality_profile, job_id),
+        asyncio.to_thread(
+            generate_identity_package,
+            personality_profile,
+            career_profile,
+            personality_profile.get("species", "other"),
+            job_id,
+        ),
+    )
+
+    return {
+        "job_id": job_id,
+        "status": "completed",
+        "pet_analysis": personality_profile,
+        "career_profile": career_profile,
+        "avatar_image_bytes": avatar["image_bytes"],
+        "identity_package": identity_package,
+    }
+
+
+def process_pet_avatar(image_bytes: bytes, job_id: str) -> dict:
     """
     Process a pet image through the complete avatar generation workflow.
 
     This is the main entry point for the agent. It orchestrates the entire
-    workflow from pet analysis to final identity package generation.
+    workflow from pet analysis to final identity package generation. The
+    image is uploaded to S3 once and the tools receive only its URI. With
+    USE_AGENT_PLANNER set, the Strands agent drives the tools instead and
+    its final message is returned as "response".
 
     Args:
-        image_base64: Base64 encoded pet image
+        image_bytes: Raw pet image bytes
         job_id: Unique job identifier for tracking
 
     Returns:
         Dictionary containing:
         - pet_analysis: Complete personality analysis
         - career_profile: Mapped career information
-        - avatar_image_base64: Generated avatar image
+        - avatar_image_bytes: Generated avatar PNG bytes (base64 encode
+          only when serializing the result)
         - identity_package: Complete professional identity
         - job_id: The job identifier
     """
-    # Invoke the agent with the image and job context
-    user_message = f"""Please process this pet image (job_id: {job_id}) through the complete avatar generation workflow:
-
-1. First, analyze the pet image to extract personality traits
-2. Then, map the personality to an appropriate career
-3. Next, generate a professional avatar image
-4. Finally, create the complete identity package
-
-The image data is: {image_base64[:100]}... (truncated for display)
+    image_s3_uri = upload_image_to_s3(image_bytes, job_id)
 
-Please execute all steps and provide the complete results."""
+    if agent is not None:
+        result = agent(
+            f"Please process this pet image (job_id: {job_id}) through the complete "
+            f"avatar generation workflow. The pet image is stored at {image_s3_uri}. "
+            f"Pass this S3 URI to the analyze_pet_image tool."
+        )
+        return {
+            "job_id": job_id,
+            "status": "completed",
+            "response": str(result.message) if hasattr(result, "message") else str(result),
+        }
 
-    # Run the agent
-    result = agent(user_message)
-
-    # The agent will have used the tools and stored results in its context
-    # Extract the results from the agent's execution
-    # Note: This is a simplified version - actual implementation may need
-    # to parse the agent's response or access tool results differently
-
-    return {"job_id": job_id, "status": "completed", "response": str(result)}
+    return asyncio.run(run_workflow(image_s3_uri, job_id))
 
 
 # For AgentCore deployment, we need an entrypoint
@@ -99,15 +176,19 @@ Please execute all steps and provide the complete results."""
 if __name__ == "__main__":
     # Example usage for local testing
     import sys
-    import base64
 
     if len(sys.argv) > 1:
         # Load image from file
         with open(sys.argv[1], "rb") as f:
-            image_data = base64.b64encode(f.read()).decode("utf-8")
+            image_data = f.read()
 
         result = process_pet_avatar(image_data, "test-job-123")
+
+        avatar_path = "test-job-123-avatar.png"
+        with open(avatar_path, "wb") as f:
+            f.write(result.pop("avatar_image_bytes"))
         print(result)
+        print(f"Avatar written to {avatar_path}")
     else:
         print("Usage: python agent.py <image_file>")
         print("Example: python agent.py test_pet.jpg")
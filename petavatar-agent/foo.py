@@ -8,15 +8,12 @@ professional identity packages.
 Deployed to AWS Bedrock AgentCore Runtime.
 """
 
-from strands import Agent
-from strands.models.bedrock import BedrockModel
+import base64
+import asyncio
+
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
-from tools import (
-    analyze_pet_image,
-    map_personality_to_career,
-    generate_avatar_image,
-    generate_identity_package,
-)
+from agent import USE_AGENT_PLANNER, create_planner_agent, run_workflow
+from tools import upload_image_to_s3
 
 
 # System prompt for the agent
@@ -40,19 +37,8 @@ Important guidelines:
 When you receive an image and job_id, execute all four steps and return the complete results."""
 
 
-# Create the agent with Bedrock Claude model
-agent = Agent(
-    model=BedrockModel(
-        model_id="anthropic.claude-3-5-sonnet-20241022-v2:0", region_name="us-east-1"
-    ),
-    tools=[
-        analyze_pet_image,
-        map_personality_to_career,
-        generate_avatar_image,
-        generate_identity_package,
-    ],
-    system_prompt=SYSTEM_PROMPT,
-)
+# Planner agent, only used when USE_AGENT_PLANNER is set
+agent = create_planner_agent(SYSTEM_PROMPT) if USE_AGENT_PLANNER else None
 
 # Initialize the AgentCore app
 app = BedrockAgentCoreApp()
@@ -69,7 +55,8 @@ def invoke(payload: dict) -> dict:
 
     Args:
         payload: Dictionary containing:
-            - image_base64: Base64 encoded pet image
+            - image_s3_uri: S3 URI of the pet image (preferred)
+            - image_base64: Base64 encoded pet image (uploaded to S3 first)
             - job_id: Unique job identifier for tracking
 
     Returns:
@@ -83,16 +70,28 @@ def invoke(payload: dict) -> dict:
         - error: Error message (if failed)
     """
     try:
+        image_s3_uri = payload.get("image_s3_uri", "")
         image_base64 = payload.get("image_base64", "")
         job_id = payload.get("job_id", "unknown")
         
-        if not image_base64:
+        if not image_s3_uri and not image_base64:
             return {
                 "job_id": job_id,
                 "status": "failed",
-                "error": "No image_base64 provided in payload"
+                "error": "No image_s3_uri or image_base64 provided in payload"
             }
         
+        # Keep the image out of the agent context: it only ever sees the URI
+        if not image_s3_uri:
+            image_s3_uri = upload_image_to_s3(base64.b64decode(image_base64), job_id)
+        
+        if agent is None:
+            result = asyncio.run(run_workflow(image_s3_uri, job_id))
+            result["avatar_image_base64"] = base64.b64encode(
+                result.pop("avatar_image_bytes")
+            ).decode("utf-8")
+            return result
+        
         # Invoke the agent with the image and job context
         user_message = f"""Please process this pet image (job_id: {job_id}) through the complete avatar generation workflow:
 
@@ -101,9 +100,8 @@ def invoke(payload: dict) -> dict:
 3. Next, generate a professional avatar image using the generate_avatar_image tool
 4. Finally, create the complete identity package using the generate_identity_package tool
 
-The base64 encoded image data is provided below. Please execute all steps and provide the complete results.
-
-Image data: {image_base64}"""
+The pet image is stored at {image_s3_uri}. Pass this S3 URI to the analyze_pet_image tool.
+Please execute all steps and provide the complete results."""
 
         # Run the agent
         result = agent(user_message)
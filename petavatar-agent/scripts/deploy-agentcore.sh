@@ -49,7 +49,7 @@ else
     echo "Save this ARN for configuring the process-worker Lambda."
     echo ""
     echo "To test the deployed agent:"
-    echo "  agentcore invoke '{\"image_base64\": \"<base64_image>\", \"job_id\": \"test-123\"}'"
+    echo "  agentcore invoke '{\"image_s3_uri\": \"s3://<bucket>/uploads/test-123/original\", \"job_id\": \"test-123\"}'"
 fi
 
 # Step 5: Clean up generated requirements.txt
@@ -5,9 +5,9 @@ This module contains all the tools used by the PetAvatarAgent to transform
 pet photos into professional human avatars.
 """
 
-from .analyze_pet import analyze_pet_image
+from .analyze_pet import analyze_pet_image, run_pet_analysis, upload_image_to_s3
 from .map_career import map_personality_to_career
-from .generate_avatar import generate_avatar_image
+from .generate_avatar import generate_avatar_image, render_avatar_image
 from .generate_identity import generate_identity_package
 
 __all__ = [
@@ -15,4 +15,7 @@ __all__ = [
     "map_personality_to_career",
     "generate_avatar_image",
     "generate_identity_package",
+    "render_avatar_image",
+    "run_pet_analysis",
+    "upload_image_to_s3",
 ]
@@ -5,72 +5,123 @@ This tool uses Amazon Bedrock's Claude 3.5 Sonnet model to analyze pet photos
 and extract personality traits, species, breed, and other characteristics.
 """
 
-import json
-import time
+import os
+import re
+import orjson
+import base64
 import boto3
-from typing import Any
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from strands import tool
 
 
-def retry_with_exponential_backoff(func, max_retries: int = 3, base_delay: float = 1.0) -> Any:
-    """
-    Retry a function with exponential backoff.
-    
-    Args:
-        func: Function to retry
-        max_retries: Maximum number of retry attempts
-        base_delay: Base delay in seconds (doubles each retry)
-        
-    Returns:
-        Result of the function call
-        
-    Raises:
-        Exception: If all retries are exhausted
-    """
-    for attempt in range(max_retries):
-        try:
-            return func()
-        except Exception as e:
-            if attempt == max_retries - 1:
-                raise
-            delay = base_delay * (2 ** attempt)
-            print(f"Retry attempt {attempt + 1}/{max_retries} after {delay}s delay: {str(e)}")
-            time.sleep(delay)
+CLAUDE_MODEL_ID = os.environ.get('CLAUDE_MODEL_ID', 'anthropic.claude-3-5-sonnet-20241022-v2:0')
 
+# Models that rejected latency-optimized inference (not every model/region
+# supports it). Remembered so later calls go straight to standard latency.
+_STANDARD_LATENCY_MODELS: set = set()
 
-@tool
-def analyze_pet_image(image_base64: str) -> dict:
-    """
-    Analyzes a pet image to extract personality traits and characteristics.
-    
-    Uses Claude 3.5 Sonnet vision capabilities to analyze the pet's appearance,
-    expression, posture, and infer personality dimensions.
-    
-    Args:
-        image_base64: Base64 encoded pet image (JPEG, PNG, or HEIC)
-        
-    Returns:
-        Dictionary containing:
-        - species: Animal species (dog, cat, hamster, fish, reptile, other)
-        - breed: Breed characteristics when applicable
-        - expression: Facial expression description
-        - posture: Body posture description
-        - personality_dimensions: Dict of 47 personality traits (0-100 scores)
-        - dominant_traits: List of top 3-5 dominant personality traits
-        - vibe: Overall personality vibe (e.g., "CFO energy", "friendly helper")
-    """
-    bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
-    
-    # Comprehensive prompt for personality analysis
-    analysis_prompt = """Analyze this pet image in detail and provide a comprehensive personality assessment.
+# Shared Bedrock runtime client for all tools. Created once per process so
+# calls reuse warm TLS connections; the pool is sized for concurrent tool
+# calls. botocore's adaptive retry mode handles throttling and transient
+# errors (backoff with jitter plus client-side rate limiting).
+bedrock_runtime = boto3.client(
+    'bedrock-runtime',
+    region_name=os.environ.get('AWS_REGION', 'us-east-1'),
+    config=Config(
+        max_pool_connections=32,
+        retries={'mode': 'adaptive', 'max_attempts': 4},
+        connect_timeout=5,
+        read_timeout=60,
+        tcp_keepalive=True
+    )
+)
+
+# S3 client for pet images passed to the tools by reference; the pool
+# covers the parallel range reads of a large image
+s3 = boto3.client('s3', config=Config(max_pool_connections=16, tcp_keepalive=True))
+
+_S3_URI_PATTERN = re.compile(r'^s3://([^/]+)/(.+)$')
+
+# JSON object wrapped in a markdown code fence
+_JSON_RE = re.compile(r'```(?:json)?\s*(\{.*\})\s*```', re.DOTALL)
+
+# Mark the static system prompts as cacheable so Bedrock can reuse the
+# prefix (tool schema plus system prompt) across calls. Not every model
+# supports prompt caching, so it is opt-in.
+PROMPT_CACHING = os.environ.get('PROMPT_CACHING', 'false').lower() == 'true'
+
+# Personality dimensions in the order the analysis prompt lists them
+PERSONALITY_TRAITS = (
+    'confidence',
+    'energy_level',
+    'sociability',
+    'assertiveness',
+    'playfulness',
+    'independence',
+    'curiosity',
+    'affection',
+    'patience',
+    'adaptability',
+    'intelligence',
+    'loyalty',
+    'protectiveness',
+    'gentleness',
+    'boldness',
+    'calmness',
+    'enthusiasm',
+    'focus',
+    'determination',
+    'sensitivity',
+    'humor',
+    'dignity',
+    'mischievousness',
+    'responsibility',
+    'leadership',
+    'cooperation',
+    'competitiveness',
+    'creativity',
+    'organization',
+    'spontaneity',
+    'caution',
+    'optimism',
+    'resilience',
+    'empathy',
+    'assertive_communication',
+    'listening_skills',
+    'problem_solving',
+    'strategic_thinking',
+    'attention_to_detail',
+    'big_picture_thinking',
+    'risk_taking',
+    'stability_seeking',
+    'innovation',
+    'tradition',
+    'ambition',
+    'contentment',
+    'would_steal_lunch',
+    'sends_passive_aggressive_emails',
+)
+
+EMBEDDING_MODEL_ID = 'amazon.titan-embed-image-v1'
+
+# Optional linear head that scores personality dimensions from a Titan
+# multimodal image embedding instead of asking Claude to generate them.
+# The .npz holds "weights" (traits x embedding_dim), "bias" (traits),
+# "vibe_prototypes" (vibes x traits) and "vibe_labels" (vibes), with trait
+# rows in PERSONALITY_TRAITS order.
+PERSONALITY_HEAD_PATH = os.environ.get('PERSONALITY_HEAD_PATH')
+
+# Comprehensive prompt for personality analysis
+ANALYSIS_PROMPT = """Analyze this pet image in detail and provide a comprehensive personality assessment.
 
 Please provide your analysis in the following JSON format:
 
 {
     "species": "<dog|cat|hamster|fish|reptile|other>",
-    "breed": "<breed name or 'mixed' or 'unknown'>",
-    "expression": "<description of facial expression>",
-    "posture": "<description of body posture and positioning>",
     "personality_dimensions": {
         "confidence": <0-100>,
         "energy_level": <0-100>,
@@ -122,49 +173,714 @@ Please provide your analysis in the following JSON format:
         "sends_passive_aggressive_emails": <0-100>
     },
     "dominant_traits": ["<trait1>", "<trait2>", "<trait3>"],
-    "vibe": "<overall personality description in 2-4 words>"
+    "vibe": "<overall personality description in 2-4 words>",
+    "breed": "<breed name or 'mixed' or 'unknown'>",
+    "expression": "<description of facial expression>",
+    "posture": "<description of body posture and positioning>"
 }
 
 Be creative but realistic in your assessment. Consider the pet's expression, posture, grooming, and overall demeanor."""
 
-    def make_bedrock_call():
-        response = bedrock.invoke_model(
-            modelId='anthropic.claude-3-5-sonnet-20241022-v2:0',
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 2000,
-                "messages": [{
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": "image/jpeg",
-                                "data": image_base64
-                            }
-                        },
-                        {
-                            "type": "text",
-                            "text": analysis_prompt
-                        }
-                    ]
-                }]
-            })
+# Short prompt for the fields the embedding head can't produce
+DESCRIPTION_PROMPT = """Describe the pet in this image.
+
+Respond with only this JSON:
+
+{
+    "species": "<dog|cat|hamster|fish|reptile|other>",
+    "breed": "<breed name or 'mixed' or 'unknown'>",
+    "expression": "<description of facial expression>",
+    "posture": "<description of body posture and positioning>"
+}"""
+
+
+def _score_properties(names) -> dict:
+    return {name: {"type": "integer", "minimum": 0, "maximum": 100} for name in names}
+
+
+# JSON schemas for Claude's structured (tool-use) output
+DESCRIPTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "species": {"type": "string", "enum": ["dog", "cat", "hamster", "fish", "reptile", "other"]},
+        "breed": {"type": "string"},
+        "expression": {"type": "string"},
+        "posture": {"type": "string"},
+    },
+    "required": ["species", "breed", "expression", "posture"],
+}
+
+# Fields career mapping needs come first, so they are complete early in a
+# streamed response (see ANALYSIS_PREFIX_FIELDS)
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "species": DESCRIPTION_SCHEMA["properties"]["species"],
+        "personality_dimensions": {
+            "type": "object",
+            "properties": _score_properties(PERSONALITY_TRAITS),
+            "required": list(PERSONALITY_TRAITS),
+        },
+        "dominant_traits": {"type": "array", "items": {"type": "string"}, "minItems": 3, "maxItems": 5},
+        "vibe": {"type": "string"},
+        "breed": DESCRIPTION_SCHEMA["properties"]["breed"],
+        "expression": DESCRIPTION_SCHEMA["properties"]["expression"],
+        "posture": DESCRIPTION_SCHEMA["properties"]["posture"],
+    },
+    "required": DESCRIPTION_SCHEMA["required"] + ["personality_dimensions", "dominant_traits", "vibe"],
+}
+
+# Leading analysis fields that career mapping uses, and the pattern marking
+# that they are complete (the next key has started)
+ANALYSIS_PREFIX_FIELDS = ('species', 'personality_dimensions', 'dominant_traits', 'vibe')
+_ANALYSIS_PREFIX_END_RE = re.compile(r',\s*"breed"\s*:')
+
+
+def _may_become_prefix_end(text: str) -> bool:
+    """Whether text, which starts with a comma, could still grow into an _ANALYSIS_PREFIX_END_RE match."""
+    rest = text[1:].lstrip()
+    return '"breed"'.startswith(rest[:7]) and not rest[7:].strip()
+
+
+def structured_output(name: str, description: str, input_schema: dict) -> dict:
+    """
+    Build request fields that force Claude to answer through a single tool call.
+    
+    The tool's input is the structured result, so the reply arrives as
+    schema-shaped JSON instead of free text that has to be scraped.
+    
+    Args:
+        name: Tool name
+        description: What the tool records
+        input_schema: JSON schema of the result
+        
+    Returns:
+        "tools" and "tool_choice" fields to merge into the request body
+    """
+    return {
+        "tools": [{
+            "name": name,
+            "description": description,
+            "input_schema": input_schema
+        }],
+        "tool_choice": {"type": "tool", "name": name}
+    }
+
+
+def parse_claude_json(response_body: dict) -> dict:
+    """
+    Extract the JSON result from a Claude response.
+    
+    Prefers a tool_use block (structured output) and falls back to parsing
+    the text reply, which Claude might wrap in markdown.
+    
+    Args:
+        response_body: Parsed Anthropic messages response
+        
+    Returns:
+        Parsed JSON object
+    """
+    content = ''
+    for block in response_body.get('content', []):
+        if block.get('type') == 'tool_use':
+            return block['input']
+        if block.get('type') == 'text':
+            content = block['text']
+    
+    match = _JSON_RE.search(content)
+    if match:
+        content = match.group(1)
+    
+    return orjson.loads(content)
+
+
+def system_prompt(text: str) -> list:
+    """
+    Build a system prompt block, marked for prompt caching when enabled.
+    
+    Args:
+        text: Static prompt text
+        
+    Returns:
+        List of Anthropic system content blocks
+    """
+    block = {"type": "text", "text": text}
+    if PROMPT_CACHING:
+        block["cache_control"] = {"type": "ephemeral"}
+    return [block]
+
+
+def retry_on_invalid_json(func) -> Any:
+    """
+    Call a Claude request function, retrying once if the reply isn't valid JSON.
+    
+    Transport errors and throttling are retried by botocore; a malformed
+    reply arrives as a successful response, so it is handled here.
+    
+    Args:
+        func: Function that sends the request and parses the JSON reply
+        
+    Returns:
+        Result of the function call
+    """
+    try:
+        return func()
+    except orjson.JSONDecodeError as e:
+        print(f"Retrying after invalid JSON from model: {str(e)}")
+        return func()
+
+
+def parse_s3_uri(s3_uri: str) -> Tuple[str, str]:
+    """
+    Split an S3 URI into bucket and key.
+    
+    Args:
+        s3_uri: S3 URI in format s3://bucket-name/key
+        
+    Returns:
+        Tuple of (bucket, key)
+        
+    Raises:
+        ValueError: If URI format is invalid
+    """
+    match = _S3_URI_PATTERN.match(s3_uri or '')
+    if not match:
+        raise ValueError(f"Invalid S3 URI: {s3_uri}. Expected: s3://bucket-name/key")
+    return match.group(1), match.group(2)
+
+
+# Upload formats accepted by the API. Presigned uploads only enforce an
+# image/* content type, so the loader rejects anything else
+SUPPORTED_IMAGE_TYPES = ('image/jpeg', 'image/png', 'image/heic')
+
+# HEIF major brands used by HEIC photos (the brand follows 'ftyp' at offset 4)
+_HEIC_BRANDS = (b'heic', b'heix', b'heim', b'heis', b'mif1', b'msf1')
+
+
+def detect_image_type(image_bytes: bytes) -> Optional[str]:
+    """
+    Identify a supported image format from its leading magic bytes.
+    
+    Args:
+        image_bytes: Raw image bytes (the first 12 are enough)
+        
+    Returns:
+        One of SUPPORTED_IMAGE_TYPES, or None if the format isn't recognized
+    """
+    if image_bytes.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if image_bytes.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if image_bytes[4:8] == b'ftyp' and image_bytes[8:12] in _HEIC_BRANDS:
+        return 'image/heic'
+    return None
+
+
+def upload_image_to_s3(image_bytes: bytes, job_id: str, bucket: Optional[str] = None) -> str:
+    """
+    Upload a pet image once so the workflow can pass it around by reference.
+    
+    Images go under agent-inputs/ rather than uploads/ so they don't trigger
+    the S3 upload event handler. The object's ContentType is set from the
+    image's magic bytes, since load_image_base64_from_s3 checks it.
+    
+    Args:
+        image_bytes: Raw pet image bytes
+        job_id: Job identifier used in the object key
+        bucket: Target bucket (defaults to S3_UPLOAD_BUCKET)
+        
+    Returns:
+        S3 URI of the uploaded image
+    """
+    bucket = bucket or os.environ.get('S3_UPLOAD_BUCKET')
+    if not bucket:
+        raise ValueError("S3_UPLOAD_BUCKET environment variable not set")
+    
+    key = f"agent-inputs/{job_id}/original"
+    content_type = detect_image_type(image_bytes)
+    if content_type:
+        s3.put_object(Bucket=bucket, Key=key, Body=image_bytes, ContentType=content_type)
+    else:
+        s3.put_object(Bucket=bucket, Key=key, Body=image_bytes)
+    return f"s3://{bucket}/{key}"
+
+# Read size for streaming S3 images (a multiple of 3, matching the base64
+# block size)
+S3_READ_CHUNK_BYTES = 57 * 1024
+
+# Images larger than one range (~1 MiB) are fetched as parallel ranged
+# GETs, at most MAX_RANGE_READS at a time. Every range but the last is a
+# multiple of 3 bytes, so the encoded ranges concatenate cleanly
+S3_RANGE_BYTES = 18 * S3_READ_CHUNK_BYTES
+MAX_RANGE_READS = 16
+_range_executor = ThreadPoolExecutor(max_workers=MAX_RANGE_READS)
+
+
+def _encode_body(body: Any) -> bytearray:
+    """
+    Base64-encode a streaming S3 body chunk by chunk, then close it.
+    
+    A read may return fewer bytes than requested, so only whole 3-byte
+    blocks are encoded as they arrive; the remainder is carried into the
+    next chunk, and padding can only appear at the end of the body.
+    """
+    encoded = bytearray()
+    carry = b''
+    try:
+        while chunk := body.read(S3_READ_CHUNK_BYTES):
+            chunk = carry + chunk
+            whole = len(chunk) - len(chunk) % 3
+            encoded += base64.b64encode(chunk[:whole])
+            carry = chunk[whole:]
+    finally:
+        body.close()
+    encoded += base64.b64encode(carry)
+    return encoded
+
+
+def _load_range_base64(bucket: str, key: str, etag: str, start: int) -> bytearray:
+    """Fetch and encode one S3_RANGE_BYTES range of an object."""
+    response = s3.get_object(
+        Bucket=bucket,
+        Key=key,
+        Range=f"bytes={start}-{start + S3_RANGE_BYTES - 1}",
+        IfMatch=etag
+    )
+    return _encode_body(response['Body'])
+
+
+def load_image_base64_from_s3(image_s3_uri: str) -> str:
+    """
+    Download a pet image referenced by S3 URI as base64.
+    
+    The first range is requested directly, so small images take one GET
+    and no HEAD; its Content-Range gives the size, and any remaining ranges
+    are fetched in parallel, pinned to the same ETag. Each range is encoded
+    chunk by chunk so the raw image is never held in memory alongside its
+    encoding.
+    
+    Args:
+        image_s3_uri: S3 URI of the image
+        
+    Returns:
+        Base64 encoded image
+        
+    Raises:
+        ValueError: If the object is not a supported image format
+    """
+    bucket, key = parse_s3_uri(image_s3_uri)
+    try:
+        response = s3.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{S3_RANGE_BYTES - 1}")
+    except ClientError as e:
+        # A ranged GET of an empty object is rejected as unsatisfiable
+        if e.response.get('Error', {}).get('Code') == 'InvalidRange':
+            return ''
+        raise
+    body = response['Body']
+    content_type = response.get('ContentType')
+    if content_type and content_type not in SUPPORTED_IMAGE_TYPES:
+        body.close()
+        raise ValueError(
+            f"Invalid image format: {content_type}. Supported formats: JPEG, PNG, HEIC"
+        )
+    
+    content_range = response.get('ContentRange')
+    size = int(content_range.rsplit('/', 1)[1]) if content_range else response.get('ContentLength', 0)
+    starts = range(S3_RANGE_BYTES, size, S3_RANGE_BYTES)
+    rest = _range_executor.map(
+        lambda start: _load_range_base64(bucket, key, response['ETag'], start), starts
+    ) if starts else ()
+    
+    encoded = _encode_body(body)
+    for part in rest:
+        encoded += part
+    return encoded.decode('ascii')
+
+
+def load_personality_head(path: Optional[str]) -> Optional[dict]:
+    """
+    Load the personality regression head, if one is configured.
+    
+    Args:
+        path: Path to the .npz file, or None
+        
+    Returns:
+        Dict of numpy arrays, or None when no head is configured
+    """
+    if not path:
+        return None
+    
+    with np.load(path) as data:
+        head = {
+            'weights': data['weights'].astype(np.float32),
+            'bias': data['bias'].astype(np.float32),
+            'vibe_prototypes': data['vibe_prototypes'].astype(np.float32),
+            'vibe_labels': data['vibe_labels'].astype(str),
+        }
+    
+    if head['weights'].shape[0] != len(PERSONALITY_TRAITS):
+        raise ValueError(
+            f"Personality head has {head['weights'].shape[0]} traits, "
+            f"expected {len(PERSONALITY_TRAITS)}"
         )
+    return head
+
+
+_PERSONALITY_HEAD = load_personality_head(PERSONALITY_HEAD_PATH)
+
+_DESCRIPTION_OUTPUT = structured_output(
+    'record_pet_description', 'Record the description of the pet.', DESCRIPTION_SCHEMA
+)
+_ANALYSIS_OUTPUT = structured_output(
+    'record_pet_analysis', 'Record the personality analysis of the pet.', ANALYSIS_SCHEMA
+)
+
+
+def _invoke_with_latency_fallback(invoke, model_id: str, body: bytes) -> dict:
+    """
+    Call a Bedrock invoke method, preferring latency-optimized inference.
+    
+    Falls back to standard latency when Bedrock rejects the performance
+    configuration for this model or region.
+    
+    Args:
+        invoke: bedrock_runtime.invoke_model or invoke_model_with_response_stream
+        model_id: Bedrock model ID
+        body: JSON encoded request body
+        
+    Returns:
+        Raw Bedrock response
+    """
+    if model_id not in _STANDARD_LATENCY_MODELS:
+        try:
+            return invoke(modelId=model_id, body=body, performanceConfigLatency='optimized')
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ValidationException':
+                raise
+            response = invoke(modelId=model_id, body=body)
+            _STANDARD_LATENCY_MODELS.add(model_id)
+            return response
+    
+    return invoke(modelId=model_id, body=body)
+
+
+def invoke_claude(body: bytes, model_id: str = CLAUDE_MODEL_ID) -> dict:
+    """
+    Invoke a Claude model on Bedrock, preferring latency-optimized inference.
+    
+    Args:
+        body: JSON encoded Anthropic messages request body (orjson bytes)
+        model_id: Bedrock model ID
         
-        response_body = json.loads(response['body'].read())
-        content = response_body['content'][0]['text']
+    Returns:
+        Parsed response body
+    """
+    response = _invoke_with_latency_fallback(bedrock_runtime.invoke_model, model_id, body)
+    return orjson.loads(response['body'].read())
+
+
+def invoke_claude_stream(
+    body: bytes,
+    on_delta: Callable[[str], None],
+    model_id: str = CLAUDE_MODEL_ID
+) -> dict:
+    """
+    Invoke a Claude model with a streaming response.
+    
+    Each chunk of generated text or tool input JSON is passed to on_delta
+    as it arrives, so callers can act on the start of the output before
+    generation finishes.
+    
+    Args:
+        body: JSON encoded Anthropic messages request body (orjson bytes)
+        on_delta: Called with each chunk of output
+        model_id: Bedrock model ID
         
-        # Extract JSON from response (Claude might wrap it in markdown)
-        if '```json' in content:
-            content = content.split('```json')[1].split('```')[0].strip()
-        elif '```' in content:
-            content = content.split('```')[1].split('```')[0].strip()
+    Returns:
+        Response body in the same shape as invoke_claude returns
+    """
+    response = _invoke_with_latency_fallback(
+        bedrock_runtime.invoke_model_with_response_stream, model_id, body
+    )
+    
+    block_type = 'text'
+    parts = []
+    for event in response['body']:
+        chunk = orjson.loads(event['chunk']['bytes'])
+        if chunk['type'] == 'content_block_start':
+            block_type = chunk['content_block']['type']
+        elif chunk['type'] == 'content_block_delta':
+            delta = chunk['delta']
+            text = delta.get('partial_json') or delta.get('text') or ''
+            parts.append(text)
+            on_delta(text)
+    
+    output = ''.join(parts)
+    if block_type == 'tool_use':
+        return {"content": [{"type": "tool_use", "input": orjson.loads(output)}]}
+    return {"content": [{"type": "text", "text": output}]}
+
+
+def invoke_claude_vision(
+    image_base64: str,
+    prompt: str,
+    max_tokens: int,
+    output: Optional[dict] = None,
+    on_delta: Optional[Callable[[str], None]] = None
+) -> dict:
+    """
+    Send an image plus a text prompt to Claude and parse its JSON reply.
+    
+    The prompt goes in the system prompt ahead of the image, so the static
+    prefix is identical across calls and can be served from the prompt cache.
+    
+    Args:
+        image_base64: Base64 encoded image
+        prompt: Static instructions describing the JSON to return
+        max_tokens: Output token limit
+        output: Optional structured_output() fields for tool-use output
+        on_delta: Optional callback to stream the output (see invoke_claude_stream)
         
-        return json.loads(content)
+    Returns:
+        Parsed JSON object from Claude's response
+    """
+    request = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "system": system_prompt(prompt),
+        "messages": [{
+            "role": "user",
+            "content": [
+                {
+                    "type": "image",
+                    "source": {
+                        "type": "base64",
+                        "media_type": "image/jpeg",
+                        "data": image_base64
+                    }
+                },
+                {
+                    "type": "text",
+                    "text": "Here is the pet image."
+                }
+            ]
+        }]
+    }
+    if output:
+        request.update(output)
+    
+    if on_delta is not None:
+        return parse_claude_json(invoke_claude_stream(orjson.dumps(request), on_delta))
+    return parse_claude_json(invoke_claude(orjson.dumps(request)))
+
+
+def embed_image(image_base64: str) -> np.ndarray:
+    """
+    Get a Titan multimodal embedding for an image.
     
-    # Call Bedrock with retry logic
-    result = retry_with_exponential_backoff(make_bedrock_call)
+    Args:
+        image_base64: Base64 encoded image
+        
+    Returns:
+        Embedding vector
+    """
+    response = bedrock_runtime.invoke_model(
+        modelId=EMBEDDING_MODEL_ID,
+        body=orjson.dumps({
+            "inputImage": image_base64,
+            "embeddingConfig": {"outputEmbeddingLength": 1024}
+        })
+    )
+    response_body = orjson.loads(response['body'].read())
+    return np.asarray(response_body['embedding'], dtype=np.float32)
+
+
+def personality_vector(personality_dims: dict, default: float = 50) -> np.ndarray:
+    """
+    Convert personality dimensions to a vector in PERSONALITY_TRAITS order.
+    
+    Args:
+        personality_dims: Dict of personality trait scores (0-100)
+        default: Score used for traits missing from the dict
+        
+    Returns:
+        float32 vector with one score per trait
+    """
+    return np.fromiter(
+        (personality_dims.get(trait, default) for trait in PERSONALITY_TRAITS),
+        dtype=np.float32,
+        count=len(PERSONALITY_TRAITS)
+    )
+
+
+def score_personality(embedding: np.ndarray, head: dict) -> dict:
+    """
+    Score personality dimensions from an image embedding with the linear head.
+    
+    Args:
+        embedding: Image embedding vector
+        head: Personality head from load_personality_head
+        
+    Returns:
+        Dictionary with personality_dimensions, dominant_traits and vibe
+    """
+    scores = np.clip(head['weights'] @ embedding + head['bias'], 0, 100)
+    
+    top = np.argpartition(scores, -3)[-3:]
+    top = top[np.argsort(scores[top])[::-1]]
+    
+    # Vibe is the label of the nearest prototype personality vector
+    distances = np.linalg.norm(head['vibe_prototypes'] - scores, axis=1)
+    
+    return {
+        'personality_dimensions': {
+            trait: int(round(float(score)))
+            for trait, score in zip(PERSONALITY_TRAITS, scores)
+        },
+        'dominant_traits': [PERSONALITY_TRAITS[i] for i in top],
+        'vibe': str(head['vibe_labels'][int(np.argmin(distances))]),
+    }
+
+
+def analyze_with_embedding_head(image_base64: str, head: dict) -> dict:
+    """
+    Analyze a pet with the embedding head plus a short Claude description.
+    
+    The embedding call and the description call are independent, so they
+    run concurrently.
+    
+    Args:
+        image_base64: Base64 encoded pet image
+        head: Personality head from load_personality_head
+        
+    Returns:
+        Same structure as analyze_pet_image
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        embedding_future = executor.submit(embed_image, image_base64)
+        description_future = executor.submit(
+            retry_on_invalid_json,
+            lambda: invoke_claude_vision(image_base64, DESCRIPTION_PROMPT, 300, _DESCRIPTION_OUTPUT)
+        )
+        result = description_future.result()
+        result.update(score_personality(embedding_future.result(), head))
     
     return result
+
+
+def parse_analysis_prefix(output: str) -> Optional[dict]:
+    """
+    Parse the leading fields of a partially streamed analysis.
+    
+    Args:
+        output: Streamed analysis JSON so far
+        
+    Returns:
+        Dict with the ANALYSIS_PREFIX_FIELDS, or None if they aren't all
+        complete yet
+    """
+    match = _ANALYSIS_PREFIX_END_RE.search(output)
+    if not match:
+        return None
+    try:
+        prefix = orjson.loads(output[:match.start()] + '}')
+    except orjson.JSONDecodeError:
+        return None
+    if not all(field in prefix for field in ANALYSIS_PREFIX_FIELDS):
+        return None
+    return prefix
+
+
+def run_pet_analysis(image_s3_uri: str, on_partial: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    Analyze a pet image, optionally reporting the career fields early.
+    
+    With on_partial, the Claude analysis is streamed and on_partial is
+    called once with the ANALYSIS_PREFIX_FIELDS as soon as they are
+    complete, while Claude is still describing breed, expression and
+    posture. It is not called on the embedding head path.
+    
+    Args:
+        image_s3_uri: S3 URI of the pet image
+        on_partial: Optional callback for the early personality fields
+        
+    Returns:
+        Same structure as analyze_pet_image
+    """
+    image_base64 = load_image_base64_from_s3(image_s3_uri)
+    
+    if _PERSONALITY_HEAD is not None:
+        try:
+            return analyze_with_embedding_head(image_base64, _PERSONALITY_HEAD)
+        except Exception as e:
+            print(f"Embedding head analysis failed, falling back to Claude: {str(e)}")
+    
+    reported = False
+    # Streamed text already ruled out as the start of the prefix end is kept
+    # in scanned and not searched again; pending holds the text from the
+    # last comma that could still begin one
+    scanned: List[str] = []
+    pending = ''
+    
+    def on_delta(chunk: str) -> None:
+        nonlocal reported, pending
+        if reported:
+            return
+        pending += chunk
+        if _ANALYSIS_PREFIX_END_RE.search(pending):
+            prefix = parse_analysis_prefix(''.join(scanned) + pending)
+            if prefix is not None:
+                reported = True
+                on_partial(prefix)
+                return
+            scanned.append(pending)
+            pending = ''
+            return
+        cut = pending.rfind(',')
+        if cut < 0 or not _may_become_prefix_end(pending[cut:]):
+            scanned.append(pending)
+            pending = ''
+        elif cut > 0:
+            scanned.append(pending[:cut])
+            pending = pending[cut:]
+    
+    def analyze() -> dict:
+        nonlocal pending
+        # A retry streams a new document, so the failed attempt's text is dropped
+        scanned.clear()
+        pending = ''
+        return invoke_claude_vision(
+            image_base64, ANALYSIS_PROMPT, 2000, _ANALYSIS_OUTPUT,
+            on_delta if on_partial is not None else None
+        )
+    
+    return retry_on_invalid_json(analyze)
+
+
+@tool
+def analyze_pet_image(image_s3_uri: str) -> dict:
+    """
+    Analyzes a pet image to extract personality traits and characteristics.
+    
+    Uses Claude 3.5 Sonnet vision capabilities to analyze the pet's appearance,
+    expression, posture, and infer personality dimensions. When a personality
+    head is configured (PERSONALITY_HEAD_PATH), the dimensions come from a
+    Titan image embedding instead and Claude only describes the pet.
+    
+    The image is passed by S3 reference and fetched once here, so the
+    image bytes never travel through the agent's conversation context.
+    
+    Args:
+        image_s3_uri: S3 URI of the pet image (JPEG, PNG, or HEIC)
+        
+    Returns:
+        Dictionary containing:
+        - species: Animal species (dog, cat, hamster, fish, reptile, other)
+        - breed: Breed characteristics when applicable
+        - expression: Facial expression description
+        - posture: Body posture description
+        - personality_dimensions: Dict of 47 personality traits (0-100 scores)
+        - dominant_traits: List of top 3-5 dominant personality traits
+        - vibe: Overall personality vibe (e.g., "CFO energy", "friendly helper")
+    """
+    return run_pet_analysis(image_s3_uri)
@@ -5,41 +5,81 @@ This tool creates professional headshot images based on career profiles,
 with appropriate attire and background settings.
 """
 
-import json
+import orjson
 import base64
-import boto3
-from typing import Any
+import struct
+import hashlib
+from typing import Any, Tuple
 from io import BytesIO
-from PIL import Image
 from strands import tool
-from .analyze_pet import retry_with_exponential_backoff
+from .analyze_pet import bedrock_runtime
 
 
-@tool
-def generate_avatar_image(career_profile: dict, personality_profile: dict, job_id: str = None) -> dict:
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def read_png_dimensions(image_data: bytes) -> Tuple[int, int]:
     """
-    Generates a photorealistic human avatar image.
+    Read width and height from a PNG's IHDR chunk without decoding pixels.
     
-    Uses Amazon Titan Image Generator to create a professional headshot
-    based on the career profile and personality traits.
+    Args:
+        image_data: Raw image bytes
+        
+    Returns:
+        Tuple of (width, height)
+        
+    Raises:
+        ValueError: If the data is not a PNG
+    """
+    if image_data[:8] != PNG_SIGNATURE or image_data[12:16] != b'IHDR':
+        # Pillow is optional and only used here, to report what we got
+        # instead; importing it costs cold-start time on every container
+        try:
+            from PIL import Image
+            with BytesIO(image_data) as buffer, Image.open(buffer) as image:
+                image_format = image.format
+        except Exception:
+            image_format = 'unknown'
+        raise ValueError(f"Expected PNG format, got {image_format}")
+    
+    return struct.unpack('>II', image_data[16:24])
+
+
+def job_seed(job_id: str) -> int:
+    """
+    Derive a Titan seed from a job ID.
+    
+    Unlike the builtin hash(), which is randomized per process, this gives
+    the same seed for the same job ID on every worker and restart.
     
     Args:
-        career_profile: Output from map_personality_to_career containing:
-            - job_title: Job title
-            - seniority: Seniority level
-            - attire_style: Clothing style
-            - background_setting: Background type
+        job_id: Job identifier
+        
+    Returns:
+        Seed in the range 0 to 2**31 - 1
+    """
+    digest = hashlib.blake2s(job_id.encode('utf-8'), digest_size=4).digest()
+    return int.from_bytes(digest, 'big') & 0x7FFFFFFF
+
+
+def render_avatar_image(career_profile: dict, personality_profile: dict, job_id: str = None) -> dict:
+    """
+    Generate a photorealistic human avatar image as raw PNG bytes.
+    
+    Used by the orchestrated workflow, which keeps the image as bytes until
+    it is serialized. generate_avatar_image wraps this for the agent.
+    
+    Args:
+        career_profile: Output from map_personality_to_career
         personality_profile: Output from analyze_pet_image for additional context
         job_id: Optional job ID for deterministic seed generation
         
     Returns:
         Dictionary containing:
-        - image_base64: Base64 encoded PNG image (1024x1024)
+        - image_bytes: PNG image bytes (1024x1024)
         - prompt_used: The prompt sent to Titan
         - generation_params: Parameters used for generation
     """
-    bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
-    
     # Build detailed prompt from career profile
     job_title = career_profile.get('job_title', 'Professional')
     seniority = career_profile.get('seniority', 'mid-level')
@@ -75,7 +115,7 @@ def generate_avatar_image(career_profile: dict, personality_profile: dict, job_i
     )
     
     # Generate deterministic but unique seed from job_id if provided
-    seed = hash(job_id) % (2**31) if job_id else 42
+    seed = job_seed(job_id) if job_id else 42
     
     generation_params = {
         "numberOfImages": 1,
@@ -86,44 +126,61 @@ def generate_avatar_image(career_profile: dict, personality_profile: dict, job_i
         "seed": seed
     }
     
-    def make_bedrock_call():
-        response = bedrock.invoke_model(
-            modelId='amazon.titan-image-generator-v1',
-            body=json.dumps({
-                "taskType": "TEXT_IMAGE",
-                "textToImageParams": {
-                    "text": prompt
-                },
-                "imageGenerationConfig": generation_params
-            })
-        )
-        
-        response_body = json.loads(response['body'].read())
-        
-        # Extract the base64 image from response
-        image_base64 = response_body['images'][0]
-        
-        # Validate image format and dimensions
-        image_data = base64.b64decode(image_base64)
-        image = Image.open(BytesIO(image_data))
-        
-        # Verify it's PNG and at least 1024x1024
-        if image.format != 'PNG':
-            raise ValueError(f"Expected PNG format, got {image.format}")
-        
-        width, height = image.size
-        if width < 1024 or height < 1024:
-            raise ValueError(f"Image dimensions {width}x{height} are below minimum 1024x1024")
-        
-        return {
-            "image_base64": image_base64,
-            "prompt_used": prompt,
-            "generation_params": generation_params,
-            "image_format": image.format,
-            "image_dimensions": f"{width}x{height}"
-        }
+    response = bedrock_runtime.invoke_model(
+        modelId='amazon.titan-image-generator-v1',
+        body=orjson.dumps({
+            "taskType": "TEXT_IMAGE",
+            "textToImageParams": {
+                "text": prompt
+            },
+            "imageGenerationConfig": generation_params
+        })
+    )
+    
+    response_body = orjson.loads(response['body'].read())
+    
+    # Decode the image once and validate it from the PNG header
+    image_data = base64.b64decode(response_body['images'][0])
+    width, height = read_png_dimensions(image_data)
+    
+    # Verify it's at least 1024x1024
+    if width < 1024 or height < 1024:
+        raise ValueError(f"Image dimensions {width}x{height} are below minimum 1024x1024")
+    
+    return {
+        "image_bytes": image_data,
+        "prompt_used": prompt,
+        "generation_params": generation_params,
+        "image_format": "PNG",
+        "image_dimensions": f"{width}x{height}"
+    }
+
+
+@tool
+def generate_avatar_image(career_profile: dict, personality_profile: dict, job_id: str = None) -> dict:
+    """
+    Generates a photorealistic human avatar image.
+    
+    Uses Amazon Titan Image Generator to create a professional headshot
+    based on the career profile and personality traits.
     
-    # Call Bedrock with retry logic (up to 3 retries)
-    result = retry_with_exponential_backoff(make_bedrock_call)
+    Args:
+        career_profile: Output from map_personality_to_career containing:
+            - job_title: Job title
+            - seniority: Seniority level
+            - attire_style: Clothing style
+            - background_setting: Background type
+        personality_profile: Output from analyze_pet_image for additional context
+        job_id: Optional job ID for deterministic seed generation
+        
+    Returns:
+        Dictionary containing:
+        - image_base64: Base64 encoded PNG image (1024x1024)
+        - prompt_used: The prompt sent to Titan
+        - generation_params: Parameters used for generation
+    """
+    result = render_avatar_image(career_profile, personality_profile, job_id)
     
+    # Tool results go into the agent conversation as JSON, so encode here
+    result['image_base64'] = base64.b64encode(result.pop('image_bytes')).decode('utf-8')
     return result
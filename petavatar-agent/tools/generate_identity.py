@@ -5,53 +5,115 @@ This tool creates human names, LinkedIn-style bios, professional skills,
 career trajectories, and similarity scores based on pet personality and career profiles.
 """
 
-import json
-import boto3
+import orjson
+import random
+import hashlib
+import numpy as np
 from typing import Any
 from strands import tool
-from .analyze_pet import retry_with_exponential_backoff
+from .analyze_pet import (
+    PERSONALITY_TRAITS,
+    invoke_claude,
+    parse_claude_json,
+    personality_vector,
+    retry_on_invalid_json,
+    structured_output,
+)
 
 
-# Species-appropriate name patterns
+# Species-appropriate name patterns (tuples, so they can't be mutated)
 SPECIES_NAME_PATTERNS = {
     'dog': {
-        'golden_retriever': ['Greg', 'Doug', 'Buddy', 'Max', 'Charlie', 'Cooper', 'Tucker'],
-        'labrador': ['Jake', 'Sam', 'Bailey', 'Duke', 'Rocky', 'Bear'],
-        'german_shepherd': ['Rex', 'Bruno', 'Zeus', 'Thor', 'Gunner', 'Axel'],
-        'poodle': ['Pierre', 'Marcel', 'Francois', 'Henri', 'Claude'],
-        'default': ['Max', 'Buddy', 'Charlie', 'Jack', 'Rocky', 'Duke', 'Bear', 'Tucker']
+        'golden_retriever': ('Greg', 'Doug', 'Buddy', 'Max', 'Charlie', 'Cooper', 'Tucker'),
+        'labrador': ('Jake', 'Sam', 'Bailey', 'Duke', 'Rocky', 'Bear'),
+        'german_shepherd': ('Rex', 'Bruno', 'Zeus', 'Thor', 'Gunner', 'Axel'),
+        'poodle': ('Pierre', 'Marcel', 'Francois', 'Henri', 'Claude'),
+        'default': ('Max', 'Buddy', 'Charlie', 'Jack', 'Rocky', 'Duke', 'Bear', 'Tucker')
     },
     'cat': {
-        'default': ['Margaret', 'Sebastian', 'Penelope', 'Theodore', 'Beatrice', 
-                   'Winston', 'Vivienne', 'Reginald', 'Cordelia', 'Archibald']
+        'default': ('Margaret', 'Sebastian', 'Penelope', 'Theodore', 'Beatrice', 
+                   'Winston', 'Vivienne', 'Reginald', 'Cordelia', 'Archibald')
     },
     'hamster': {
-        'default': ['Chip', 'Nibbles', 'Squeaky', 'Peanut', 'Whiskers']
+        'default': ('Chip', 'Nibbles', 'Squeaky', 'Peanut', 'Whiskers')
     },
     'fish': {
-        'default': ['Finn', 'Coral', 'Marina', 'Neptune', 'Splash']
+        'default': ('Finn', 'Coral', 'Marina', 'Neptune', 'Splash')
     },
     'reptile': {
-        'default': ['Rex', 'Spike', 'Scales', 'Draco', 'Viper']
+        'default': ('Rex', 'Spike', 'Scales', 'Draco', 'Viper')
     },
     'other': {
-        'default': ['Alex', 'Sam', 'Jordan', 'Casey', 'Riley']
+        'default': ('Alex', 'Sam', 'Jordan', 'Casey', 'Riley')
     }
 }
 
 
-def generate_name_from_species(species: str, breed: str = None) -> str:
+# Traits compared against the career profile in the similarity score
+SIMILARITY_TRAITS = (
+    'confidence', 'leadership', 'assertiveness', 'sociability',
+    'creativity', 'organization', 'empathy'
+)
+
+# Positions of SIMILARITY_TRAITS in a personality_vector()
+_SIMILARITY_IDX = np.array([PERSONALITY_TRAITS.index(trait) for trait in SIMILARITY_TRAITS])
+
+# Career-conditional trait weights, in SIMILARITY_TRAITS order. An equal
+# average over the traits makes every pet score about the same; weighting
+# by seniority rewards the traits that actually matter for the role
+# (leadership for executives, collaboration for entry-level roles).
+SENIORITY_TRAIT_WEIGHTS = {
+    'entry-level': np.array([0.8, 0.4, 0.6, 1.4, 1.0, 1.0, 1.4], dtype=np.float32),
+    'mid-level': np.array([1.0, 0.8, 0.8, 1.0, 1.0, 1.4, 1.0], dtype=np.float32),
+    'senior': np.array([1.2, 1.4, 1.0, 1.0, 0.8, 1.0, 0.8], dtype=np.float32),
+    'executive': np.array([1.6, 2.0, 1.4, 0.8, 0.6, 0.6, 0.6], dtype=np.float32),
+}
+DEFAULT_TRAIT_WEIGHTS = np.ones(len(SIMILARITY_TRAITS), dtype=np.float32)
+
+IDENTITY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "bio": {"type": "string"},
+        "skills": {"type": "array", "items": {"type": "string"}, "minItems": 5, "maxItems": 10},
+        "career_trajectory": {
+            "type": "object",
+            "properties": {
+                "past": {"type": "string"},
+                "present": {"type": "string"},
+                "future": {"type": "string"},
+            },
+            "required": ["past", "present", "future"],
+        },
+    },
+    "required": ["bio", "skills", "career_trajectory"],
+}
+
+_IDENTITY_OUTPUT = structured_output(
+    'record_identity_package', 'Record the professional identity package.', IDENTITY_SCHEMA
+)
+
+
+def generate_name_from_species(species: str, breed: str = None, job_id: str = None) -> str:
     """
     Generate an appropriate human name based on pet species and breed.
     
+    With a job_id the choice is deterministic, so retries of the same job
+    get the same name. A private Random instance avoids sharing the global
+    random state between concurrent jobs.
+    
     Args:
         species: Pet species (dog, cat, etc.)
         breed: Optional breed information
+        job_id: Optional job ID for deterministic name selection
         
     Returns:
         Human name string
     """
-    import random
+    if job_id:
+        digest = hashlib.blake2s(f"{species}|{breed}|{job_id}".encode('utf-8'), digest_size=8).digest()
+        rng = random.Random(int.from_bytes(digest, 'big'))
+    else:
+        rng = random.Random()
     
     species = species.lower() if species else 'other'
     breed_lower = breed.lower() if breed else 'default'
@@ -65,11 +127,11 @@ def generate_name_from_species(species: str, breed: str = None) -> str:
     else:
         names = species_names.get('default', SPECIES_NAME_PATTERNS['other']['default'])
     
-    return random.choice(names)
+    return rng.choice(names)
 
 
 def calculate_similarity_score(
-    personality_profile: dict,
+    dims_vec: np.ndarray,
     career_profile: dict,
     name_appropriateness: float = 0.8
 ) -> float:
@@ -77,13 +139,13 @@ def calculate_similarity_score(
     Calculate similarity score representing pet-to-human match quality.
     
     Weighted combination of:
-    - Personality trait alignment (40%)
+    - Personality trait alignment (40%), weighted by career seniority
     - Career fit confidence (30%)
     - Name appropriateness (15%)
     - Overall coherence (15%)
     
     Args:
-        personality_profile: Pet personality analysis
+        dims_vec: Personality dimensions from personality_vector()
         career_profile: Career mapping results
         name_appropriateness: Score for name fit (0-1)
         
@@ -93,13 +155,12 @@ def calculate_similarity_score(
     # Career fit confidence (30%)
     career_confidence = career_profile.get('confidence_score', 75) * 0.3
     
-    # Personality trait alignment (40%) - based on dominant traits
-    personality_dims = personality_profile.get('personality_dimensions', {})
-    relevant_traits = ['confidence', 'leadership', 'assertiveness', 'sociability', 
-                      'creativity', 'organization', 'empathy']
-    trait_scores = [personality_dims.get(trait, 50) for trait in relevant_traits]
-    avg_trait_score = sum(trait_scores) / len(trait_scores) if trait_scores else 50
-    personality_alignment = avg_trait_score * 0.4
+    # Personality trait alignment (40%) - weighted towards the traits the
+    # career's seniority level calls for
+    trait_scores = dims_vec[_SIMILARITY_IDX]
+    weights = SENIORITY_TRAIT_WEIGHTS.get(career_profile.get('seniority'), DEFAULT_TRAIT_WEIGHTS)
+    weighted_trait_score = float(trait_scores @ weights / weights.sum())
+    personality_alignment = weighted_trait_score * 0.4
     
     # Name appropriateness (15%)
     name_score = name_appropriateness * 100 * 0.15
@@ -117,7 +178,8 @@ def calculate_similarity_score(
 def generate_identity_package(
     personality_profile: dict,
     career_profile: dict,
-    species: str
+    species: str,
+    job_id: str = None
 ) -> dict:
     """
     Generates complete professional identity package.
@@ -129,6 +191,7 @@ def generate_identity_package(
         personality_profile: Pet personality analysis from analyze_pet_image
         career_profile: Career mapping from map_personality_to_career
         species: Pet species for name generation
+        job_id: Optional job ID for deterministic name generation
         
     Returns:
         Dictionary containing:
@@ -138,11 +201,9 @@ def generate_identity_package(
         - career_trajectory: Dict with past, present, future
         - similarity_score: 0-100 match percentage
     """
-    bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
-    
     # Generate appropriate name
     breed = personality_profile.get('breed', '')
-    human_name = generate_name_from_species(species, breed)
+    human_name = generate_name_from_species(species, breed, job_id)
     
     # Extract key information
     job_title = career_profile.get('job_title', 'Professional')
@@ -189,39 +250,25 @@ Guidelines for career trajectory:
 Make it professional, believable, and aligned with the personality traits."""
 
     def make_bedrock_call():
-        response = bedrock.invoke_model(
-            modelId='anthropic.claude-3-5-sonnet-20241022-v2:0',
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 2000,
-                "messages": [{
-                    "role": "user",
-                    "content": identity_prompt
-                }]
-            })
-        )
-        
-        response_body = json.loads(response['body'].read())
-        content = response_body['content'][0]['text']
-        
-        # Extract JSON from response
-        if '```json' in content:
-            content = content.split('```json')[1].split('```')[0].strip()
-        elif '```' in content:
-            content = content.split('```')[1].split('```')[0].strip()
-        
-        return json.loads(content)
+        request_body = orjson.dumps({
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 2000,
+            "messages": [{
+                "role": "user",
+                "content": identity_prompt
+            }],
+            **_IDENTITY_OUTPUT
+        })
+        response_body = invoke_claude(request_body)
+        return parse_claude_json(response_body)
     
-    # Call Bedrock with retry logic
-    result = retry_with_exponential_backoff(make_bedrock_call)
+    result = retry_on_invalid_json(make_bedrock_call)
     
     # Add the generated name
     result['human_name'] = human_name
     
     # Calculate similarity score
-    result['similarity_score'] = calculate_similarity_score(
-        personality_profile,
-        career_profile
-    )
+    dims_vec = personality_vector(personality_profile.get('personality_dimensions', {}))
+    result['similarity_score'] = calculate_similarity_score(dims_vec, career_profile)
     
     return result
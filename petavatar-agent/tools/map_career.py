@@ -5,11 +5,372 @@ This tool uses Claude to analyze personality dimensions and select appropriate
 human professions, seniority levels, and work styles.
 """
 
-import json
+import os
+import orjson
+import time
+import hashlib
 import boto3
-from typing import Any
+import numpy as np
+from string import Template
+from typing import Any, Optional
+from botocore.config import Config
 from strands import tool
-from .analyze_pet import retry_with_exponential_backoff
+from .analyze_pet import (
+    CLAUDE_MODEL_ID,
+    PERSONALITY_TRAITS,
+    invoke_claude,
+    parse_claude_json,
+    personality_vector,
+    retry_on_invalid_json,
+    structured_output,
+    system_prompt,
+)
+
+
+# Career mapping has small, bounded structured output, so it can be pointed at
+# a faster model (e.g. Claude 3.5 Haiku) without touching the other tools.
+CAREER_MODEL_ID = os.environ.get('CAREER_MODEL_ID', CLAUDE_MODEL_ID)
+
+# Optional DynamoDB cache of career mappings keyed by personality fingerprint.
+# The table needs a string partition key "cache_key" and TTL on "ttl".
+# Caching is disabled when CAREER_CACHE_TABLE is not set.
+CAREER_CACHE_TABLE = os.environ.get('CAREER_CACHE_TABLE')
+CAREER_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60  # 7 days
+
+# Personality dimensions that feed the career mapping prompt, with the
+# default used when the analysis omits one. Only these affect the mapping,
+# so only these go into the cache fingerprint.
+CAREER_DIMENSIONS = (
+    ('confidence', 50),
+    ('leadership', 50),
+    ('assertiveness', 50),
+    ('strategic_thinking', 50),
+    ('creativity', 50),
+    ('organization', 50),
+    ('sociability', 50),
+    ('empathy', 50),
+    ('ambition', 50),
+    ('would_steal_lunch', 0),
+    ('sends_passive_aggressive_emails', 0),
+)
+
+# Career archetypes for the rule-based fast path. Each prototype scores a
+# pet by the average of its defining traits; a pet that clearly matches one
+# archetype gets its canned profile without a Claude call.
+CAREER_PROTOTYPES = (
+    (
+        ('confidence', 'leadership', 'ambition', 'assertiveness', 'strategic_thinking'),
+        {
+            "job_title": "Chief Executive Officer",
+            "seniority": "executive",
+            "industry": "Corporate Leadership",
+            "work_style": "Decisive and visionary, sets direction and expects results",
+            "attire_style": "suit",
+            "background_setting": "corner_office",
+        },
+    ),
+    (
+        ('strategic_thinking', 'problem_solving', 'big_picture_thinking', 'assertive_communication', 'confidence'),
+        {
+            "job_title": "Management Consultant",
+            "seniority": "senior",
+            "industry": "Consulting",
+            "work_style": "Analytical and persuasive, turns messy problems into clear plans",
+            "attire_style": "suit",
+            "background_setting": "linkedin_blue",
+        },
+    ),
+    (
+        ('big_picture_thinking', 'cooperation', 'innovation', 'sociability', 'leadership'),
+        {
+            "job_title": "Senior Product Manager",
+            "seniority": "senior",
+            "industry": "Technology",
+            "work_style": "Collaborative and customer-focused, aligns teams around a roadmap",
+            "attire_style": "business_casual",
+            "background_setting": "open_office",
+        },
+    ),
+    (
+        ('creativity', 'spontaneity', 'innovation', 'playfulness', 'sensitivity'),
+        {
+            "job_title": "Graphic Designer",
+            "seniority": "mid-level",
+            "industry": "Design",
+            "work_style": "Imaginative and expressive, thrives on open-ended briefs",
+            "attire_style": "creative",
+            "background_setting": "creative_space",
+        },
+    ),
+    (
+        ('problem_solving', 'focus', 'intelligence', 'independence', 'curiosity'),
+        {
+            "job_title": "Software Engineer",
+            "seniority": "mid-level",
+            "industry": "Technology",
+            "work_style": "Heads-down and methodical, happiest deep in a hard problem",
+            "attire_style": "business_casual",
+            "background_setting": "open_office",
+        },
+    ),
+    (
+        ('organization', 'attention_to_detail', 'caution', 'focus', 'responsibility'),
+        {
+            "job_title": "Financial Analyst",
+            "seniority": "mid-level",
+            "industry": "Finance",
+            "work_style": "Precise and thorough, double-checks every number",
+            "attire_style": "business_casual",
+            "background_setting": "open_office",
+        },
+    ),
+    (
+        ('patience', 'empathy', 'listening_skills', 'gentleness', 'enthusiasm'),
+        {
+            "job_title": "Elementary School Teacher",
+            "seniority": "mid-level",
+            "industry": "Education",
+            "work_style": "Patient and encouraging, brings out the best in others",
+            "attire_style": "business_casual",
+            "background_setting": "linkedin_blue",
+        },
+    ),
+    (
+        ('empathy', 'calmness', 'responsibility', 'attention_to_detail', 'intelligence'),
+        {
+            "job_title": "Family Physician",
+            "seniority": "senior",
+            "industry": "Healthcare",
+            "work_style": "Calm and caring, steady under pressure",
+            "attire_style": "scrubs",
+            "background_setting": "linkedin_blue",
+        },
+    ),
+    (
+        ('sociability', 'enthusiasm', 'energy_level', 'competitiveness', 'optimism'),
+        {
+            "job_title": "Account Executive",
+            "seniority": "mid-level",
+            "industry": "Sales",
+            "work_style": "Energetic and outgoing, never met a stranger",
+            "attire_style": "business_casual",
+            "background_setting": "open_office",
+        },
+    ),
+    (
+        ('playfulness', 'curiosity', 'energy_level', 'mischievousness', 'spontaneity'),
+        {
+            "job_title": "Marketing Coordinator",
+            "seniority": "entry-level",
+            "industry": "Marketing",
+            "work_style": "Eager and full of ideas, still learning the ropes",
+            "attire_style": "business_casual",
+            "background_setting": "open_office",
+        },
+    ),
+    (
+        ('protectiveness', 'loyalty', 'boldness', 'determination', 'stability_seeking'),
+        {
+            "job_title": "Director of Security",
+            "seniority": "senior",
+            "industry": "Security",
+            "work_style": "Vigilant and dependable, always has the team's back",
+            "attire_style": "suit",
+            "background_setting": "linkedin_blue",
+        },
+    ),
+)
+
+# Prototype weight matrix (prototypes x PERSONALITY_TRAITS); each row averages
+# the prototype's defining traits
+_PROTOTYPE_WEIGHTS = np.zeros((len(CAREER_PROTOTYPES), len(PERSONALITY_TRAITS)), dtype=np.float32)
+for _row, (_traits, _) in enumerate(CAREER_PROTOTYPES):
+    for _trait in _traits:
+        _PROTOTYPE_WEIGHTS[_row, PERSONALITY_TRAITS.index(_trait)] = 1.0 / len(_traits)
+
+# The fast path only answers when the best prototype scores at least
+# CAREER_RULE_MIN_SCORE and beats the runner-up by CAREER_RULE_MARGIN points;
+# everything else goes to Claude. Set CAREER_RULE_MARGIN=0 to disable it.
+CAREER_RULE_MIN_SCORE = float(os.environ.get('CAREER_RULE_MIN_SCORE', '75'))
+CAREER_RULE_MARGIN = float(os.environ.get('CAREER_RULE_MARGIN', '8'))
+
+# Per-pet part of the career prompt
+CAREER_PROFILE_TEMPLATE = Template("""Based on this personality profile, determine the most appropriate human career and professional presentation.
+
+Personality Profile:
+- Species: $species
+- Overall Vibe: $vibe
+- Dominant Traits: $dominant_traits
+- Key Dimensions:
+  - Confidence: $confidence
+  - Leadership: $leadership
+  - Assertiveness: $assertiveness
+  - Strategic Thinking: $strategic_thinking
+  - Creativity: $creativity
+  - Organization: $organization
+  - Sociability: $sociability
+  - Empathy: $empathy
+  - Ambition: $ambition
+  - Would Steal Lunch: $would_steal_lunch
+  - Sends Passive-Aggressive Emails: $sends_passive_aggressive_emails""")
+
+# Static part of the career prompt, sent as the system prompt so the prefix
+# is identical across calls
+CAREER_MAPPING_PROMPT = """Provide your career mapping in the following JSON format:
+
+{
+    "job_title": "<specific job title>",
+    "seniority": "<entry-level|mid-level|senior|executive>",
+    "industry": "<industry sector>",
+    "work_style": "<brief description of work approach>",
+    "attire_style": "<suit|business_casual|creative|scrubs>",
+    "background_setting": "<corner_office|open_office|linkedin_blue|creative_space>",
+    "confidence_score": <0-100>
+}
+
+Guidelines:
+- Match job title to dominant personality traits
+- High confidence/leadership/ambition → senior or executive roles
+- High creativity/spontaneity → creative industries
+- High organization/detail → analytical/administrative roles
+- High empathy/sociability → people-facing roles
+- Consider the "would steal lunch" and "passive-aggressive emails" scores for realism
+- Attire should match industry and seniority
+- Background should match seniority (executives get corner offices)
+- Confidence score reflects how well the personality fits the role"""
+
+CAREER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "job_title": {"type": "string"},
+        "seniority": {"type": "string", "enum": ["entry-level", "mid-level", "senior", "executive"]},
+        "industry": {"type": "string"},
+        "work_style": {"type": "string"},
+        "attire_style": {"type": "string", "enum": ["suit", "business_casual", "creative", "scrubs"]},
+        "background_setting": {
+            "type": "string",
+            "enum": ["corner_office", "open_office", "linkedin_blue", "creative_space"]
+        },
+        "confidence_score": {"type": "integer", "minimum": 0, "maximum": 100},
+    },
+    "required": [
+        "job_title", "seniority", "industry", "work_style",
+        "attire_style", "background_setting", "confidence_score"
+    ],
+}
+
+_CAREER_OUTPUT = structured_output(
+    'record_career_mapping', 'Record the career mapping for the pet.', CAREER_SCHEMA
+)
+
+_CAREER_SYSTEM = system_prompt(CAREER_MAPPING_PROMPT)
+
+# DynamoDB client for the career cache, created on first cache access so
+# importing the tools needs neither a region nor a configured cache table
+_dynamodb = None
+
+
+def get_dynamodb_client() -> Any:
+    """Get the career cache's DynamoDB client, creating it on first use."""
+    global _dynamodb
+    if _dynamodb is None:
+        _dynamodb = boto3.client(
+            'dynamodb',
+            region_name=os.environ.get('AWS_REGION', 'us-east-1'),
+            config=Config(tcp_keepalive=True)
+        )
+    return _dynamodb
+
+
+def personality_fingerprint(species: str, personality_dims: dict, dominant_traits: list) -> str:
+    """
+    Build a cache key for a personality profile.
+    
+    Each prompt dimension is quantized to a 0-10 bucket (one byte), so
+    profiles that differ only by a few points share a key. The free-text
+    vibe is left out; it paraphrases the scored dimensions and would make
+    nearly every key unique.
+    
+    Args:
+        species: Animal species
+        personality_dims: Dict of personality trait scores (0-100)
+        dominant_traits: List of dominant trait names
+        
+    Returns:
+        32-character hex digest
+    """
+    scores = (personality_dims.get(name, default) for name, default in CAREER_DIMENSIONS)
+    quantized = bytes(
+        max(0, min(int(score) // 10, 10)) if isinstance(score, (int, float)) else 0xFF
+        for score in scores
+    )
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(CAREER_MODEL_ID.encode())
+    digest.update(f"|{species.lower()}|".encode())
+    digest.update(','.join(sorted(t.lower() for t in dominant_traits)).encode())
+    digest.update(b'|' + quantized)
+    return digest.hexdigest()
+
+
+def get_cached_career(cache_key: str) -> Optional[dict]:
+    """Return a cached career mapping, or None on miss or cache error."""
+    try:
+        response = get_dynamodb_client().get_item(
+            TableName=CAREER_CACHE_TABLE,
+            Key={'cache_key': {'S': cache_key}}
+        )
+        item = response.get('Item')
+        # TTL deletion lags, so skip entries that have already expired
+        if not item or int(item['ttl']['N']) < time.time():
+            return None
+        return orjson.loads(item['result']['S'])
+    except Exception as e:
+        print(f"Career cache lookup failed: {str(e)}")
+        return None
+
+
+def put_cached_career(cache_key: str, career_profile: dict) -> None:
+    """Store a career mapping in the cache, ignoring cache errors."""
+    try:
+        get_dynamodb_client().put_item(
+            TableName=CAREER_CACHE_TABLE,
+            Item={
+                'cache_key': {'S': cache_key},
+                'result': {'S': orjson.dumps(career_profile).decode('utf-8')},
+                'ttl': {'N': str(int(time.time()) + CAREER_CACHE_TTL_SECONDS)}
+            }
+        )
+    except Exception as e:
+        print(f"Career cache write failed: {str(e)}")
+
+
+def match_career_prototype(personality_dims: dict) -> Optional[dict]:
+    """
+    Map a clearly archetypal personality to a career without calling Claude.
+    
+    Args:
+        personality_dims: Dict of personality trait scores (0-100)
+        
+    Returns:
+        Career profile of the winning prototype, or None when the match is
+        ambiguous and Claude should decide
+    """
+    if CAREER_RULE_MARGIN <= 0:
+        return None
+    
+    scores = _PROTOTYPE_WEIGHTS @ personality_vector(personality_dims)
+    runner_up, best = np.argpartition(scores, -2)[-2:]
+    if scores[runner_up] > scores[best]:
+        runner_up, best = best, runner_up
+    
+    best_score = float(scores[best])
+    margin = best_score - float(scores[runner_up])
+    if best_score < CAREER_RULE_MIN_SCORE or margin < CAREER_RULE_MARGIN:
+        return None
+    
+    career_profile = dict(CAREER_PROTOTYPES[best][1])
+    career_profile['confidence_score'] = int(min(95, best_score))
+    return career_profile
 
 
 @tool
@@ -37,81 +398,48 @@ def map_personality_to_career(personality_profile: dict) -> dict:
         - background_setting: One of "corner_office", "open_office", "linkedin_blue", "creative_space"
         - confidence_score: 0-100 indicating match quality
     """
-    bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
-    
     # Extract key information from personality profile
     personality_dims = personality_profile.get('personality_dimensions', {})
     dominant_traits = personality_profile.get('dominant_traits', [])
     vibe = personality_profile.get('vibe', '')
     species = personality_profile.get('species', 'unknown')
     
-    career_mapping_prompt = f"""Based on this personality profile, determine the most appropriate human career and professional presentation.
-
-Personality Profile:
-- Species: {species}
-- Overall Vibe: {vibe}
-- Dominant Traits: {', '.join(dominant_traits)}
-- Key Dimensions:
-  - Confidence: {personality_dims.get('confidence', 50)}
-  - Leadership: {personality_dims.get('leadership', 50)}
-  - Assertiveness: {personality_dims.get('assertiveness', 50)}
-  - Strategic Thinking: {personality_dims.get('strategic_thinking', 50)}
-  - Creativity: {personality_dims.get('creativity', 50)}
-  - Organization: {personality_dims.get('organization', 50)}
-  - Sociability: {personality_dims.get('sociability', 50)}
-  - Empathy: {personality_dims.get('empathy', 50)}
-  - Ambition: {personality_dims.get('ambition', 50)}
-  - Would Steal Lunch: {personality_dims.get('would_steal_lunch', 0)}
-  - Sends Passive-Aggressive Emails: {personality_dims.get('sends_passive_aggressive_emails', 0)}
-
-Provide your career mapping in the following JSON format:
-
-{{
-    "job_title": "<specific job title>",
-    "seniority": "<entry-level|mid-level|senior|executive>",
-    "industry": "<industry sector>",
-    "work_style": "<brief description of work approach>",
-    "attire_style": "<suit|business_casual|creative|scrubs>",
-    "background_setting": "<corner_office|open_office|linkedin_blue|creative_space>",
-    "confidence_score": <0-100>
-}}
-
-Guidelines:
-- Match job title to dominant personality traits
-- High confidence/leadership/ambition → senior or executive roles
-- High creativity/spontaneity → creative industries
-- High organization/detail → analytical/administrative roles
-- High empathy/sociability → people-facing roles
-- Consider the "would steal lunch" and "passive-aggressive emails" scores for realism
-- Attire should match industry and seniority
-- Background should match seniority (executives get corner offices)
-- Confidence score reflects how well the personality fits the role"""
+    # Clear archetypes don't need Claude
+    prototype_match = match_career_prototype(personality_dims)
+    if prototype_match is not None:
+        return prototype_match
+    
+    cache_key = None
+    if CAREER_CACHE_TABLE:
+        cache_key = personality_fingerprint(species, personality_dims, dominant_traits)
+        cached = get_cached_career(cache_key)
+        if cached is not None:
+            return cached
+    
+    career_mapping_prompt = CAREER_PROFILE_TEMPLATE.substitute(
+        species=species,
+        vibe=vibe,
+        dominant_traits=', '.join(dominant_traits),
+        **{name: personality_dims.get(name, default) for name, default in CAREER_DIMENSIONS}
+    )
 
     def make_bedrock_call():
-        response = bedrock.invoke_model(
-            modelId='anthropic.claude-3-5-sonnet-20241022-v2:0',
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 1000,
-                "messages": [{
-                    "role": "user",
-                    "content": career_mapping_prompt
-                }]
-            })
-        )
-        
-        response_body = json.loads(response['body'].read())
-        content = response_body['content'][0]['text']
-        
-        # Extract JSON from response
-        if '```json' in content:
-            content = content.split('```json')[1].split('```')[0].strip()
-        elif '```' in content:
-            content = content.split('```')[1].split('```')[0].strip()
-        
-        return json.loads(content)
+        request_body = orjson.dumps({
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 1000,
+            "system": _CAREER_SYSTEM,
+            "messages": [{
+                "role": "user",
+                "content": career_mapping_prompt
+            }],
+            **_CAREER_OUTPUT
+        })
+        response_body = invoke_claude(request_body, model_id=CAREER_MODEL_ID)
+        return parse_claude_json(response_body)
+    
+    result = retry_on_invalid_json(make_bedrock_call)
     
-    # Call Bedrock with retry logic
-    result = retry_with_exponential_backoff(make_bedrock_call)
+    if cache_key:
+        put_cached_career(cache_key, result)
     
     return result
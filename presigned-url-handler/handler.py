@@ -5,18 +5,73 @@ Generates presigned S3 POST URLs for direct image uploads.
 import json
 import uuid
 import os
+import hmac
+import re
+import time
 import logging
 import functools
 from datetime import datetime, timezone
-from typing import Dict, Any, Callable
+import urllib.request
+from typing import Dict, Any, List, Callable
 
 import boto3
+import botocore.session
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+from botocore.config import Config
+
+# orjson is several times faster than json for request and message bodies;
+# fall back to the standard library where it is not packaged
+try:
+    import orjson
+
+    def dumps_json(obj: Any) -> str:
+        """Serialize obj to a JSON string."""
+        return orjson.dumps(obj).decode()
+
+    loads_json = orjson.loads
+except ImportError:
+    dumps_json = json.dumps
+    loads_json = json.loads
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+# Response headers shared by every API response
+RESPONSE_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
+    'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
+}
+
+# Shared HTTP settings: a larger keep-alive pool so sockets are reused
+# across calls and warm invocations, and botocore's adaptive retries
+# (client-side rate limiting plus jittered backoff) for throttling
+CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 4},
+)
+
+# AWS clients are created on first use and reused across warm invocations
+_clients: Dict[str, Any] = {}
+
+
+def get_client(service: str) -> Any:
+    """Get a cached boto3 client for a service."""
+    if service not in _clients:
+        _clients[service] = boto3.client(service, config=CLIENT_CONFIG)
+    return _clients[service]
+
+
+# Metrics emitted during an invocation are sent together when it ends
+METRIC_BATCH_SIZE = 1000
+_metric_buffer: List[Dict[str, Any]] = []
+
+
 def log_error(component: str, operation: str, error: Exception, context: dict) -> None:
     """Log error with structured context."""
     logger.error(json.dumps({
@@ -30,20 +85,33 @@ def log_error(component: str, operation: str, error: Exception, context: dict) -
 
 
 def emit_metric(metric_name: str, value: float = 1.0, dimensions: dict = None) -> None:
-    """Emit CloudWatch metric."""
+    """Buffer a CloudWatch metric until flush_metrics sends the batch."""
+    metric_data = {
+        'MetricName': metric_name,
+        'Value': value,
+        'Unit': 'Count',
+        'Timestamp': datetime.now(timezone.utc)
+    }
+    if dimensions:
+        metric_data['Dimensions'] = [
+            {'Name': k, 'Value': v} for k, v in dimensions.items()
+        ]
+    _metric_buffer.append(metric_data)
+
+
+def flush_metrics() -> None:
+    """Send buffered metrics to CloudWatch, up to METRIC_BATCH_SIZE per call."""
+    if not _metric_buffer:
+        return
+    metrics = _metric_buffer[:]
+    del _metric_buffer[:len(metrics)]
     try:
-        cloudwatch = boto3.client('cloudwatch')
-        metric_data = {
-            'MetricName': metric_name,
-            'Value': value,
-            'Unit': 'Count',
-            'Timestamp': datetime.now(timezone.utc)
-        }
-        if dimensions:
-            metric_data['Dimensions'] = [
-                {'Name': k, 'Value': v} for k, v in dimensions.items()
-            ]
-        cloudwatch.put_metric_data(Namespace='PetAvatar', MetricData=[metric_data])
+        cloudwatch = get_client('cloudwatch')
+        for start in range(0, len(metrics), METRIC_BATCH_SIZE):
+            cloudwatch.put_metric_data(
+                Namespace='PetAvatar',
+                MetricData=metrics[start:start + METRIC_BATCH_SIZE]
+            )
     except Exception:
         pass  # Don't fail on metric emission errors
 
@@ -52,13 +120,8 @@ def create_error_response(status_code: int, error_message: str, error_type: str
     """Create standardized error response."""
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
-            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
-        },
-        'body': json.dumps({
+        'headers': RESPONSE_HEADERS,
+        'body': dumps_json({
             'error': error_message,
             'error_type': error_type,
             'timestamp': datetime.now(timezone.utc).isoformat()
@@ -81,9 +144,65 @@ def handle_lambda_errors(func: Callable) -> Callable:
             )
             emit_metric("HandlerError", dimensions={"Component": func.__name__})
             return create_error_response(500, str(e), type(e).__name__)
+        finally:
+            flush_metrics()
     return wrapper
 
 
+# Botocore session used only for credentials when signing the direct
+# GetSecretValue call; it never loads the Secrets Manager service model
+_botocore_session = None
+
+
+def get_secret_string(secret_arn: str) -> str:
+    """
+    Fetch a secret's SecretString with one SigV4-signed HTTPS call.
+    
+    Falls back to the Secrets Manager client if the direct call fails.
+    """
+    global _botocore_session
+    try:
+        if _botocore_session is None:
+            _botocore_session = botocore.session.get_session()
+        # The region is part of the secret ARN: arn:aws:secretsmanager:<region>:...
+        arn_parts = secret_arn.split(':')
+        region = arn_parts[3] if len(arn_parts) > 3 and arn_parts[3] else os.environ['AWS_REGION']
+        url = f'https://secretsmanager.{region}.amazonaws.com/'
+        body = json.dumps({'SecretId': secret_arn}).encode()
+        aws_request = AWSRequest(method='POST', url=url, data=body, headers={
+            'Content-Type': 'application/x-amz-json-1.1',
+            'X-Amz-Target': 'secretsmanager.GetSecretValue',
+        })
+        SigV4Auth(_botocore_session.get_credentials(), 'secretsmanager', region).add_auth(aws_request)
+        request = urllib.request.Request(url, data=body, headers=dict(aws_request.headers), method='POST')
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return loads_json(response.read())['SecretString']
+    except Exception as e:
+        log_error("presigned-url-handler", "get_secret_string", e, {"fallback": "secretsmanager_client"})
+        response = get_client('secretsmanager').get_secret_value(SecretId=secret_arn)
+        return response['SecretString']
+
+
+# Shape of keys issued by scripts/create-infrastructure.py
+# (secrets.token_urlsafe(32): 43 URL-safe base64 characters)
+API_KEY_PATTERN = re.compile(r'\A[A-Za-z0-9_-]{43}\Z')
+
+# Decoded API key, refreshed from Secrets Manager once the TTL expires
+API_KEY_CACHE_TTL_SECONDS = 300
+_KEY_CACHE: Dict[str, Any] = {"value": None, "expires": 0.0}
+
+
+def get_cached_api_key(secret_arn: str) -> str:
+    """Get the valid API key, fetching it from Secrets Manager on cache miss."""
+    if time.monotonic() < _KEY_CACHE["expires"]:
+        return _KEY_CACHE["value"]
+
+    valid_key = loads_json(get_secret_string(secret_arn)).get('api_key') or ''
+    _KEY_CACHE["value"] = valid_key
+    _KEY_CACHE["expires"] = time.monotonic() + API_KEY_CACHE_TTL_SECONDS
+    return valid_key
+
+
 def validate_api_key(api_key: str) -> bool:
     """Validate API key against Secrets Manager."""
     if not api_key:
@@ -94,15 +213,35 @@ def validate_api_key(api_key: str) -> bool:
         if not secret_arn:
             return True  # For local testing
         
-        secrets_client = boto3.client('secretsmanager')
-        response = secrets_client.get_secret_value(SecretId=secret_arn)
-        valid_key = json.loads(response['SecretString']).get('api_key')
-        return api_key == valid_key
+        # Reject malformed keys before any Secrets Manager call
+        if not API_KEY_PATTERN.match(api_key):
+            return False
+        
+        valid_key = get_cached_api_key(secret_arn)
+        return hmac.compare_digest(api_key.encode(), valid_key.encode())
     except Exception as e:
         log_error("presigned-url-handler", "validate_api_key", e, {"has_api_key": bool(api_key)})
         return False
 
 
+def reset_clients() -> None:
+    """Drop cached clients, credentials and the API key so they are rebuilt on next use."""
+    global _botocore_session
+    _clients.clear()
+    _botocore_session = None
+    _KEY_CACHE["value"] = None
+    _KEY_CACHE["expires"] = 0.0
+
+
+# With Lambda SnapStart, drop anything tied to the init-time credentials
+# before the snapshot is taken so restored environments rebuild it
+try:
+    from snapshot_restore_py import register_before_snapshot
+    register_before_snapshot(reset_clients)
+except ImportError:
+    pass
+
+
 @handle_lambda_errors
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Generate presigned S3 URL for pet image upload."""
@@ -126,7 +265,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     s3_key = f'uploads/{job_id}/original'
     
     # Create presigned POST URL
-    s3_client = boto3.client('s3')
+    s3_client = get_client('s3')
     presigned_post = s3_client.generate_presigned_post(
         Bucket=upload_bucket,
         Key=s3_key,
@@ -143,13 +282,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     
     return {
         'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
-            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
-        },
-        'body': json.dumps({
+        'headers': RESPONSE_HEADERS,
+        'body': dumps_json({
             'job_id': job_id,
             'upload_url': presigned_post['url'],
             'upload_fields': presigned_post['fields'],
@@ -5,14 +5,26 @@ Validates S3 URI and initiates avatar processing.
 import json
 import uuid
 import os
+import hmac
+import time
 import re
 import sys
+import urllib.request
 import boto3
+import botocore.session
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from datetime import datetime, timezone
 from typing import Dict, Any, Tuple
 
-# Add src to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+# src is importable from the petavatar-shared layer (/opt/python) or
+# PYTHONPATH; in a source checkout it is found in the repository root
+try:
+    import src.utils  # noqa: F401
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.utils import (
     handle_lambda_errors,
     log_error,
@@ -20,6 +32,127 @@ from src.utils import (
     create_error_response
 )
 
+# orjson is several times faster than json for request and message bodies;
+# fall back to the standard library where it is not packaged
+try:
+    import orjson
+
+    def dumps_json(obj: Any) -> str:
+        """Serialize obj to a JSON string."""
+        return orjson.dumps(obj).decode()
+
+    loads_json = orjson.loads
+except ImportError:
+    dumps_json = json.dumps
+    loads_json = json.loads
+
+
+# Response headers shared by every API response
+RESPONSE_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
+    'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
+}
+
+# Shared HTTP settings: a larger keep-alive pool so sockets are reused
+# across calls and warm invocations, and botocore's adaptive retries
+# (client-side rate limiting plus jittered backoff) for throttling
+CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 4},
+)
+
+# S3 URI (s3://bucket/key) and upload key (uploads/{job_id}/...) formats
+S3_URI_PATTERN = re.compile(r'^s3://([^/]+)/(.+)$')
+UPLOAD_KEY_PATTERN = re.compile(r'uploads/([^/]+)/')
+
+# Job records expire from DynamoDB after 7 days
+JOB_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# AWS clients are created on first use and reused across warm invocations
+_clients: Dict[str, Any] = {}
+
+
+def get_client(service: str) -> Any:
+    """Get a cached boto3 client for a service."""
+    if service not in _clients:
+        _clients[service] = boto3.client(service, config=CLIENT_CONFIG)
+    return _clients[service]
+
+
+# Botocore session used only for credentials when signing the direct
+# GetSecretValue call; it never loads the Secrets Manager service model
+_botocore_session = None
+
+
+def get_secret_string(secret_arn: str) -> str:
+    """
+    Fetch a secret's SecretString with one SigV4-signed HTTPS call.
+    
+    Falls back to the Secrets Manager client if the direct call fails.
+    """
+    global _botocore_session
+    try:
+        if _botocore_session is None:
+            _botocore_session = botocore.session.get_session()
+        # The region is part of the secret ARN: arn:aws:secretsmanager:<region>:...
+        arn_parts = secret_arn.split(':')
+        region = arn_parts[3] if len(arn_parts) > 3 and arn_parts[3] else os.environ['AWS_REGION']
+        url = f'https://secretsmanager.{region}.amazonaws.com/'
+        body = json.dumps({'SecretId': secret_arn}).encode()
+        aws_request = AWSRequest(method='POST', url=url, data=body, headers={
+            'Content-Type': 'application/x-amz-json-1.1',
+            'X-Amz-Target': 'secretsmanager.GetSecretValue',
+        })
+        SigV4Auth(_botocore_session.get_credentials(), 'secretsmanager', region).add_auth(aws_request)
+        request = urllib.request.Request(url, data=body, headers=dict(aws_request.headers), method='POST')
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return loads_json(response.read())['SecretString']
+    except Exception as e:
+        log_error("process-handler", "get_secret_string", e, {"fallback": "secretsmanager_client"})
+        response = get_client('secretsmanager').get_secret_value(SecretId=secret_arn)
+        return response['SecretString']
+
+
+# Shape of keys issued by scripts/create-infrastructure.py
+# (secrets.token_urlsafe(32): 43 URL-safe base64 characters)
+API_KEY_PATTERN = re.compile(r'\A[A-Za-z0-9_-]{43}\Z')
+
+# Decoded API key, refreshed from Secrets Manager once the TTL expires
+API_KEY_CACHE_TTL_SECONDS = 300
+_KEY_CACHE: Dict[str, Any] = {"value": None, "expires": 0.0}
+
+
+def get_cached_api_key(secret_arn: str) -> str:
+    """Get the valid API key, fetching it from Secrets Manager on cache miss."""
+    if time.monotonic() < _KEY_CACHE["expires"]:
+        return _KEY_CACHE["value"]
+
+    valid_key = loads_json(get_secret_string(secret_arn)).get('api_key') or ''
+    _KEY_CACHE["value"] = valid_key
+    _KEY_CACHE["expires"] = time.monotonic() + API_KEY_CACHE_TTL_SECONDS
+    return valid_key
+
+
+def reset_clients() -> None:
+    """Drop cached clients, credentials and the API key so they are rebuilt on next use."""
+    global _botocore_session
+    _clients.clear()
+    _botocore_session = None
+    _KEY_CACHE["value"] = None
+    _KEY_CACHE["expires"] = 0.0
+
+
+# With Lambda SnapStart, drop anything tied to the init-time credentials
+# before the snapshot is taken so restored environments rebuild it
+try:
+    from snapshot_restore_py import register_before_snapshot
+    register_before_snapshot(reset_clients)
+except ImportError:
+    pass
+
 
 def validate_api_key(api_key: str) -> bool:
     """
@@ -40,11 +173,13 @@ def validate_api_key(api_key: str) -> bool:
             # For local testing, accept any non-empty key
             return True
         
-        secrets_client = boto3.client('secretsmanager')
-        response = secrets_client.get_secret_value(SecretId=secret_arn)
-        valid_key = json.loads(response['SecretString']).get('api_key')
+        # Reject malformed keys before any Secrets Manager call
+        if not API_KEY_PATTERN.match(api_key):
+            return False
         
-        return api_key == valid_key
+        valid_key = get_cached_api_key(secret_arn)
+        
+        return hmac.compare_digest(api_key.encode(), valid_key.encode())
     except Exception as e:
         log_error(
             component="process-handler",
@@ -69,8 +204,7 @@ def parse_s3_uri(s3_uri: str) -> Tuple[str, str]:
         ValueError: If URI format is invalid
     """
     # Requirement 3.1: Validate S3 URI format
-    pattern = r'^s3://([^/]+)/(.+)$'
-    match = re.match(pattern, s3_uri)
+    match = S3_URI_PATTERN.match(s3_uri)
     
     if not match:
         raise ValueError('Invalid S3 URI format. Expected: s3://bucket-name/key')
@@ -95,7 +229,7 @@ def validate_s3_object(bucket: str, key: str) -> Dict[str, Any]:
     Raises:
         ValueError: If object doesn't exist or validation fails
     """
-    s3_client = boto3.client('s3')
+    s3_client = get_client('s3')
     
     try:
         # Requirement 3.2: Verify S3 object exists
@@ -139,8 +273,7 @@ def extract_job_id(key: str) -> str:
         Job ID
     """
     # Try to extract job ID from key pattern: uploads/{job_id}/...
-    pattern = r'uploads/([^/]+)/'
-    match = re.match(pattern, key)
+    match = UPLOAD_KEY_PATTERN.match(key)
     
     if match:
         return match.group(1)
@@ -165,7 +298,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     #     return create_error_response(status_code=401, error_message='Unauthorized: Invalid API key', error_type='AuthenticationError')
     
     # Parse request body
-    body = json.loads(event.get('body', '{}'))
+    body = loads_json(event.get('body') or '{}')
     s3_uri = body.get('s3_uri')
     
     if not s3_uri:
@@ -199,29 +332,38 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             error_type='ValidationError'
         )
     
-    # Verify object exists and validate format/size
-    try:
-        validate_s3_object(bucket, key)
-    except ValueError as e:
-        emit_metric(
-            "ValidationError",
-            dimensions={"Component": "process-handler", "ErrorType": "InvalidS3Object"}
-        )
-        log_error(
-            component="process-handler",
-            operation="validate_s3_object",
-            error=e,
-            context={"bucket": bucket, "key": key}
-        )
-        return create_error_response(
-            status_code=400,
-            error_message=str(e),
-            error_type='ValidationError'
-        )
-    
     # Extract or generate job ID
     job_id = extract_job_id(key)
     
+    # Objects uploaded through our presigned POST had their size enforced by
+    # the policy conditions, so skip the HEAD round-trip for them; the agent
+    # checks the content type when it reads the image
+    trusted_upload = (
+        bucket == os.environ.get('S3_UPLOAD_BUCKET')
+        and key.startswith(f'uploads/{job_id}/')
+    )
+    
+    # Verify object exists and validate format/size
+    if not trusted_upload:
+        try:
+            validate_s3_object(bucket, key)
+        except ValueError as e:
+            emit_metric(
+                "ValidationError",
+                dimensions={"Component": "process-handler", "ErrorType": "InvalidS3Object"}
+            )
+            log_error(
+                component="process-handler",
+                operation="validate_s3_object",
+                error=e,
+                context={"bucket": bucket, "key": key}
+            )
+            return create_error_response(
+                status_code=400,
+                error_message=str(e),
+                error_type='ValidationError'
+            )
+    
     # Get environment variables
     table_name = os.environ.get('DYNAMODB_TABLE_NAME')
     queue_url = os.environ.get('SQS_QUEUE_URL')
@@ -239,35 +381,72 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         )
         raise ValueError('Missing required environment variables')
     
-    # Requirement 3.4: Create DynamoDB record with status "queued"
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table(table_name)
-    
-    timestamp = datetime.now(timezone.utc).isoformat()
-    ttl = int(datetime.now(timezone.utc).timestamp()) + (7 * 24 * 60 * 60)  # 7 days
+    # Requirement 3.4: Create DynamoDB record with status "queued", then send
+    # the SQS message. The send waits for the write, since the worker cannot
+    # claim a message whose job record does not exist
+    now = datetime.now(timezone.utc)
+    timestamp = now.isoformat()
+    ttl = int(now.timestamp()) + JOB_TTL_SECONDS
     
-    table.put_item(
-        Item={
-            'job_id': job_id,
-            'status': 'queued',
-            'created_at': timestamp,
-            'updated_at': timestamp,
-            's3_upload_key': key,
-            'progress': 0,
-            'ttl': ttl
+    dynamodb_client = get_client('dynamodb')
+    try:
+        dynamodb_client.put_item(
+            TableName=table_name,
+            Item={
+                'job_id': {'S': job_id},
+                'status': {'S': 'queued'},
+                'created_at': {'S': timestamp},
+                'updated_at': {'S': timestamp},
+                's3_upload_key': {'S': key},
+                'progress': {'N': '0'},
+                'ttl': {'N': str(ttl)}
+            },
+            # A resubmitted job keeps its record and is not queued again
+            ConditionExpression='attribute_not_exists(job_id)',
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+        existing = e.response.get('Item') or {}
+        return {
+            'statusCode': 200,
+            'headers': RESPONSE_HEADERS,
+            'body': dumps_json({
+                'job_id': job_id,
+                'status': existing.get('status', {}).get('S', 'unknown'),
+                'message': 'Processing already initiated'
+            })
         }
-    )
     
-    # Requirement 3.4: Send message to SQS queue
-    sqs_client = boto3.client('sqs')
-    sqs_client.send_message(
-        QueueUrl=queue_url,
-        MessageBody=json.dumps({
-            'job_id': job_id,
-            's3_upload_key': key,
-            'timestamp': timestamp
-        })
-    )
+    try:
+        get_client('sqs').send_message(
+            QueueUrl=queue_url,
+            MessageBody=dumps_json({
+                'job_id': job_id,
+                's3_upload_key': key,
+                'timestamp': timestamp
+            })
+        )
+    except Exception:
+        # Remove the record so the client can resubmit the job; it was only
+        # just created, so nothing else has written to it
+        try:
+            dynamodb_client.delete_item(
+                TableName=table_name,
+                Key={'job_id': {'S': job_id}},
+                ConditionExpression='#status = :queued',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={':queued': {'S': 'queued'}}
+            )
+        except Exception as cleanup_error:
+            log_error(
+                component="process-handler",
+                operation="delete_unqueued_job",
+                error=cleanup_error,
+                context={"job_id": job_id}
+            )
+        raise
     
     # Emit success metric
     emit_metric(
@@ -277,13 +456,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     
     return {
         'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
-            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
-        },
-        'body': json.dumps({
+        'headers': RESPONSE_HEADERS,
+        'body': dumps_json({
             'job_id': job_id,
             'status': 'queued',
             'message': 'Processing initiated'
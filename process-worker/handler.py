@@ -7,14 +7,86 @@ import os
 import base64
 import time
 import logging
-from typing import Dict, Any, Optional
-from datetime import datetime, timezone
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 
 import boto3
-
-# Configure logging
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+# orjson is several times faster than json for request and message bodies;
+# fall back to the standard library where it is not packaged
+try:
+    import orjson
+
+    def dumps_json(obj: Any) -> str:
+        """Serialize obj to a JSON string."""
+        return orjson.dumps(obj).decode()
+
+    loads_json = orjson.loads
+except ImportError:
+    dumps_json = json.dumps
+    loads_json = json.loads
+
+# Configure logging; set LOG_LEVEL=WARNING to drop the per-job info line.
+# Level names are case-insensitive, and an unknown one falls back to INFO
+# rather than failing the import
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
+logger.setLevel(
+    logging.getLevelNamesMapping().get(os.environ.get("LOG_LEVEL", "INFO").upper(), logging.INFO)
+)
+
+
+# Shared HTTP settings: a larger keep-alive pool so sockets are reused
+# across calls and warm invocations, and botocore's adaptive retries
+# (client-side rate limiting plus jittered backoff) for throttling
+CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={"mode": "adaptive", "max_attempts": 4},
+)
+
+# Upper bound on SQS records processed at once within one invocation
+MAX_CONCURRENT_JOBS = 10
+
+# AWS clients are created on first use and reused across warm invocations.
+# Creation is locked because the default boto3 session is not thread safe
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(service: str) -> Any:
+    """Get a cached boto3 client for a service."""
+    client = _clients.get(service)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(service)
+            if client is None:
+                client = _clients[service] = boto3.client(service, config=CLIENT_CONFIG)
+    return client
+
+
+def reset_clients() -> None:
+    """Drop cached clients so they are rebuilt on next use."""
+    with _clients_lock:
+        _clients.clear()
+
+
+# With Lambda SnapStart, drop anything tied to the init-time credentials
+# before the snapshot is taken so restored environments rebuild it
+try:
+    from snapshot_restore_py import register_before_snapshot
+    register_before_snapshot(reset_clients)
+except ImportError:
+    pass
+
+
+# Metrics emitted during an invocation are sent together when it ends
+METRIC_BATCH_SIZE = 1000
+_metric_buffer: List[Dict[str, Any]] = []
 
 
 def log_error(component: str, operation: str, error: Exception, context: dict) -> None:
@@ -30,38 +102,86 @@ def log_error(component: str, operation: str, error: Exception, context: dict) -
 
 
 def emit_metric(metric_name: str, value: float = 1.0, unit: str = "Count", dimensions: dict = None) -> None:
-    """Emit CloudWatch metric."""
+    """Buffer a CloudWatch metric until flush_metrics sends the batch."""
+    metric_data = {
+        'MetricName': metric_name,
+        'Value': value,
+        'Unit': unit,
+        'Timestamp': datetime.now(timezone.utc)
+    }
+    if dimensions:
+        metric_data['Dimensions'] = [
+            {'Name': k, 'Value': v} for k, v in dimensions.items()
+        ]
+    _metric_buffer.append(metric_data)
+
+
+def flush_metrics() -> None:
+    """Send buffered metrics to CloudWatch, up to METRIC_BATCH_SIZE per call."""
+    if not _metric_buffer:
+        return
+    metrics = _metric_buffer[:]
+    del _metric_buffer[:len(metrics)]
     try:
-        cloudwatch = boto3.client('cloudwatch')
-        metric_data = {
-            'MetricName': metric_name,
-            'Value': value,
-            'Unit': unit,
-            'Timestamp': datetime.now(timezone.utc)
-        }
-        if dimensions:
-            metric_data['Dimensions'] = [
-                {'Name': k, 'Value': v} for k, v in dimensions.items()
-            ]
-        cloudwatch.put_metric_data(Namespace='PetAvatar', MetricData=[metric_data])
+        cloudwatch = get_client('cloudwatch')
+        for start in range(0, len(metrics), METRIC_BATCH_SIZE):
+            cloudwatch.put_metric_data(
+                Namespace='PetAvatar',
+                MetricData=metrics[start:start + METRIC_BATCH_SIZE]
+            )
     except Exception:
         pass
 
 
-def retry_with_exponential_backoff(max_retries: int = 3, base_delay: float = 1.0):
-    """Decorator for retry with exponential backoff."""
-    def decorator(func):
-        def wrapper(*args, **kwargs):
-            for attempt in range(max_retries):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        raise
-                    delay = base_delay * (2 ** attempt)
-                    time.sleep(delay)
-        return wrapper
-    return decorator
+# Result fields copied onto the job record when a job completes
+RESULT_FIELDS = ("identity_package", "pet_analysis", "s3_avatar_key")
+STATUS_ATTR_NAMES = {"#status": "status"}
+
+
+@functools.lru_cache(maxsize=None)
+def update_expression(fields: Tuple[str, ...]) -> str:
+    """Build the UpdateExpression for a set of optional fields, once per combination."""
+    return "SET #status = :status, updated_at = :updated_at" + "".join(
+        f", {name} = :{name}" for name in fields
+    )
+
+
+class WorkerConfig(NamedTuple):
+    """Environment configuration for the worker."""
+    table_name: str
+    upload_bucket: str
+    generated_bucket: str
+
+
+@functools.lru_cache(maxsize=None)
+def get_worker_config() -> WorkerConfig:
+    """Read the worker's environment once per container."""
+    config = WorkerConfig(
+        table_name=os.environ.get("DYNAMODB_TABLE_NAME"),
+        upload_bucket=os.environ.get("S3_UPLOAD_BUCKET"),
+        generated_bucket=os.environ.get("S3_GENERATED_BUCKET"),
+    )
+    # Not cached when incomplete, so every job fails with the same error
+    if not all(config):
+        raise ValueError("Required environment variables not set")
+    return config
+
+
+def to_attribute_value(value: Any) -> Dict[str, Any]:
+    """Marshal a JSON-like Python value into a DynamoDB attribute value."""
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, (int, float)):
+        return {"N": str(value)}
+    if isinstance(value, dict):
+        return {"M": {k: to_attribute_value(v) for k, v in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {"L": [to_attribute_value(v) for v in value]}
+    raise TypeError(f"Unsupported DynamoDB attribute type: {type(value).__name__}")
 
 
 def update_job_status(
@@ -73,121 +193,147 @@ def update_job_status(
     results: Optional[dict] = None,
 ) -> None:
     """Update job status in DynamoDB."""
-    dynamodb = boto3.resource("dynamodb")
-    table = dynamodb.Table(table_name)
 
-    update_expr = "SET #status = :status, updated_at = :updated_at"
-    expr_attr_names = {"#status": "status"}
+    fields = {"progress": progress, "error_message": error_message or None}
+    if results:
+        fields.update((name, results[name]) for name in RESULT_FIELDS if name in results)
+
     expr_attr_values: Dict[str, Any] = {
-        ":status": status,
-        ":updated_at": datetime.now(timezone.utc).isoformat(),
+        ":status": {"S": status},
+        ":updated_at": {"S": datetime.now(timezone.utc).isoformat()},
     }
-
-    if progress is not None:
-        update_expr += ", progress = :progress"
-        expr_attr_values[":progress"] = progress
-
-    if error_message:
-        update_expr += ", error_message = :error_message"
-        expr_attr_values[":error_message"] = error_message
-
-    if results:
-        if "identity_package" in results:
-            update_expr += ", identity_package = :identity_package"
-            expr_attr_values[":identity_package"] = results["identity_package"]
-        if "pet_analysis" in results:
-            update_expr += ", pet_analysis = :pet_analysis"
-            expr_attr_values[":pet_analysis"] = results["pet_analysis"]
-        if "s3_avatar_key" in results:
-            update_expr += ", s3_avatar_key = :s3_avatar_key"
-            expr_attr_values[":s3_avatar_key"] = results["s3_avatar_key"]
-
-    table.update_item(
-        Key={"job_id": job_id},
-        UpdateExpression=update_expr,
-        ExpressionAttributeNames=expr_attr_names,
+    set_fields = []
+    for name, value in fields.items():
+        if value is not None:
+            set_fields.append(name)
+            expr_attr_values[f":{name}"] = to_attribute_value(value)
+
+    get_client("dynamodb").update_item(
+        TableName=table_name,
+        Key={"job_id": {"S": job_id}},
+        UpdateExpression=update_expression(tuple(set_fields)),
+        ExpressionAttributeNames=STATUS_ATTR_NAMES,
         ExpressionAttributeValues=expr_attr_values,
+        ReturnValues="NONE",
     )
 
 
-def download_image_from_s3(bucket: str, key: str) -> bytes:
-    """Download image from S3."""
-    s3_client = boto3.client("s3")
-    response = s3_client.get_object(Bucket=bucket, Key=key)
-    return response["Body"].read()
+# A job can be claimed while queued or failed, or while "processing" once
+# the previous claim is older than the queue's visibility timeout (its
+# worker is gone). Anything else is a duplicate SQS delivery
+CLAIM_TIMEOUT_SECONDS = 900
+CLAIM_CONDITION = (
+    "#status IN (:queued, :failed) "
+    "OR (#status = :status AND updated_at < :stale_before)"
+)
+
+
+def claim_job(table_name: str, job_id: str) -> bool:
+    """Mark a job as processing; return False if another delivery owns or finished it."""
+    now = datetime.now(timezone.utc)
+    try:
+        get_client("dynamodb").update_item(
+            TableName=table_name,
+            Key={"job_id": {"S": job_id}},
+            UpdateExpression="SET #status = :status, updated_at = :updated_at, progress = :progress",
+            ConditionExpression=CLAIM_CONDITION,
+            ExpressionAttributeNames=STATUS_ATTR_NAMES,
+            ExpressionAttributeValues={
+                ":status": {"S": "processing"},
+                ":updated_at": {"S": now.isoformat()},
+                ":progress": {"N": "10"},
+                ":queued": {"S": "queued"},
+                ":failed": {"S": "failed"},
+                ":stale_before": {"S": (now - timedelta(seconds=CLAIM_TIMEOUT_SECONDS)).isoformat()},
+            },
+            ReturnValues="NONE",
+            ReturnValuesOnConditionCheckFailure="ALL_OLD",
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            raise
+        # No record yet (the producer's write has not landed): fail the
+        # message so SQS redelivers it rather than dropping the job
+        if "Item" not in e.response:
+            raise LookupError(f"Job record not found: {job_id}") from e
+        return False
+    return True
 
 
 def upload_image_to_s3(bucket: str, key: str, image_data: bytes) -> None:
     """Upload image to S3."""
-    s3_client = boto3.client("s3")
+    s3_client = get_client("s3")
     s3_client.put_object(Bucket=bucket, Key=key, Body=image_data, ContentType="image/png")
 
 
+# Placeholder avatar (1x1 PNG) and mock agent output, built once per
+# container; neither is mutated by the pipeline
+PLACEHOLDER_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+)
+
+MOCK_RESULTS = {
+    "pet_analysis": {
+        "species": "dog",
+        "breed": "Golden Retriever",
+        "expression": "friendly",
+        "personality_traits": {
+            "confidence": 85,
+            "energy_level": 72,
+            "sociability": 95,
+            "playfulness": 88
+        }
+    },
+    "identity_package": {
+        "human_name": "Greg Thompson",
+        "job_title": "Senior Product Manager",
+        "seniority": "senior",
+        "bio": "Greg is a seasoned product leader with a natural ability to bring teams together. His friendly demeanor and high energy make him a favorite among colleagues. He excels at understanding customer needs and translating them into actionable product strategies.",
+        "skills": ["Product Strategy", "Team Leadership", "Customer Research", "Agile Methodologies", "Stakeholder Management"],
+        "career_trajectory": {
+            "past": "Started as a customer success representative, quickly moving into product roles",
+            "present": "Currently leading a team of 8 product managers at a growing tech company",
+            "future": "Aspiring to become VP of Product within the next 3 years"
+        },
+        "similarity_score": 87.5
+    },
+    "avatar_image_base64": ""  # Would be generated by Titan
+}
+
+
 def generate_mock_results(job_id: str) -> dict:
     """Generate mock results for testing (until AgentCore is deployed)."""
-    return {
-        "pet_analysis": {
-            "species": "dog",
-            "breed": "Golden Retriever",
-            "expression": "friendly",
-            "personality_traits": {
-                "confidence": 85,
-                "energy_level": 72,
-                "sociability": 95,
-                "playfulness": 88
-            }
-        },
-        "identity_package": {
-            "human_name": "Greg Thompson",
-            "job_title": "Senior Product Manager",
-            "seniority": "senior",
-            "bio": "Greg is a seasoned product leader with a natural ability to bring teams together. His friendly demeanor and high energy make him a favorite among colleagues. He excels at understanding customer needs and translating them into actionable product strategies.",
-            "skills": ["Product Strategy", "Team Leadership", "Customer Research", "Agile Methodologies", "Stakeholder Management"],
-            "career_trajectory": {
-                "past": "Started as a customer success representative, quickly moving into product roles",
-                "present": "Currently leading a team of 8 product managers at a growing tech company",
-                "future": "Aspiring to become VP of Product within the next 3 years"
-            },
-            "similarity_score": 87.5
-        },
-        "avatar_image_base64": ""  # Would be generated by Titan
-    }
+    return MOCK_RESULTS
 
 
 def process_job(job_id: str, s3_upload_key: str) -> None:
     """Process a single job through the avatar generation pipeline."""
     start_time = time.time()
 
-    table_name = os.environ.get("DYNAMODB_TABLE_NAME")
-    upload_bucket = os.environ.get("S3_UPLOAD_BUCKET")
-    generated_bucket = os.environ.get("S3_GENERATED_BUCKET")
+    table_name, upload_bucket, generated_bucket = get_worker_config()
 
-    if not table_name or not upload_bucket or not generated_bucket:
-        raise ValueError("Required environment variables not set")
+    # SQS delivers at least once, so the job is claimed before any work;
+    # a duplicate delivery stops here. Only state transitions are written,
+    # intermediate progress is not worth a DynamoDB round-trip per step
+    if not claim_job(table_name, job_id):
+        logger.info(dumps_json({"event": "job_skipped", "job_id": job_id}))
+        return
 
     try:
-        update_job_status(table_name, job_id, "processing", progress=10)
 
-        # Download image from S3
-        print(f"Downloading image from s3://{upload_bucket}/{s3_upload_key}")
-        image_bytes = download_image_from_s3(upload_bucket, s3_upload_key)
-        update_job_status(table_name, job_id, "processing", progress=30)
+        # The agent reads the image from S3 itself, so it is never
+        # downloaded or base64-encoded here
+        image_s3_uri = f"s3://{upload_bucket}/{s3_upload_key}"
 
         # For now, use mock results until AgentCore is deployed
-        # TODO: Replace with actual agent invocation
-        print(f"Generating results for job {job_id}")
+        # TODO: Replace with actual agent invocation, passing
+        # {"image_s3_uri": image_s3_uri, "job_id": job_id} as the payload
         agent_results = generate_mock_results(job_id)
-        update_job_status(table_name, job_id, "processing", progress=80)
 
         # Store avatar key (even if empty for now)
         avatar_key = f"generated/{job_id}/avatar.png"
         
-        # Create a placeholder avatar (1x1 PNG)
-        placeholder_png = base64.b64decode(
-            "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
-        )
-        upload_image_to_s3(generated_bucket, avatar_key, placeholder_png)
-        update_job_status(table_name, job_id, "processing", progress=90)
+        upload_image_to_s3(generated_bucket, avatar_key, PLACEHOLDER_PNG)
 
         results = {
             "identity_package": agent_results.get("identity_package", {}),
@@ -197,37 +343,80 @@ def process_job(job_id: str, s3_upload_key: str) -> None:
 
         update_job_status(table_name, job_id, "completed", progress=100, results=results)
 
+        # Pipeline timing goes to CloudWatch (batched with the invocation's
+        # other metrics) rather than into extra job record writes
         processing_time = time.time() - start_time
-        print(f"Successfully completed job {job_id} in {processing_time:.2f}s")
+        emit_metric("JobProcessingTime", processing_time, "Seconds", {"Component": "process-worker"})
+        logger.info(dumps_json({
+            "event": "job_complete",
+            "job_id": job_id,
+            "image_s3_uri": image_s3_uri,
+            "duration_ms": int(processing_time * 1000),
+        }))
 
     except Exception as e:
         log_error("process-worker", "process_job", e, {"job_id": job_id})
+        emit_metric("JobFailed", dimensions={"Component": "process-worker"})
         error_message = f"{type(e).__name__}: {str(e)}"
         update_job_status(table_name, job_id, "failed", error_message=error_message)
         raise
 
 
+# Responses that never vary, built once
+NO_RECORDS_RESPONSE = {"statusCode": 200, "body": dumps_json({"message": "No records"})}
+DONE_RESPONSE = {"statusCode": 200, "body": dumps_json({"message": "Done"}), "batchItemFailures": []}
+
+
+def process_record(record: Dict[str, Any]) -> None:
+    """Process the job referenced by a single SQS record."""
+    body = record.get("body") or ""
+    # Messages that cannot name a job are skipped without being parsed
+    if '"job_id"' not in body or '"s3_upload_key"' not in body:
+        return
+
+    message_body = loads_json(body)
+    job_id = message_body.get("job_id")
+    s3_upload_key = message_body.get("s3_upload_key")
+
+    if not job_id or not s3_upload_key:
+        return
+
+    process_job(job_id, s3_upload_key)
+
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Process SQS messages and orchestrate avatar generation."""
     try:
         records = event.get("Records", [])
 
         if not records:
-            return {"statusCode": 200, "body": json.dumps({"message": "No records"})}
-
-        for record in records:
-            message_body = json.loads(record.get("body", "{}"))
-            job_id = message_body.get("job_id")
-            s3_upload_key = message_body.get("s3_upload_key")
-
-            if not job_id or not s3_upload_key:
-                continue
-
-            print(f"Processing job {job_id}")
-            process_job(job_id, s3_upload_key)
+            return NO_RECORDS_RESPONSE
+
+        # Jobs are I/O bound, so a batch runs concurrently on the shared clients
+        with ThreadPoolExecutor(max_workers=min(len(records), MAX_CONCURRENT_JOBS)) as executor:
+            futures = [(record, executor.submit(process_record, record)) for record in records]
+
+        # Report failed records individually so only they are retried
+        batch_item_failures = []
+        errors = []
+        for record, future in futures:
+            error = future.exception()
+            if error is not None:
+                log_error("process-worker", "process_record", error, {"message_id": record.get("messageId")})
+                batch_item_failures.append({"itemIdentifier": record.get("messageId")})
+                errors.append(str(error))
+
+        if errors:
+            return {
+                "statusCode": 500,
+                "body": dumps_json({"error": "; ".join(errors)}),
+                "batchItemFailures": batch_item_failures,
+            }
 
-        return {"statusCode": 200, "body": json.dumps({"message": "Done"})}
+        return DONE_RESPONSE
 
     except Exception as e:
         log_error("process-worker", "handler", e, {})
-        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+        return {"statusCode": 500, "body": dumps_json({"error": str(e)})}
+    finally:
+        flush_metrics()
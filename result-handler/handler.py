@@ -4,18 +4,141 @@ Returns completed identity package with presigned URLs.
 """
 import json
 import os
+import sys
+import time
 import logging
 import functools
+import threading
 from datetime import datetime, timezone
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, Optional
 
 import boto3
+from botocore.config import Config
+
+# src is importable from the petavatar-shared layer (/opt/python) or
+# PYTHONPATH; in a source checkout it is found in the repository root
+try:
+    import src.utils  # noqa: F401
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils import emit_metric, flush_metrics
+
+# orjson is several times faster than json for request and message bodies;
+# fall back to the standard library where it is not packaged
+try:
+    import orjson
+
+    def dumps_json(obj: Any) -> str:
+        """Serialize obj to a JSON string."""
+        return orjson.dumps(obj).decode()
+
+    loads_json = orjson.loads
+except ImportError:
+    dumps_json = json.dumps
+    loads_json = json.loads
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+# Response headers shared by every API response
+RESPONSE_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
+    'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
+}
+
+# Shared HTTP settings: a larger keep-alive pool so sockets are reused
+# across calls and warm invocations, and botocore's adaptive retries
+# (client-side rate limiting plus jittered backoff) for throttling
+CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 4},
+)
+
+# AWS clients are created on first use and reused across warm invocations.
+# Creation is locked because the default boto3 session is not thread safe
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(service: str) -> Any:
+    """Get a cached boto3 client for a service."""
+    client = _clients.get(service)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(service)
+            if client is None:
+                client = _clients[service] = boto3.client(service, config=CLIENT_CONFIG)
+    return client
+
+
+# Only the attributes the response needs are read from the job record
+JOB_RESULT_PROJECTION = '#status, s3_avatar_key, identity_package, pet_analysis'
+STATUS_ATTR_NAMES = {'#status': 'status'}
+
+
+def get_job_item(table_name: str, job_id: str) -> Optional[Dict[str, Any]]:
+    """Get the projected job record."""
+    # Eventually consistent read: a job only reaches "completed" once, and
+    # a poll that races it just sees the previous status
+    return get_client('dynamodb').get_item(
+        TableName=table_name,
+        Key={'job_id': {'S': job_id}},
+        ProjectionExpression=JOB_RESULT_PROJECTION,
+        ExpressionAttributeNames=STATUS_ATTR_NAMES,
+        ConsistentRead=False
+    ).get('Item')
+
+
+def from_attribute_value(value: Dict[str, Any]) -> Any:
+    """Unmarshal a DynamoDB attribute value into a JSON-ready Python value."""
+    (kind, raw), = value.items()
+    if kind == 'S' or kind == 'BOOL':
+        return raw
+    if kind == 'N':
+        try:
+            return int(raw)
+        except ValueError:
+            return float(raw)
+    if kind == 'M':
+        return {k: from_attribute_value(v) for k, v in raw.items()}
+    if kind == 'L':
+        return [from_attribute_value(v) for v in raw]
+    if kind == 'NULL':
+        return None
+    if kind == 'SS':
+        return list(raw)
+    if kind == 'NS':
+        return [from_attribute_value({'N': n}) for n in raw]
+    raise TypeError(f"Unsupported DynamoDB attribute type: {kind}")
+
+
+# Presigned avatar URLs are valid for an hour. A URL is reused for repeat
+# requests within the same AVATAR_URL_REUSE_SECONDS window, so it always
+# has at least 55 minutes left when returned and is signed once per window
+AVATAR_URL_EXPIRES_IN = 3600
+AVATAR_URL_REUSE_SECONDS = 300
+
+
+@functools.lru_cache(maxsize=1024)
+def _presign_avatar_url(bucket: str, key: str, window: int) -> str:
+    """Sign a GET URL for an avatar; window only partitions the cache."""
+    return get_client('s3').generate_presigned_url(
+        'get_object',
+        Params={'Bucket': bucket, 'Key': key},
+        ExpiresIn=AVATAR_URL_EXPIRES_IN
+    )
+
+
+def get_avatar_url(bucket: str, key: str) -> str:
+    """Get a presigned avatar URL, reusing one signed in the current window."""
+    return _presign_avatar_url(bucket, key, int(time.time()) // AVATAR_URL_REUSE_SECONDS)
+
+
 def log_error(component: str, operation: str, error: Exception, context: dict) -> None:
     """Log error with structured context."""
     logger.error(json.dumps({
@@ -28,36 +151,12 @@ def log_error(component: str, operation: str, error: Exception, context: dict) -
     }))
 
 
-def emit_metric(metric_name: str, value: float = 1.0, dimensions: dict = None) -> None:
-    """Emit CloudWatch metric."""
-    try:
-        cloudwatch = boto3.client('cloudwatch')
-        metric_data = {
-            'MetricName': metric_name,
-            'Value': value,
-            'Unit': 'Count',
-            'Timestamp': datetime.now(timezone.utc)
-        }
-        if dimensions:
-            metric_data['Dimensions'] = [
-                {'Name': k, 'Value': v} for k, v in dimensions.items()
-            ]
-        cloudwatch.put_metric_data(Namespace='PetAvatar', MetricData=[metric_data])
-    except Exception:
-        pass
-
-
 def create_error_response(status_code: int, error_message: str, error_type: str = "Error") -> Dict[str, Any]:
     """Create standardized error response."""
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
-            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
-        },
-        'body': json.dumps({
+        'headers': RESPONSE_HEADERS,
+        'body': dumps_json({
             'error': error_message,
             'error_type': error_type,
             'timestamp': datetime.now(timezone.utc).isoformat()
@@ -80,6 +179,8 @@ def handle_lambda_errors(func: Callable) -> Callable:
             )
             emit_metric("HandlerError", dimensions={"Component": func.__name__})
             return create_error_response(500, str(e), type(e).__name__)
+        finally:
+            flush_metrics()
     return wrapper
 
 
@@ -102,52 +203,40 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     if not generated_bucket:
         raise ValueError('S3_GENERATED_BUCKET environment variable not set')
     
-    # Query DynamoDB for job
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table(table_name)
+    # Query DynamoDB for job. The low-level client returns typed attribute
+    # values, which are unmarshalled straight to JSON-ready values below
+    item = get_job_item(table_name, job_id)
     
-    response = table.get_item(Key={'job_id': job_id})
-    
-    if 'Item' not in response:
+    if item is None:
         return create_error_response(404, f'Job not found: {job_id}', 'NotFoundError')
     
-    item = response['Item']
+    status = item.get('status', {}).get('S')
     
     # Check status is "completed"
-    if item.get('status') != 'completed':
+    if status != 'completed':
         return create_error_response(
             409,
-            f'Job not completed. Current status: {item.get("status")}',
+            f'Job not completed. Current status: {status}',
             'ConflictError'
         )
     
     # Generate presigned URL for avatar (1 hour expiration)
-    s3_client = boto3.client('s3')
-    avatar_key = item.get('s3_avatar_key')
+    avatar_key = item.get('s3_avatar_key', {}).get('S')
     
     if not avatar_key:
         return create_error_response(500, 'Avatar image not found', 'InternalError')
     
-    avatar_url = s3_client.generate_presigned_url(
-        'get_object',
-        Params={'Bucket': generated_bucket, 'Key': avatar_key},
-        ExpiresIn=3600
-    )
+    avatar_url = get_avatar_url(generated_bucket, avatar_key)
     
     result = {
         'job_id': job_id,
         'avatar_url': avatar_url,
-        'identity': item.get('identity_package', {}),
-        'pet_analysis': item.get('pet_analysis', {})
+        'identity': from_attribute_value(item['identity_package']) if 'identity_package' in item else {},
+        'pet_analysis': from_attribute_value(item['pet_analysis']) if 'pet_analysis' in item else {}
     }
     
     return {
         'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
-            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
-        },
-        'body': json.dumps(result)
+        'headers': RESPONSE_HEADERS,
+        'body': dumps_json(result)
     }
@@ -4,19 +4,109 @@ Handles S3 upload event notifications and initiates processing.
 """
 import json
 import os
+import sys
 import re
+import time
+import random
 import logging
 import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable, Tuple
 
 import boto3
+from botocore.config import Config
+
+# src is importable from the petavatar-shared layer (/opt/python) or
+# PYTHONPATH; in a source checkout it is found in the repository root
+try:
+    import src.utils  # noqa: F401
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils import emit_metric, flush_metrics
+
+# orjson is several times faster than json for request and message bodies;
+# fall back to the standard library where it is not packaged
+try:
+    import orjson
+
+    def dumps_json(obj: Any) -> str:
+        """Serialize obj to a JSON string."""
+        return orjson.dumps(obj).decode()
+
+    loads_json = orjson.loads
+except ImportError:
+    dumps_json = json.dumps
+    loads_json = json.loads
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+# Shared HTTP settings: a larger keep-alive pool so sockets are reused
+# across calls and warm invocations, and botocore's adaptive retries
+# (client-side rate limiting plus jittered backoff) for throttling. DynamoDB
+# and SQS answer in milliseconds, so a stalled connection is cut short and
+# retried instead of holding the event for botocore's 60s defaults
+CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=5,
+    retries={'mode': 'adaptive', 'max_attempts': 4},
+)
+
+# Upload object keys (uploads/{job_id}/...)
+OBJECT_KEY_PATTERN = re.compile(r'^uploads/([^/]+)/.+')
+
+# Upper bound on job records written to DynamoDB at once
+MAX_CONCURRENT_WRITES = 16
+# SendMessageBatch accepts at most 10 entries per request
+SQS_BATCH_SIZE = 10
+# Entries that fail for a transient reason are resent this many times in
+# total, with a jittered exponential delay starting at SQS_RETRY_BASE_DELAY
+SQS_SEND_ATTEMPTS = 3
+SQS_RETRY_BASE_DELAY = 0.1
+# Job records expire from DynamoDB after 7 days
+JOB_TTL_SECONDS = 7 * 24 * 60 * 60
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_WRITES)
+
+# AWS clients are created on first use and reused across warm invocations.
+# Creation is locked because the default boto3 session is not thread safe
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(service: str) -> Any:
+    """Get a cached boto3 client for a service."""
+    client = _clients.get(service)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(service)
+            if client is None:
+                client = _clients[service] = boto3.client(service, config=CLIENT_CONFIG)
+    return client
+
+
+@functools.lru_cache(maxsize=None)
+def get_table(table_name: str) -> Any:
+    """Get a cached DynamoDB table resource."""
+    with _clients_lock:
+        return boto3.resource('dynamodb', config=CLIENT_CONFIG).Table(table_name)
+
+
+# Build the clients during container init rather than on the first event.
+# Best effort: without configuration they are built lazily as before
+if os.environ.get('DYNAMODB_TABLE_NAME'):
+    try:
+        get_table(os.environ['DYNAMODB_TABLE_NAME'])
+        get_client('sqs')
+    except Exception:
+        pass
+
+
 def log_error(component: str, operation: str, error: Exception, context: dict) -> None:
     """Log error with structured context."""
     logger.error(json.dumps({
@@ -29,25 +119,6 @@ def log_error(component: str, operation: str, error: Exception, context: dict) -
     }))
 
 
-def emit_metric(metric_name: str, value: float = 1.0, dimensions: dict = None) -> None:
-    """Emit CloudWatch metric."""
-    try:
-        cloudwatch = boto3.client('cloudwatch')
-        metric_data = {
-            'MetricName': metric_name,
-            'Value': value,
-            'Unit': 'Count',
-            'Timestamp': datetime.now(timezone.utc)
-        }
-        if dimensions:
-            metric_data['Dimensions'] = [
-                {'Name': k, 'Value': v} for k, v in dimensions.items()
-            ]
-        cloudwatch.put_metric_data(Namespace='PetAvatar', MetricData=[metric_data])
-    except Exception:
-        pass
-
-
 def handle_lambda_errors(func: Callable) -> Callable:
     """Decorator to handle Lambda errors consistently."""
     @functools.wraps(func)
@@ -56,17 +127,115 @@ def handle_lambda_errors(func: Callable) -> Callable:
             return func(event, context)
         except Exception as e:
             log_error(func.__name__, "handler_execution", e, {})
-            return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+            return {'statusCode': 500, 'body': dumps_json({'error': str(e)})}
+        finally:
+            flush_metrics()
     return wrapper
 
 
 def validate_object_key(key: str) -> Optional[str]:
     """Validate object key matches expected pattern and extract job ID."""
-    pattern = r'^uploads/([^/]+)/.+'
-    match = re.match(pattern, key)
+    match = OBJECT_KEY_PATTERN.match(key)
     return match.group(1) if match else None
 
 
+# Creates the job record or, for a repeated upload of the same job, only
+# refreshes its upload key, in one race-free round trip
+RECORD_JOB_EXPRESSION = (
+    'SET updated_at = :timestamp, s3_upload_key = :key, '
+    '#status = if_not_exists(#status, :queued), '
+    'created_at = if_not_exists(created_at, :timestamp), '
+    'progress = if_not_exists(progress, :zero), '
+    '#ttl = if_not_exists(#ttl, :ttl)'
+)
+RECORD_JOB_ATTR_NAMES = {'#status': 'status', '#ttl': 'ttl'}
+
+
+# Jobs a worker has claimed or finished; the worker skips new messages for
+# them, so they are not queued again
+ACTIVE_STATUSES = frozenset({'processing', 'completed'})
+
+
+def record_job(table: Any, job_id: str, object_key: str, timestamp: str, ttl: int) -> Tuple[bool, Optional[str]]:
+    """Create the job record, or refresh its upload key if the job exists.
+
+    Returns whether the write succeeded and the job's previous status
+    (None for a new job), read from the same call.
+    """
+    try:
+        response = table.update_item(
+            Key={'job_id': job_id},
+            UpdateExpression=RECORD_JOB_EXPRESSION,
+            ExpressionAttributeNames=RECORD_JOB_ATTR_NAMES,
+            ExpressionAttributeValues={
+                ':timestamp': timestamp,
+                ':key': object_key,
+                ':queued': 'queued',
+                ':zero': 0,
+                ':ttl': ttl
+            },
+            ReturnValues='UPDATED_OLD'
+        )
+        return True, response.get('Attributes', {}).get('status')
+    except Exception as e:
+        log_error("s3-event-handler", "update_dynamodb", e, {"job_id": job_id})
+        return False, None
+
+
+def send_batch(sqs_client: Any, queue_url: str, entries: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """Send one SendMessageBatch request, resending transiently failed entries.
+
+    Returns the entries' final failures; sender faults are not resent.
+    """
+    failed: List[Dict[str, Any]] = []
+    for attempt in range(SQS_SEND_ATTEMPTS):
+        if attempt:
+            time.sleep(random.uniform(0, SQS_RETRY_BASE_DELAY * (2 ** attempt)))
+        response = sqs_client.send_message_batch(QueueUrl=queue_url, Entries=entries)
+        retryable = []
+        for failure in response.get('Failed', []):
+            (failed if failure.get('SenderFault') else retryable).append(failure)
+        if not retryable:
+            return failed
+        retry_ids = {failure['Id'] for failure in retryable}
+        entries = [entry for entry in entries if entry['Id'] in retry_ids]
+    return failed + retryable
+
+
+def queue_jobs(sqs_client: Any, queue_url: str, batch: List[Tuple[str, str]], timestamp: str) -> int:
+    """Queue one batch of (job_id, object_key) jobs; return how many were accepted."""
+    try:
+        failed = send_batch(sqs_client, queue_url, [
+            {
+                'Id': str(index),
+                'MessageBody': dumps_json({
+                    'job_id': job_id,
+                    's3_upload_key': object_key,
+                    'timestamp': timestamp
+                })
+            }
+            for index, (job_id, object_key) in enumerate(batch)
+        ])
+    except Exception as e:
+        log_error("s3-event-handler", "send_sqs_message", e, {"job_ids": [job[0] for job in batch]})
+        return 0
+    
+    for failure in failed:
+        job_id = batch[int(failure['Id'])][0]
+        log_error(
+            "s3-event-handler",
+            "send_sqs_message",
+            RuntimeError(failure.get('Message', failure.get('Code'))),
+            {"job_id": job_id}
+        )
+    return len(batch) - len(failed)
+
+
+# The response body only carries counts, so it is formatted directly
+# rather than built as a dict and encoded
+EVENTS_PROCESSED_BODY = '{{"message":"Events processed","processed":{},"skipped":{},"errors":{}}}'
+
+
 @handle_lambda_errors
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Process S3 upload events and queue for avatar generation."""
@@ -76,13 +245,15 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     if not table_name or not queue_url:
         raise ValueError('Missing required environment variables')
     
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table(table_name)
-    sqs_client = boto3.client('sqs')
+    table = get_table(table_name)
+    sqs_client = get_client('sqs')
     
     processed_count = 0
     error_count = 0
     
+    # One write and one message per job; a later upload for the same job
+    # in this event replaces the earlier key, as sequential updates would
+    latest_keys: Dict[str, str] = {}
     for record in event.get('Records', []):
         s3_info = record.get('s3', {})
         bucket_name = s3_info.get('bucket', {}).get('name')
@@ -97,51 +268,50 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             error_count += 1
             continue
         
-        timestamp = datetime.now(timezone.utc).isoformat()
-        ttl = int(datetime.now(timezone.utc).timestamp()) + (7 * 24 * 60 * 60)
-        
-        try:
-            response = table.get_item(Key={'job_id': job_id})
-            if 'Item' not in response:
-                table.put_item(Item={
-                    'job_id': job_id,
-                    'status': 'queued',
-                    'created_at': timestamp,
-                    'updated_at': timestamp,
-                    's3_upload_key': object_key,
-                    'progress': 0,
-                    'ttl': ttl
-                })
-            else:
-                table.update_item(
-                    Key={'job_id': job_id},
-                    UpdateExpression='SET updated_at = :timestamp, s3_upload_key = :key',
-                    ExpressionAttributeValues={':timestamp': timestamp, ':key': object_key}
-                )
-        except Exception as e:
-            log_error("s3-event-handler", "update_dynamodb", e, {"job_id": job_id})
+        latest_keys[job_id] = object_key
+    
+    jobs = list(latest_keys.items())
+    now = datetime.now(timezone.utc)
+    timestamp = now.isoformat()
+    ttl = int(now.timestamp()) + JOB_TTL_SECONDS
+    
+    # Job records are independent, so write them concurrently
+    written = list(_executor.map(
+        lambda job: record_job(table, job[0], job[1], timestamp, ttl), jobs
+    ))
+    queued = []
+    skipped_count = 0
+    created_count = 0
+    for job, (ok, previous_status) in zip(jobs, written):
+        if not ok:
             error_count += 1
             continue
-        
-        try:
-            sqs_client.send_message(
-                QueueUrl=queue_url,
-                MessageBody=json.dumps({
-                    'job_id': job_id,
-                    's3_upload_key': object_key,
-                    'timestamp': timestamp
-                })
-            )
-            processed_count += 1
-        except Exception as e:
-            log_error("s3-event-handler", "send_sqs_message", e, {"job_id": job_id})
-            error_count += 1
+        if previous_status is None:
+            created_count += 1
+        if previous_status in ACTIVE_STATUSES:
+            skipped_count += 1
+        else:
+            queued.append(job)
+    
+    # Queue the recorded jobs, up to SQS_BATCH_SIZE messages per request,
+    # with the requests for a large event sent concurrently
+    batches = [queued[start:start + SQS_BATCH_SIZE] for start in range(0, len(queued), SQS_BATCH_SIZE)]
+    for sent in _executor.map(lambda batch: queue_jobs(sqs_client, queue_url, batch, timestamp), batches):
+        processed_count += sent
+    error_count += len(queued) - processed_count
+    
+    # Counted per event and emitted once each, not per record
+    dimensions = {"Component": "s3-event-handler"}
+    updated_count = len(queued) + skipped_count - created_count
+    for metric_name, count in (
+        ("DynamoDBRecordCreated", created_count),
+        ("DynamoDBRecordUpdated", updated_count),
+        ("SQSMessageSent", processed_count),
+    ):
+        if count:
+            emit_metric(metric_name, value=count, dimensions=dimensions)
     
     return {
         'statusCode': 200,
-        'body': json.dumps({
-            'message': 'Events processed',
-            'processed': processed_count,
-            'errors': error_count
-        })
+        'body': EVENTS_PROCESSED_BODY.format(processed_count, skipped_count, error_count)
     }
@@ -14,7 +14,8 @@ import json
 import secrets
 import sys
 import os
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Optional
 
 # Add src to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -28,19 +29,22 @@ from src.security import (
 )
 
 
-def get_account_id() -> str:
+def get_account_id(sts: Optional[Any] = None) -> str:
     """Get AWS account ID."""
-    sts = boto3.client('sts')
+    sts = sts or boto3.client('sts')
     return sts.get_caller_identity()['Account']
 
 
-def create_dynamodb_table(table_name: str = 'petavatar-jobs') -> Dict[str, Any]:
+def create_dynamodb_table(
+    table_name: str = 'petavatar-jobs',
+    dynamodb: Optional[Any] = None
+) -> Dict[str, Any]:
     """
     Create DynamoDB table for job tracking.
     
     Requirements: 12.2
     """
-    dynamodb = boto3.client('dynamodb')
+    dynamodb = dynamodb or boto3.client('dynamodb')
     
     try:
         response = dynamodb.create_table(
@@ -97,14 +101,18 @@ def create_dynamodb_table(table_name: str = 'petavatar-jobs') -> Dict[str, Any]:
         return {'TableName': table_name}
 
 
-def create_s3_bucket(bucket_name: str) -> Dict[str, Any]:
+def create_s3_bucket(
+    bucket_name: str,
+    s3: Optional[Any] = None,
+    region: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Create S3 bucket with security configurations.
     
     Requirements: 12.1, 12.2, 12.5
     """
-    s3 = boto3.client('s3')
-    region = boto3.session.Session().region_name or 'us-east-1'
+    s3 = s3 or boto3.client('s3')
+    region = region or boto3.session.Session().region_name or 'us-east-1'
     
     try:
         # Create bucket
@@ -163,13 +171,16 @@ def create_s3_bucket(bucket_name: str) -> Dict[str, Any]:
         raise
 
 
-def create_api_key(secret_name: str = 'petavatar-api-key') -> str:
+def create_api_key(
+    secret_name: str = 'petavatar-api-key',
+    secretsmanager: Optional[Any] = None
+) -> str:
     """
     Create API key and store in Secrets Manager.
     
     Requirements: 6.6
     """
-    secretsmanager = boto3.client('secretsmanager')
+    secretsmanager = secretsmanager or boto3.client('secretsmanager')
     
     # Generate secure API key
     api_key = secrets.token_urlsafe(32)
@@ -208,27 +219,36 @@ def main():
     print("=" * 50)
     
     try:
+        # One session for the whole run; its clients are shared by the steps
+        session = boto3.session.Session()
+        region = session.region_name or 'us-east-1'
+        
         # Get AWS account ID
-        account_id = get_account_id()
+        account_id = get_account_id(session.client('sts'))
         print(f"AWS Account ID: {account_id}\n")
         
-        # Create DynamoDB table
-        print("Creating DynamoDB table...")
-        create_dynamodb_table()
-        print()
-        
-        # Create S3 buckets
-        print("Creating S3 buckets...")
         upload_bucket = f'petavatar-uploads-{account_id}'
         generated_bucket = f'petavatar-generated-{account_id}'
         
-        create_s3_bucket(upload_bucket)
-        create_s3_bucket(generated_bucket)
-        print()
-        
-        # Create API key
-        print("Creating API key...")
-        api_key = create_api_key()
+        # The table, both buckets and the API key are independent, so they
+        # are created concurrently. Clients are built here, on the main
+        # thread, because a session is not thread safe
+        print("Creating DynamoDB table, S3 buckets and API key...")
+        dynamodb = session.client('dynamodb')
+        s3 = session.client('s3')
+        secretsmanager = session.client('secretsmanager')
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            api_key_future = executor.submit(create_api_key, secretsmanager=secretsmanager)
+            futures = [
+                executor.submit(create_dynamodb_table, dynamodb=dynamodb),
+                executor.submit(create_s3_bucket, upload_bucket, s3, region),
+                executor.submit(create_s3_bucket, generated_bucket, s3, region),
+                api_key_future,
+            ]
+            # Re-raise the first failure (the other steps still finish)
+            for future in as_completed(futures):
+                future.result()
+        api_key = api_key_future.result()
         print()
         
         # Summary
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Shared Layer Publishing Script
+
+Handlers are packaged by tc-functors from their own directories, so the
+shared src/utils package and third-party wheels such as orjson are not part
+of their deployment artifacts. This script builds both into the
+petavatar-shared Lambda layer (under python/, so they land on /opt/python
+and are importable as src.utils and orjson) and attaches the new layer
+version to the functions that use them.
+
+Run it after `tc create` or `tc update`, and again whenever src/utils or
+LAYER_REQUIREMENTS change.
+"""
+import io
+import subprocess
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import List, Optional
+
+import boto3
+
+LAYER_NAME = 'petavatar-shared'
+RUNTIME = 'python3.13'
+# Lambda's default architecture; wheels are fetched for it, not the host
+PLATFORM = 'manylinux2014_x86_64'
+
+# Functions whose topology.yml runtime lists the petavatar-shared layer
+SHARED_LAYER_FUNCTIONS = [
+    'presigned-url-handler',
+    'process-handler',
+    's3-event-handler',
+    'status-handler',
+    'result-handler',
+    'process-worker',
+]
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Files packaged into the layer, relative to the project root
+LAYER_SOURCES = [
+    'src/__init__.py',
+    'src/utils',
+]
+
+# Third-party packages installed into the layer, pinned to their uv.lock
+# versions. Handlers fall back to the standard library without them
+LAYER_REQUIREMENTS = [
+    'orjson==3.13.0',
+]
+
+
+def install_requirements(target: Path) -> None:
+    """
+    Install LAYER_REQUIREMENTS as Lambda-compatible wheels.
+
+    Args:
+        target: Directory to install the packages into
+    """
+    subprocess.run(
+        [
+            sys.executable, '-m', 'pip', 'install',
+            '--target', str(target),
+            '--platform', PLATFORM,
+            '--implementation', 'cp',
+            '--python-version', RUNTIME.removeprefix('python'),
+            '--only-binary=:all:',
+            '--quiet',
+            *LAYER_REQUIREMENTS,
+        ],
+        check=True
+    )
+
+
+def build_layer_zip() -> bytes:
+    """
+    Build the layer archive in memory.
+
+    Returns:
+        Zip file contents with every source and package under python/
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for source in LAYER_SOURCES:
+            path = PROJECT_ROOT / source
+            files = [path] if path.is_file() else sorted(path.rglob('*.py'))
+            for file in files:
+                archive.write(file, f'python/{file.relative_to(PROJECT_ROOT).as_posix()}')
+
+        with tempfile.TemporaryDirectory() as site_packages:
+            install_requirements(Path(site_packages))
+            for file in sorted(Path(site_packages).rglob('*')):
+                if file.is_file() and '__pycache__' not in file.parts:
+                    archive.write(file, f'python/{file.relative_to(site_packages).as_posix()}')
+    return buffer.getvalue()
+
+
+def publish_layer(zip_bytes: bytes) -> str:
+    """
+    Publish a new version of the shared layer.
+
+    Args:
+        zip_bytes: Layer archive contents
+
+    Returns:
+        Layer version ARN
+    """
+    lambda_client = boto3.client('lambda')
+    response = lambda_client.publish_layer_version(
+        LayerName=LAYER_NAME,
+        Description='PetAvatar shared handler utilities (src.utils) and orjson',
+        Content={'ZipFile': zip_bytes},
+        CompatibleRuntimes=[RUNTIME]
+    )
+    return response['LayerVersionArn']
+
+
+def find_function_name(handler_name: str) -> Optional[str]:
+    """
+    Find the deployed name of a tc-functors function.
+
+    tc-functors prefixes function names with the topology name and suffixes
+    them with the sandbox, e.g. petavatar_status-handler_rberger.
+
+    Args:
+        handler_name: Function name in topology.yml
+
+    Returns:
+        Deployed function name or None if not found
+    """
+    lambda_client = boto3.client('lambda')
+    paginator = lambda_client.get_paginator('list_functions')
+    for page in paginator.paginate():
+        for func in page['Functions']:
+            if func['FunctionName'].startswith(f'petavatar_{handler_name}'):
+                return func['FunctionName']
+    return None
+
+
+def attach_layer(function_name: str, layer_version_arn: str) -> None:
+    """
+    Point a function at a layer version, replacing older versions of it.
+
+    Args:
+        function_name: Deployed function name
+        layer_version_arn: Layer version ARN to attach
+    """
+    lambda_client = boto3.client('lambda')
+    config = lambda_client.get_function_configuration(FunctionName=function_name)
+    layer_arn = layer_version_arn.rsplit(':', 1)[0]
+    layers: List[str] = [
+        layer['Arn'] for layer in config.get('Layers', [])
+        if layer['Arn'].rsplit(':', 1)[0] != layer_arn
+    ]
+    layers.append(layer_version_arn)
+    lambda_client.update_function_configuration(FunctionName=function_name, Layers=layers)
+
+
+def main():
+    """Build, publish and attach the shared layer."""
+    print("PetAvatar Shared Layer Publishing")
+    print("=" * 60)
+
+    try:
+        zip_bytes = build_layer_zip()
+        print(f"✓ Built layer archive ({len(zip_bytes)} bytes)")
+
+        layer_version_arn = publish_layer(zip_bytes)
+        print(f"✓ Published {layer_version_arn}")
+
+        for handler_name in SHARED_LAYER_FUNCTIONS:
+            function_name = find_function_name(handler_name)
+            if function_name is None:
+                print(f"⚠ {handler_name} is not deployed, skipping")
+                continue
+            attach_layer(function_name, layer_version_arn)
+            print(f"✓ Attached layer to {function_name}")
+
+    except Exception as e:
+        print(f"\n✗ Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,7 +12,10 @@ Tests the complete flow:
 import boto3
 import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
+import random
 import sys
 import os
 from pathlib import Path
@@ -25,6 +28,29 @@ HEADERS = {
     "x-api-key": API_KEY
 }
 
+# One session for every request so connections (and TLS) are reused across
+# steps and status polls. Connection failures are retried with backoff;
+# the API key is passed per request so it is never sent to S3
+SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=Retry(total=3, backoff_factor=0.3))
+SESSION.mount('https://', _ADAPTER)
+
+
+# Minimal valid 1x1 JPEG, written when PIL is not installed
+_MINIMAL_JPEG = bytes.fromhex(
+    'ffd8ffe000104a46494600010100000100010000ffdb00430008060607060508'
+    '0707070909080a0c140d0c0b0b0c1912130f141d1a1f1e1d1a1c1c20242e2720'
+    '222c231c1c2837292c30313434341f27393d38323c2e333432ffc0000b080001'
+    '000101011100ffc4001f00000105010101010101000000000000000001020304'
+    '05060708090a0bffc400b5100002010303020403050504040000017d01020300'
+    '041105122131410613516107227114328191a1082342b1c11552d1f024336272'
+    '82090a161718191a25262728292a3435363738393a434445464748494a535455'
+    '565758595a636465666768696a737475767778797a838485868788898a929394'
+    '95969798999aa2a3a4a5a6a7a8a9aab2b3b4b5b6b7b8b9bac2c3c4c5c6c7c8c9'
+    'cad2d3d4d5d6d7d8d9dae1e2e3e4e5e6e7e8e9eaf1f2f3f4f5f6f7f8f9faffda'
+    '0008010100003f00fbd5db20a8f17ecdbfffd9'
+)
+
 
 def create_test_image(path: str) -> None:
     """Create a simple test JPEG image using PIL or raw bytes."""
@@ -35,41 +61,7 @@ def create_test_image(path: str) -> None:
         img.save(path, 'JPEG')
         print(f"✓ Created test image with PIL: {path}")
     except ImportError:
-        # Create minimal valid JPEG without PIL
-        # This is a 1x1 red pixel JPEG
-        jpeg_bytes = bytes([
-            0xFF, 0xD8, 0xFF, 0xE0, 0x00, 0x10, 0x4A, 0x46, 0x49, 0x46, 0x00, 0x01,
-            0x01, 0x00, 0x00, 0x01, 0x00, 0x01, 0x00, 0x00, 0xFF, 0xDB, 0x00, 0x43,
-            0x00, 0x08, 0x06, 0x06, 0x07, 0x06, 0x05, 0x08, 0x07, 0x07, 0x07, 0x09,
-            0x09, 0x08, 0x0A, 0x0C, 0x14, 0x0D, 0x0C, 0x0B, 0x0B, 0x0C, 0x19, 0x12,
-            0x13, 0x0F, 0x14, 0x1D, 0x1A, 0x1F, 0x1E, 0x1D, 0x1A, 0x1C, 0x1C, 0x20,
-            0x24, 0x2E, 0x27, 0x20, 0x22, 0x2C, 0x23, 0x1C, 0x1C, 0x28, 0x37, 0x29,
-            0x2C, 0x30, 0x31, 0x34, 0x34, 0x34, 0x1F, 0x27, 0x39, 0x3D, 0x38, 0x32,
-            0x3C, 0x2E, 0x33, 0x34, 0x32, 0xFF, 0xC0, 0x00, 0x0B, 0x08, 0x00, 0x01,
-            0x00, 0x01, 0x01, 0x01, 0x11, 0x00, 0xFF, 0xC4, 0x00, 0x1F, 0x00, 0x00,
-            0x01, 0x05, 0x01, 0x01, 0x01, 0x01, 0x01, 0x01, 0x00, 0x00, 0x00, 0x00,
-            0x00, 0x00, 0x00, 0x00, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06, 0x07, 0x08,
-            0x09, 0x0A, 0x0B, 0xFF, 0xC4, 0x00, 0xB5, 0x10, 0x00, 0x02, 0x01, 0x03,
-            0x03, 0x02, 0x04, 0x03, 0x05, 0x05, 0x04, 0x04, 0x00, 0x00, 0x01, 0x7D,
-            0x01, 0x02, 0x03, 0x00, 0x04, 0x11, 0x05, 0x12, 0x21, 0x31, 0x41, 0x06,
-            0x13, 0x51, 0x61, 0x07, 0x22, 0x71, 0x14, 0x32, 0x81, 0x91, 0xA1, 0x08,
-            0x23, 0x42, 0xB1, 0xC1, 0x15, 0x52, 0xD1, 0xF0, 0x24, 0x33, 0x62, 0x72,
-            0x82, 0x09, 0x0A, 0x16, 0x17, 0x18, 0x19, 0x1A, 0x25, 0x26, 0x27, 0x28,
-            0x29, 0x2A, 0x34, 0x35, 0x36, 0x37, 0x38, 0x39, 0x3A, 0x43, 0x44, 0x45,
-            0x46, 0x47, 0x48, 0x49, 0x4A, 0x53, 0x54, 0x55, 0x56, 0x57, 0x58, 0x59,
-            0x5A, 0x63, 0x64, 0x65, 0x66, 0x67, 0x68, 0x69, 0x6A, 0x73, 0x74, 0x75,
-            0x76, 0x77, 0x78, 0x79, 0x7A, 0x83, 0x84, 0x85, 0x86, 0x87, 0x88, 0x89,
-            0x8A, 0x92, 0x93, 0x94, 0x95, 0x96, 0x97, 0x98, 0x99, 0x9A, 0xA2, 0xA3,
-            0xA4, 0xA5, 0xA6, 0xA7, 0xA8, 0xA9, 0xAA, 0xB2, 0xB3, 0xB4, 0xB5, 0xB6,
-            0xB7, 0xB8, 0xB9, 0xBA, 0xC2, 0xC3, 0xC4, 0xC5, 0xC6, 0xC7, 0xC8, 0xC9,
-            0xCA, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8, 0xD9, 0xDA, 0xE1, 0xE2,
-            0xE3, 0xE4, 0xE5, 0xE6, 0xE7, 0xE8, 0xE9, 0xEA, 0xF1, 0xF2, 0xF3, 0xF4,
-            0xF5, 0xF6, 0xF7, 0xF8, 0xF9, 0xFA, 0xFF, 0xDA, 0x00, 0x08, 0x01, 0x01,
-            0x00, 0x00, 0x3F, 0x00, 0xFB, 0xD5, 0xDB, 0x20, 0xA8, 0xF1, 0x7E, 0xCD,
-            0xBF, 0xFF, 0xD9
-        ])
-        with open(path, 'wb') as f:
-            f.write(jpeg_bytes)
+        Path(path).write_bytes(_MINIMAL_JPEG)
         print(f"✓ Created minimal test JPEG: {path}")
 
 
@@ -82,7 +74,7 @@ def step1_get_presigned_url() -> dict:
     url = f"{BASE_URL}/presigned-url"
     print(f"GET {url}")
     
-    response = requests.get(url, headers=HEADERS)
+    response = SESSION.get(url, headers=HEADERS)
     print(f"Status: {response.status_code}")
     
     if response.status_code != 200:
@@ -112,12 +104,12 @@ def step2_upload_image(presigned_data: dict, image_path: str) -> None:
     
     print(f"POST {upload_url}")
     
-    # Prepare form data
-    files = {
-        'file': ('test_pet.jpg', open(image_path, 'rb'), 'image/jpeg')
-    }
-    
-    response = requests.post(upload_url, data=upload_fields, files=files)
+    # Prepare form data; the handle is closed once the upload returns
+    with open(image_path, 'rb') as image_file:
+        files = {
+            'file': ('test_pet.jpg', image_file, 'image/jpeg')
+        }
+        response = SESSION.post(upload_url, data=upload_fields, files=files)
     print(f"Status: {response.status_code}")
     
     if response.status_code in [200, 201, 204]:
@@ -139,7 +131,7 @@ def step3_start_processing(job_id: str, s3_key: str) -> dict:
     print(f"S3 URI: {s3_uri}")
     
     payload = {"s3_uri": s3_uri}
-    response = requests.post(url, headers={**HEADERS, "Content-Type": "application/json"}, json=payload)
+    response = SESSION.post(url, headers={**HEADERS, "Content-Type": "application/json"}, json=payload)
     print(f"Status: {response.status_code}")
     
     data = response.json()
@@ -148,8 +140,17 @@ def step3_start_processing(job_id: str, s3_key: str) -> dict:
     return data
 
 
-def step4_poll_status(job_id: str, max_attempts: int = 30, interval: int = 10) -> dict:
-    """Step 4: Poll status until complete or failed."""
+def step4_poll_status(
+    job_id: str,
+    max_attempts: int = 30,
+    interval: float = 1.0,
+    max_interval: float = 15.0
+) -> dict:
+    """Step 4: Poll status until complete or failed.
+
+    Polls quickly at first and backs off by 1.5x (plus jitter) up to
+    max_interval, so fast jobs are seen promptly and slow ones cost few calls.
+    """
     print("\n" + "=" * 60)
     print("STEP 4: Poll Job Status")
     print("=" * 60)
@@ -158,7 +159,7 @@ def step4_poll_status(job_id: str, max_attempts: int = 30, interval: int = 10) -
     print(f"GET {url}")
     
     for attempt in range(max_attempts):
-        response = requests.get(url, headers=HEADERS)
+        response = SESSION.get(url, headers=HEADERS)
         data = response.json()
         status = data.get('status', 'unknown')
         progress = data.get('progress', 0)
@@ -173,6 +174,7 @@ def step4_poll_status(job_id: str, max_attempts: int = 30, interval: int = 10) -
             return data
         
         time.sleep(interval)
+        interval = min(interval * 1.5, max_interval) + random.uniform(0, 0.3)
     
     print("⚠ Max polling attempts reached")
     return data
@@ -187,7 +189,7 @@ def step5_get_results(job_id: str) -> dict:
     url = f"{BASE_URL}/results/{job_id}"
     print(f"GET {url}")
     
-    response = requests.get(url, headers=HEADERS)
+    response = SESSION.get(url, headers=HEADERS)
     print(f"Status: {response.status_code}")
     
     if response.status_code == 200:
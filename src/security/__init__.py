@@ -24,6 +24,7 @@ from .dynamodb_security import (
 )
 from .api_middleware import (
     require_api_key,
+    extract_api_key,
     get_cors_headers,
     handle_cors_preflight,
     add_security_headers,
@@ -31,6 +32,11 @@ from .api_middleware import (
     rate_limit_exceeded_response,
     CORS_HEADERS,
 )
+from .rate_limit import (
+    rate_limit,
+    TokenBucket,
+    DynamoDBTokenBucket,
+)
 
 __all__ = [
     # S3 Security
@@ -50,10 +56,15 @@ __all__ = [
     'generate_s3_iam_policy',
     # API Middleware
     'require_api_key',
+    'extract_api_key',
     'get_cors_headers',
     'handle_cors_preflight',
     'add_security_headers',
     'create_api_response',
     'rate_limit_exceeded_response',
     'CORS_HEADERS',
+    # Rate Limiting
+    'rate_limit',
+    'TokenBucket',
+    'DynamoDBTokenBucket',
 ]
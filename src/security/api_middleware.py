@@ -6,12 +6,11 @@ Provides decorators and utilities for API security:
 - CORS header management
 - Request throttling support
 """
-import json
 import functools
 from typing import Dict, Any, Callable, Optional, List
 import logging
 
-from .api_security import validate_api_key, create_unauthorized_response
+from .api_security import validate_api_key, create_unauthorized_response, dumps_json
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +24,29 @@ CORS_HEADERS = {
     'Access-Control-Max-Age': '86400'  # 24 hours
 }
 
+# Security headers added to API responses
+_SECURITY_HEADERS: Dict[str, str] = {
+    'X-Content-Type-Options': 'nosniff',
+    'X-Frame-Options': 'DENY',
+    'X-XSS-Protection': '1; mode=block',
+    'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
+    'Cache-Control': 'no-store, no-cache, must-revalidate',
+    'Pragma': 'no-cache'
+}
+
+# API Gateway sends methods in upper case; lower case is accepted too, so
+# the check needs no str.upper() call
+_PREFLIGHT_METHODS = frozenset({'OPTIONS', 'options'})
+
+# Response to CORS preflight requests from require_api_key. Each request
+# gets its own copy, since callers such as add_security_headers update
+# the headers in place
+_PREFLIGHT_RESPONSE = {
+    'statusCode': 200,
+    'headers': dict(CORS_HEADERS),
+    'body': ''
+}
+
 
 def get_cors_headers(
     allowed_origins: Optional[List[str]] = None,
@@ -56,6 +78,14 @@ def get_cors_headers(
     return headers
 
 
+def _is_preflight(event: Dict[str, Any]) -> bool:
+    """Check for an OPTIONS request from a REST (v1) or HTTP (v2) API event."""
+    http_method = event.get('httpMethod')
+    if http_method is None:
+        http_method = (event.get('requestContext') or {}).get('http', {}).get('method')
+    return http_method in _PREFLIGHT_METHODS
+
+
 def handle_cors_preflight(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """
     Handle CORS preflight (OPTIONS) requests.
@@ -66,9 +96,7 @@ def handle_cors_preflight(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     Returns:
         Response for OPTIONS request, or None if not a preflight
     """
-    http_method = event.get('httpMethod', event.get('requestContext', {}).get('http', {}).get('method', ''))
-    
-    if http_method.upper() == 'OPTIONS':
+    if _is_preflight(event):
         return {
             'statusCode': 200,
             'headers': get_cors_headers(),
@@ -78,6 +106,25 @@ def handle_cors_preflight(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     return None
 
 
+def extract_api_key(event: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the x-api-key header from a request, matching its name case-insensitively.
+    
+    Args:
+        event: Lambda event
+        
+    Returns:
+        API key, or None if the header is absent
+    """
+    # HTTP APIs already lowercase header names, so the lowercased copy is
+    # only built on a miss
+    headers = event.get('headers') or {}
+    api_key = headers.get('x-api-key')
+    if api_key is None:
+        api_key = {name.lower(): value for name, value in headers.items()}.get('x-api-key')
+    return api_key
+
+
 def require_api_key(handler: Callable) -> Callable:
     """
     Decorator to require API key validation.
@@ -95,27 +142,24 @@ def require_api_key(handler: Callable) -> Callable:
     @functools.wraps(handler)
     def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Handle CORS preflight
-        preflight_response = handle_cors_preflight(event)
-        if preflight_response:
-            return preflight_response
-        
-        # Extract API key from headers (case-insensitive)
-        headers = event.get('headers', {}) or {}
-        api_key = headers.get('x-api-key') or headers.get('X-Api-Key')
+        if _is_preflight(event):
+            return {**_PREFLIGHT_RESPONSE, 'headers': dict(CORS_HEADERS)}
         
         # Validate API key
-        if not validate_api_key(api_key):
+        if not validate_api_key(extract_api_key(event)):
             logger.warning("API key validation failed for request")
             return create_unauthorized_response()
         
         # Call the actual handler
         response = handler(event, context)
         
-        # Ensure CORS headers are present in response
-        if isinstance(response, dict) and 'headers' in response:
-            response['headers'] = {**get_cors_headers(), **response.get('headers', {})}
+        # Ensure CORS headers are present in response. The handler's own
+        # headers win, and are copied rather than updated in place since
+        # handlers often return a shared module-level dict
+        if isinstance(response, dict) and response.get('headers'):
+            response['headers'] = {**CORS_HEADERS, **response['headers']}
         elif isinstance(response, dict):
-            response['headers'] = get_cors_headers()
+            response['headers'] = dict(CORS_HEADERS)
         
         return response
     
@@ -132,23 +176,22 @@ def add_security_headers(response: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Response with security headers added
     """
-    security_headers = {
-        'X-Content-Type-Options': 'nosniff',
-        'X-Frame-Options': 'DENY',
-        'X-XSS-Protection': '1; mode=block',
-        'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
-        'Cache-Control': 'no-store, no-cache, must-revalidate',
-        'Pragma': 'no-cache'
-    }
-    
     if 'headers' not in response:
         response['headers'] = {}
     
-    response['headers'].update(security_headers)
+    response['headers'].update(_SECURITY_HEADERS)
     
     return response
 
 
+# Every header create_api_response sets itself, merged once at import
+_API_RESPONSE_HEADERS: Dict[str, str] = {
+    'Content-Type': 'application/json',
+    **CORS_HEADERS,
+    **_SECURITY_HEADERS
+}
+
+
 def create_api_response(
     status_code: int,
     body: Any,
@@ -165,17 +208,27 @@ def create_api_response(
     Returns:
         Lambda response dictionary
     """
-    response = {
+    # Security headers are applied last, as add_security_headers would
+    if headers:
+        response_headers = {**_API_RESPONSE_HEADERS, **headers, **_SECURITY_HEADERS}
+    else:
+        response_headers = dict(_API_RESPONSE_HEADERS)
+    return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            **get_cors_headers(),
-            **(headers or {})
-        },
-        'body': json.dumps(body) if not isinstance(body, str) else body
+        'headers': response_headers,
+        'body': dumps_json(body) if not isinstance(body, str) else body
     }
-    
-    return add_security_headers(response)
+
+
+# 429 response with its body and static headers built once; only
+# Retry-After differs between calls
+_TOO_MANY_REQUESTS_RESPONSE = create_api_response(
+    status_code=429,
+    body={
+        'error': 'TooManyRequests',
+        'message': 'Rate limit exceeded. Please try again later.'
+    }
+)
 
 
 def rate_limit_exceeded_response(
@@ -190,13 +243,7 @@ def rate_limit_exceeded_response(
     Returns:
         Lambda response dictionary
     """
-    return create_api_response(
-        status_code=429,
-        body={
-            'error': 'TooManyRequests',
-            'message': 'Rate limit exceeded. Please try again later.'
-        },
-        headers={
-            'Retry-After': str(retry_after)
-        }
-    )
+    return {
+        **_TOO_MANY_REQUESTS_RESPONSE,
+        'headers': {**_TOO_MANY_REQUESTS_RESPONSE['headers'], 'Retry-After': str(retry_after)}
+    }
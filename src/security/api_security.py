@@ -4,15 +4,40 @@ API Security Configuration
 Implements API security requirements:
 - Requirements 6.6: API key validation
 """
+import hashlib
+import hmac
 import json
 import os
-import boto3
-from typing import Optional, Any
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Any, Union
 from functools import lru_cache
 import logging
 
+from .clients import get_client
+
+# orjson is several times faster than json for response bodies; fall back
+# to the standard library where it is not packaged
+try:
+    import orjson
+
+    def dumps_json(obj: Any) -> str:
+        """Serialize obj to a JSON string."""
+        return orjson.dumps(obj).decode()
+except ImportError:
+    dumps_json = json.dumps
+
 logger = logging.getLogger(__name__)
 
+# Shape of keys issued by scripts/create-infrastructure.py
+# (secrets.token_urlsafe(32): 43 URL-safe base64 characters)
+API_KEY_PATTERN = re.compile(rb'\A[A-Za-z0-9_-]{43}\Z')
+
+# Maximum number of recently accepted keys remembered by a validator
+VALIDATED_KEY_CACHE_SIZE = 1024
+
 
 class APIKeyValidator:
     """
@@ -22,6 +47,15 @@ class APIKeyValidator:
     Implements Requirement 6.6.
     """
     
+    __slots__ = (
+        'secret_arn',
+        '_secrets_client',
+        '_cache_ttl',
+        '_cached_key',
+        '_cache_timestamp',
+        '_validated',
+    )
+    
     def __init__(
         self,
         secret_arn: Optional[str] = None,
@@ -39,21 +73,24 @@ class APIKeyValidator:
         self.secret_arn = secret_arn or os.environ.get('API_KEY_SECRET_ARN')
         self._secrets_client = secrets_client
         self._cache_ttl = cache_ttl
-        self._cached_key: Optional[str] = None
+        # Kept encoded, as the constant-time comparison needs bytes
+        self._cached_key: Optional[bytes] = None
         self._cache_timestamp: float = 0
+        # SHA-256 digests of recently accepted keys -> monotonic expiry, so
+        # a repeat caller skips the secret lookup until cache_ttl passes
+        self._validated: "OrderedDict[bytes, float]" = OrderedDict()
     
     @property
     def secrets_client(self) -> Any:
         """Get or create Secrets Manager client."""
         if self._secrets_client is None:
-            self._secrets_client = boto3.client('secretsmanager')
+            self._secrets_client = get_client('secretsmanager')
         return self._secrets_client
     
-    def _get_cached_key(self) -> Optional[str]:
-        """Get API key from cache or fetch from Secrets Manager."""
-        import time
-        
-        current_time = time.time()
+    def _get_cached_key(self) -> Optional[bytes]:
+        """Get the encoded API key from cache or fetch from Secrets Manager."""
+        # Monotonic, so a wall clock step cannot expire or extend the cache
+        current_time = time.monotonic()
         
         # Check if cache is valid
         if (
@@ -69,19 +106,20 @@ class APIKeyValidator:
         try:
             response = self.secrets_client.get_secret_value(SecretId=self.secret_arn)
             secret_data = json.loads(response['SecretString'])
-            self._cached_key = secret_data.get('api_key')
+            api_key = secret_data.get('api_key')
+            self._cached_key = api_key.encode() if api_key is not None else None
             self._cache_timestamp = current_time
             return self._cached_key
         except Exception as e:
-            logger.error(f"Failed to fetch API key from Secrets Manager: {e}")
+            logger.error("Failed to fetch API key from Secrets Manager: %s", e)
             return None
     
-    def validate(self, api_key: Optional[str]) -> bool:
+    def validate(self, api_key: Optional[Union[str, bytes]]) -> bool:
         """
         Validate an API key.
         
         Args:
-            api_key: API key to validate
+            api_key: API key to validate, as text or UTF-8 bytes
             
         Returns:
             True if valid, False otherwise
@@ -97,35 +135,62 @@ class APIKeyValidator:
             logger.debug("No secret ARN configured, accepting any non-empty key")
             return True
         
+        # Encoded once for both the digest and the comparison
+        if isinstance(api_key, str):
+            api_key = api_key.encode()
+        
+        # Reject malformed keys before any cache or Secrets Manager lookup
+        if not API_KEY_PATTERN.match(api_key):
+            logger.warning("API key validation failed: Malformed key")
+            return False
+        
+        digest = hashlib.sha256(api_key).digest()
+        expiry = self._validated.get(digest)
+        if expiry is not None:
+            if time.monotonic() < expiry:
+                self._validated.move_to_end(digest)
+                return True
+            del self._validated[digest]
+        
         valid_key = self._get_cached_key()
         
         if valid_key is None:
             logger.error("Could not retrieve valid API key from Secrets Manager")
             return False
         
-        is_valid = api_key == valid_key
+        # Constant-time comparison so response timing does not leak the key
+        is_valid = hmac.compare_digest(api_key, valid_key)
         
         if not is_valid:
             logger.warning("API key validation failed: Invalid key")
+            return False
         
-        return is_valid
+        self._validated[digest] = time.monotonic() + self._cache_ttl
+        self._validated.move_to_end(digest)
+        if len(self._validated) > VALIDATED_KEY_CACHE_SIZE:
+            self._validated.popitem(last=False)
+        return True
     
     def clear_cache(self) -> None:
-        """Clear the cached API key."""
+        """Clear the cached API key and the keys it has accepted."""
         self._cached_key = None
         self._cache_timestamp = 0
+        self._validated.clear()
 
 
-# Global validator instance for convenience
-_default_validator: Optional[APIKeyValidator] = None
-
-
+# Global validator instance for convenience. Created on first use rather
+# than at import, since it reads API_KEY_SECRET_ARN when constructed
+@lru_cache(maxsize=1)
 def get_api_key_validator() -> APIKeyValidator:
     """Get or create the default API key validator."""
-    global _default_validator
-    if _default_validator is None:
-        _default_validator = APIKeyValidator()
-    return _default_validator
+    return APIKeyValidator()
+
+
+# Fetch the API key during Lambda init rather than on the first request. It
+# runs on a daemon thread so a slow Secrets Manager never blocks the import;
+# a request that arrives first simply fetches the key itself
+if os.environ.get('API_KEY_SECRET_ARN'):
+    threading.Thread(target=get_api_key_validator()._get_cached_key, daemon=True).start()
 
 
 def validate_api_key(api_key: Optional[str]) -> bool:
@@ -162,18 +227,34 @@ def get_api_key_from_secrets(
     if not arn:
         return None
     
-    client = secrets_client or boto3.client('secretsmanager')
+    client = secrets_client or get_client('secretsmanager')
     
     try:
         response = client.get_secret_value(SecretId=arn)
         secret_data = json.loads(response['SecretString'])
         return secret_data.get('api_key')
     except Exception as e:
-        logger.error(f"Failed to retrieve API key: {e}")
+        logger.error("Failed to retrieve API key: %s", e)
         return None
 
 
-def create_unauthorized_response(message: str = 'Unauthorized: Invalid API key') -> dict:
+# Headers for 401 responses, built once and copied per response
+_UNAUTHORIZED_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
+    'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
+}
+
+# Every rejected key gets the default message, so its body is encoded once
+DEFAULT_UNAUTHORIZED_MESSAGE = 'Unauthorized: Invalid API key'
+_DEFAULT_UNAUTHORIZED_BODY = dumps_json({
+    'error': 'AuthenticationError',
+    'message': DEFAULT_UNAUTHORIZED_MESSAGE
+})
+
+
+def create_unauthorized_response(message: str = DEFAULT_UNAUTHORIZED_MESSAGE) -> dict:
     """
     Create a standardized 401 Unauthorized response.
     
@@ -185,16 +266,15 @@ def create_unauthorized_response(message: str = 'Unauthorized: Invalid API key')
         
     Requirement 6.6: Invalid API keys return 401 Unauthorized
     """
-    return {
-        'statusCode': 401,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
-            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
-        },
-        'body': json.dumps({
+    if message == DEFAULT_UNAUTHORIZED_MESSAGE:
+        body = _DEFAULT_UNAUTHORIZED_BODY
+    else:
+        body = dumps_json({
             'error': 'AuthenticationError',
             'message': message
         })
+    return {
+        'statusCode': 401,
+        'headers': dict(_UNAUTHORIZED_HEADERS),
+        'body': body
     }
@@ -0,0 +1,34 @@
+"""
+Shared AWS Clients
+
+boto3 clients used by the security helpers, created once per process and
+reused so warm Lambda invocations keep their HTTPS connections.
+"""
+import threading
+import boto3
+from botocore.config import Config
+from typing import Dict, Any
+
+# Shared HTTP settings: a larger keep-alive pool so sockets are reused
+# across calls and warm invocations, and botocore's adaptive retries
+# (client-side rate limiting plus jittered backoff) for throttling
+CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 4},
+)
+
+# Creation is locked because the default boto3 session is not thread safe
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(service: str) -> Any:
+    """Get a cached boto3 client for a service."""
+    client = _clients.get(service)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(service)
+            if client is None:
+                client = _clients[service] = boto3.client(service, config=CLIENT_CONFIG)
+    return client
@@ -4,15 +4,17 @@ DynamoDB Security Configuration
 Implements DynamoDB security requirements:
 - Requirements 12.2: Encryption with AWS managed keys, TTL for cleanup
 """
-import boto3
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Dict, Any, Optional, List
 import logging
 
+from .clients import get_client
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class DynamoDBSecurityConfig:
     """DynamoDB table security configuration."""
     
@@ -54,7 +56,7 @@ def configure_table_security(
         config = DynamoDBSecurityConfig()
     
     if dynamodb_client is None:
-        dynamodb_client = boto3.client('dynamodb')
+        dynamodb_client = get_client('dynamodb')
     
     results = {
         'ttl': False,
@@ -74,17 +76,17 @@ def configure_table_security(
                 }
             )
             results['ttl'] = True
-            logger.info(f"Configured TTL for table: {table_name}")
+            logger.info("Configured TTL for table: %s", table_name)
         except dynamodb_client.exceptions.ResourceNotFoundException:
-            logger.error(f"Table not found: {table_name}")
+            logger.error("Table not found: %s", table_name)
             raise
         except Exception as e:
             # TTL might already be enabled
             if 'TimeToLive is already enabled' in str(e):
                 results['ttl'] = True
-                logger.info(f"TTL already enabled for table: {table_name}")
+                logger.info("TTL already enabled for table: %s", table_name)
             else:
-                logger.error(f"Failed to configure TTL for {table_name}: {e}")
+                logger.error("Failed to configure TTL for %s: %s", table_name, e)
                 raise
     
     # Configure Point-in-Time Recovery
@@ -97,9 +99,9 @@ def configure_table_security(
                 }
             )
             results['pitr'] = True
-            logger.info(f"Enabled PITR for table: {table_name}")
+            logger.info("Enabled PITR for table: %s", table_name)
         except Exception as e:
-            logger.warning(f"Could not enable PITR for {table_name}: {e}")
+            logger.warning("Could not enable PITR for %s: %s", table_name, e)
     
     # Configure deletion protection
     if config.deletion_protection_enabled:
@@ -109,9 +111,9 @@ def configure_table_security(
                 DeletionProtectionEnabled=True
             )
             results['deletion_protection'] = True
-            logger.info(f"Enabled deletion protection for table: {table_name}")
+            logger.info("Enabled deletion protection for table: %s", table_name)
         except Exception as e:
-            logger.warning(f"Could not enable deletion protection for {table_name}: {e}")
+            logger.warning("Could not enable deletion protection for %s: %s", table_name, e)
     
     return results
 
@@ -133,7 +135,7 @@ def verify_table_security(
     Requirements: 12.2
     """
     if dynamodb_client is None:
-        dynamodb_client = boto3.client('dynamodb')
+        dynamodb_client = get_client('dynamodb')
     
     issues: List[str] = []
     
@@ -149,9 +151,17 @@ def verify_table_security(
         'issues': issues
     }
     
+    # The three describe calls are independent reads, so they run
+    # concurrently; results are still applied in order, and a missing
+    # table ends the check before the TTL and PITR results are used
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        table_future = executor.submit(dynamodb_client.describe_table, TableName=table_name)
+        ttl_future = executor.submit(dynamodb_client.describe_time_to_live, TableName=table_name)
+        backup_future = executor.submit(dynamodb_client.describe_continuous_backups, TableName=table_name)
+    
     # Check table description for encryption
     try:
-        table_desc = dynamodb_client.describe_table(TableName=table_name)
+        table_desc = table_future.result()
         table = table_desc.get('Table', {})
         
         # Check SSE
@@ -174,7 +184,7 @@ def verify_table_security(
     
     # Check TTL
     try:
-        ttl_desc = dynamodb_client.describe_time_to_live(TableName=table_name)
+        ttl_desc = ttl_future.result()
         ttl_spec = ttl_desc.get('TimeToLiveDescription', {})
         if ttl_spec.get('TimeToLiveStatus') == 'ENABLED':
             results['ttl_enabled'] = True
@@ -186,7 +196,7 @@ def verify_table_security(
     
     # Check PITR
     try:
-        backup_desc = dynamodb_client.describe_continuous_backups(TableName=table_name)
+        backup_desc = backup_future.result()
         pitr_desc = backup_desc.get('ContinuousBackupsDescription', {})
         pitr_status = pitr_desc.get('PointInTimeRecoveryDescription', {})
         results['pitr_enabled'] = pitr_status.get('PointInTimeRecoveryStatus') == 'ENABLED'
@@ -0,0 +1,207 @@
+"""
+API Rate Limiting
+
+Token-bucket throttling for API handlers:
+- Per API key buckets, held in memory or shared through a DynamoDB table
+- Over-quota requests are answered with 429 Too Many Requests
+"""
+import functools
+import hashlib
+import math
+import threading
+import time
+from botocore.exceptions import ClientError
+from typing import Dict, Any, Callable, Optional, Tuple
+import logging
+
+from .clients import get_client
+from .api_middleware import extract_api_key, rate_limit_exceeded_response
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    In-memory token buckets, one per key.
+
+    Each bucket holds up to capacity tokens and refills continuously at
+    refill_per_sec. Buckets live in the process, so each Lambda execution
+    environment limits independently; use DynamoDBTokenBucket for a limit
+    shared across environments.
+    """
+
+    def __init__(self, capacity: float, refill_per_sec: float):
+        """
+        Initialize token buckets.
+
+        Args:
+            capacity: Maximum tokens (burst size) per key
+            refill_per_sec: Tokens added per second
+        """
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        # key -> (tokens, monotonic time of last refill)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> float:
+        """
+        Take a token from a key's bucket.
+
+        Args:
+            key: Bucket key, e.g. the caller's API key
+
+        Returns:
+            0 if a token was taken, else seconds until one is available
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, last_refill = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last_refill) * self.refill_per_sec)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+        return (1 - tokens) / self.refill_per_sec
+
+
+class DynamoDBTokenBucket:
+    """
+    Token buckets stored in a DynamoDB table, shared by every caller.
+
+    Uses lazy refill: a bucket's tokens are recomputed from its last refill
+    time when it is read, and written back with a condition on that time so
+    concurrent requests cannot both spend the same token. Items are keyed by
+    a SHA-256 digest of the key, so API keys are never stored.
+    """
+
+    # Attempts at the conditional write before the request is throttled
+    MAX_ATTEMPTS = 3
+
+    def __init__(
+        self,
+        table_name: str,
+        capacity: float,
+        refill_per_sec: float,
+        dynamodb_client: Optional[Any] = None,
+        key_attribute: str = 'bucket_key'
+    ):
+        """
+        Initialize DynamoDB-backed token buckets.
+
+        Args:
+            table_name: Table with a string partition key named key_attribute
+            capacity: Maximum tokens (burst size) per key
+            refill_per_sec: Tokens added per second
+            dynamodb_client: Optional boto3 DynamoDB client
+            key_attribute: Name of the table's partition key
+        """
+        self.table_name = table_name
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.key_attribute = key_attribute
+        self._dynamodb_client = dynamodb_client
+
+    @property
+    def dynamodb_client(self) -> Any:
+        """Get or create DynamoDB client."""
+        if self._dynamodb_client is None:
+            self._dynamodb_client = get_client('dynamodb')
+        return self._dynamodb_client
+
+    def acquire(self, key: str) -> float:
+        """
+        Take a token from a key's bucket.
+
+        Args:
+            key: Bucket key, e.g. the caller's API key
+
+        Returns:
+            0 if a token was taken, else seconds until one is available
+        """
+        item_key = {self.key_attribute: {'S': hashlib.sha256(key.encode()).hexdigest()}}
+
+        for _ in range(self.MAX_ATTEMPTS):
+            item = self.dynamodb_client.get_item(
+                TableName=self.table_name,
+                Key=item_key,
+                ConsistentRead=True
+            ).get('Item')
+
+            # Wall clock time, since buckets are shared between hosts
+            now = time.time()
+            if item is None:
+                tokens = self.capacity
+            else:
+                elapsed = max(0.0, now - float(item['last_refill']['N']))
+                tokens = min(self.capacity, float(item['tokens']['N']) + elapsed * self.refill_per_sec)
+
+            if tokens < 1:
+                return (1 - tokens) / self.refill_per_sec
+
+            values = {':tokens': {'N': repr(tokens - 1)}, ':now': {'N': repr(now)}}
+            if item is None:
+                condition = {
+                    'ConditionExpression': 'attribute_not_exists(#key)',
+                    'ExpressionAttributeNames': {'#key': self.key_attribute}
+                }
+            else:
+                condition = {'ConditionExpression': 'last_refill = :last_refill'}
+                values[':last_refill'] = item['last_refill']
+
+            try:
+                self.dynamodb_client.update_item(
+                    TableName=self.table_name,
+                    Key=item_key,
+                    UpdateExpression='SET tokens = :tokens, last_refill = :now',
+                    ExpressionAttributeValues=values,
+                    **condition
+                )
+                return 0.0
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                # Another request updated the bucket first; re-read it
+
+        # Sustained contention on one bucket means it is being drained
+        return 1 / self.refill_per_sec
+
+
+def rate_limit(bucket: Any) -> Callable:
+    """
+    Decorator to throttle requests per API key with a token bucket.
+
+    Requests without a token get 429 Too Many Requests and a Retry-After
+    header; the handler is not called. If the bucket cannot be reached the
+    request is allowed, so a throttling fault never takes the API down.
+
+    Apply it beneath @require_api_key, so CORS preflights and requests with
+    invalid keys are answered before any token is spent.
+
+    Usage:
+        @require_api_key
+        @rate_limit(TokenBucket(capacity=10, refill_per_sec=1))
+        def handler(event, context):
+            ...
+
+    Args:
+        bucket: TokenBucket or DynamoDBTokenBucket
+    """
+    def decorator(handler: Callable) -> Callable:
+        @functools.wraps(handler)
+        def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+            try:
+                wait = bucket.acquire(extract_api_key(event) or '')
+            except Exception as e:
+                logger.error("Rate limit check failed, allowing request: %s", e)
+                wait = 0.0
+
+            if wait > 0:
+                logger.warning("Rate limit exceeded for request")
+                return rate_limit_exceeded_response(retry_after=math.ceil(wait))
+
+            return handler(event, context)
+
+        return wrapper
+
+    return decorator
@@ -6,15 +6,17 @@ Implements S3 bucket security requirements:
 - Requirements 12.2: 7-day lifecycle policy
 - Requirements 12.5: Block public access
 """
-import boto3
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
 import logging
 
+from .clients import get_client
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class S3SecurityConfig:
     """S3 bucket security configuration."""
     
@@ -57,7 +59,7 @@ def configure_bucket_security(
         config = S3SecurityConfig()
     
     if s3_client is None:
-        s3_client = boto3.client('s3')
+        s3_client = get_client('s3')
     
     results = {
         'encryption': False,
@@ -81,9 +83,9 @@ def configure_bucket_security(
             }
         )
         results['encryption'] = True
-        logger.info(f"Configured encryption for bucket: {bucket_name}")
+        logger.info("Configured encryption for bucket: %s", bucket_name)
     except Exception as e:
-        logger.error(f"Failed to configure encryption for {bucket_name}: {e}")
+        logger.error("Failed to configure encryption for %s: %s", bucket_name, e)
         raise
     
     # Block all public access
@@ -99,9 +101,9 @@ def configure_bucket_security(
             }
         )
         results['public_access_block'] = True
-        logger.info(f"Configured public access block for bucket: {bucket_name}")
+        logger.info("Configured public access block for bucket: %s", bucket_name)
     except Exception as e:
-        logger.error(f"Failed to configure public access block for {bucket_name}: {e}")
+        logger.error("Failed to configure public access block for %s: %s", bucket_name, e)
         raise
     
     # Configure lifecycle policy for expiration
@@ -119,9 +121,9 @@ def configure_bucket_security(
             }
         )
         results['lifecycle'] = True
-        logger.info(f"Configured lifecycle policy for bucket: {bucket_name}")
+        logger.info("Configured lifecycle policy for bucket: %s", bucket_name)
     except Exception as e:
-        logger.error(f"Failed to configure lifecycle for {bucket_name}: {e}")
+        logger.error("Failed to configure lifecycle for %s: %s", bucket_name, e)
         raise
     
     # Enable versioning for data protection
@@ -132,9 +134,9 @@ def configure_bucket_security(
                 VersioningConfiguration={'Status': 'Enabled'}
             )
             results['versioning'] = True
-            logger.info(f"Enabled versioning for bucket: {bucket_name}")
+            logger.info("Enabled versioning for bucket: %s", bucket_name)
         except Exception as e:
-            logger.error(f"Failed to enable versioning for {bucket_name}: {e}")
+            logger.error("Failed to enable versioning for %s: %s", bucket_name, e)
             raise
     
     return results
@@ -157,7 +159,7 @@ def verify_bucket_security(
     Requirements: 12.1, 12.2, 12.5
     """
     if s3_client is None:
-        s3_client = boto3.client('s3')
+        s3_client = get_client('s3')
     
     results = {
         'bucket_name': bucket_name,
@@ -171,23 +173,31 @@ def verify_bucket_security(
         'issues': []
     }
     
-    # Check encryption
-    try:
-        encryption = s3_client.get_bucket_encryption(Bucket=bucket_name)
+    # The four checks are independent reads, so they run concurrently.
+    # Each returns its findings and issues, merged below in a fixed order
+    def check_encryption() -> Tuple[Dict[str, Any], List[str]]:
+        try:
+            encryption = s3_client.get_bucket_encryption(Bucket=bucket_name)
+        except s3_client.exceptions.ClientError as e:
+            if 'ServerSideEncryptionConfigurationNotFoundError' in str(e):
+                return {}, ['Encryption not configured']
+            raise
         rules = encryption.get('ServerSideEncryptionConfiguration', {}).get('Rules', [])
-        if rules:
-            default_encryption = rules[0].get('ApplyServerSideEncryptionByDefault', {})
-            results['encryption_enabled'] = True
-            results['encryption_algorithm'] = default_encryption.get('SSEAlgorithm')
-    except s3_client.exceptions.ClientError as e:
-        if 'ServerSideEncryptionConfigurationNotFoundError' in str(e):
-            results['issues'].append('Encryption not configured')
-        else:
+        if not rules:
+            return {}, []
+        default_encryption = rules[0].get('ApplyServerSideEncryptionByDefault', {})
+        return {
+            'encryption_enabled': True,
+            'encryption_algorithm': default_encryption.get('SSEAlgorithm')
+        }, []
+    
+    def check_public_access() -> Tuple[Dict[str, Any], List[str]]:
+        try:
+            public_access = s3_client.get_public_access_block(Bucket=bucket_name)
+        except s3_client.exceptions.ClientError as e:
+            if 'NoSuchPublicAccessBlockConfiguration' in str(e):
+                return {}, ['Public access block not configured']
             raise
-    
-    # Check public access block
-    try:
-        public_access = s3_client.get_public_access_block(Bucket=bucket_name)
         config = public_access.get('PublicAccessBlockConfiguration', {})
         all_blocked = all([
             config.get('BlockPublicAcls', False),
@@ -195,38 +205,37 @@ def verify_bucket_security(
             config.get('BlockPublicPolicy', False),
             config.get('RestrictPublicBuckets', False)
         ])
-        results['public_access_blocked'] = all_blocked
-        if not all_blocked:
-            results['issues'].append('Public access not fully blocked')
-    except s3_client.exceptions.ClientError as e:
-        if 'NoSuchPublicAccessBlockConfiguration' in str(e):
-            results['issues'].append('Public access block not configured')
-        else:
-            raise
+        return {'public_access_blocked': all_blocked}, [] if all_blocked else ['Public access not fully blocked']
     
-    # Check lifecycle configuration
-    try:
-        lifecycle = s3_client.get_bucket_lifecycle_configuration(Bucket=bucket_name)
-        rules = lifecycle.get('Rules', [])
-        for rule in rules:
-            if rule.get('Status') == 'Enabled' and 'Expiration' in rule:
-                results['lifecycle_configured'] = True
-                results['expiration_days'] = rule['Expiration'].get('Days')
-                break
-        if not results['lifecycle_configured']:
-            results['issues'].append('Lifecycle expiration not configured')
-    except s3_client.exceptions.ClientError as e:
-        if 'NoSuchLifecycleConfiguration' in str(e):
-            results['issues'].append('Lifecycle not configured')
-        else:
+    def check_lifecycle() -> Tuple[Dict[str, Any], List[str]]:
+        try:
+            lifecycle = s3_client.get_bucket_lifecycle_configuration(Bucket=bucket_name)
+        except s3_client.exceptions.ClientError as e:
+            if 'NoSuchLifecycleConfiguration' in str(e):
+                return {}, ['Lifecycle not configured']
             raise
+        for rule in lifecycle.get('Rules', []):
+            if rule.get('Status') == 'Enabled' and 'Expiration' in rule:
+                return {
+                    'lifecycle_configured': True,
+                    'expiration_days': rule['Expiration'].get('Days')
+                }, []
+        return {}, ['Lifecycle expiration not configured']
     
-    # Check versioning
-    try:
-        versioning = s3_client.get_bucket_versioning(Bucket=bucket_name)
-        results['versioning_enabled'] = versioning.get('Status') == 'Enabled'
-    except Exception:
-        results['issues'].append('Could not check versioning status')
+    def check_versioning() -> Tuple[Dict[str, Any], List[str]]:
+        try:
+            versioning = s3_client.get_bucket_versioning(Bucket=bucket_name)
+        except Exception:
+            return {}, ['Could not check versioning status']
+        return {'versioning_enabled': versioning.get('Status') == 'Enabled'}, []
+    
+    checks = (check_encryption, check_public_access, check_lifecycle, check_versioning)
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        futures = [executor.submit(check) for check in checks]
+        for future in futures:
+            findings, issues = future.result()
+            results.update(findings)
+            results['issues'].extend(issues)
     
     # Determine overall compliance
     results['compliant'] = (
@@ -4,16 +4,20 @@ Utility modules for PetAvatar system.
 
 from .error_handling import (
     retry_with_exponential_backoff,
+    is_retryable_error,
     log_error,
     emit_metric,
+    flush_metrics,
     create_error_response,
     handle_lambda_errors
 )
 
 __all__ = [
     'retry_with_exponential_backoff',
+    'is_retryable_error',
     'log_error',
     'emit_metric',
+    'flush_metrics',
     'create_error_response',
     'handle_lambda_errors'
 ]
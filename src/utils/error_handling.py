@@ -5,22 +5,103 @@ This module provides utilities for retry logic, structured error logging,
 and CloudWatch metrics emission.
 """
 
+import atexit
+import os
 import time
+import random
 import logging
 import json
-from datetime import datetime
-from typing import Callable, Any, Optional, Dict
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Any, Optional, Dict, List, Tuple
 from functools import wraps
-import boto3
-from botocore.exceptions import ClientError
+from botocore.config import Config
+from botocore.exceptions import ClientError, ConnectionError as BotocoreConnectionError
+
+# orjson is several times faster than json for log records and response
+# bodies; fall back to the standard library where it is not packaged.
+# Values JSON cannot represent (e.g. Decimal from DynamoDB in a logged
+# event) are written with str() rather than failing the log call
+try:
+    import orjson
+
+    def dumps_json(obj: Any) -> str:
+        """Serialize obj to a JSON string."""
+        return orjson.dumps(obj, default=str).decode()
+except ImportError:
+    def dumps_json(obj: Any) -> str:
+        """Serialize obj to a JSON string."""
+        return json.dumps(obj, default=str)
 
 
 # Configure structured logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-# CloudWatch client for metrics
-cloudwatch = boto3.client("cloudwatch")
+# Keep-alive connections and botocore's adaptive retries (client-side rate
+# limiting plus jittered backoff) for the metrics client
+CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={"mode": "adaptive", "max_attempts": 4},
+)
+
+# CloudWatch client for metrics, created on first use. boto3 itself is
+# imported there too, so a handler that never sends a metric does not pay
+# for loading it (or the CloudWatch service model) at cold start
+_cloudwatch = None
+
+
+def get_cloudwatch_client() -> Any:
+    """Get the shared CloudWatch client, creating it on first use."""
+    global _cloudwatch
+    if _cloudwatch is None:
+        import boto3
+
+        _cloudwatch = boto3.client("cloudwatch", config=CLIENT_CONFIG)
+    return _cloudwatch
+
+
+# Metrics are buffered and sent together: once METRIC_BATCH_SIZE are
+# waiting, when a handle_lambda_errors handler returns, and at exit
+METRIC_BATCH_SIZE = 1000
+# PutMetricData accepts at most 150 distinct values in one datum
+MAX_VALUES_PER_DATUM = 150
+_metric_buffer: List[Tuple[str, Dict[str, Any]]] = []
+_metric_lock = threading.Lock()
+
+# Set ENABLE_METRICS=0 to turn off custom metrics (e.g. local runs);
+# emit_metric then returns before building anything
+METRICS_ENABLED = os.environ.get("ENABLE_METRICS", "1") == "1"
+
+
+# Error codes worth retrying: throttling and transient service faults.
+# Anything else (validation, access, not found) fails the same way again
+RETRYABLE_ERROR_CODES = frozenset({
+    "ThrottlingException",
+    "Throttling",
+    "TooManyRequestsException",
+    "ProvisionedThroughputExceededException",
+    "RequestLimitExceeded",
+    "SlowDown",
+    "ServiceUnavailable",
+    "ServiceUnavailableException",
+    "InternalServerError",
+    "InternalFailure",
+    "ModelNotReadyException",
+})
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Return True if error is throttling, a 5xx, or a connection failure."""
+    if isinstance(error, BotocoreConnectionError):
+        return True
+    if isinstance(error, ClientError):
+        if error.response.get("Error", {}).get("Code") in RETRYABLE_ERROR_CODES:
+            return True
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        return isinstance(status, int) and status >= 500
+    return False
 
 
 def retry_with_exponential_backoff(
@@ -32,10 +113,16 @@ def retry_with_exponential_backoff(
     exponential_base: int = 2,
 ) -> Any:
     """
-    Retry a function with exponential backoff.
+    Retry a function with exponential backoff and full jitter.
 
     Can be used as a decorator or called directly with a function.
-    Implements exponential backoff with delays: 1s, 2s, 4s (by default).
+    Only throttling, 5xx and connection errors are retried (see
+    is_retryable_error); anything else is raised immediately. Each delay is
+    drawn uniformly from zero up to 1s, 2s, 4s (by default) so concurrent
+    callers do not retry in lockstep.
+
+    Prefer botocore's adaptive retry mode for single SDK calls; this is for
+    retrying a larger unit of work.
 
     Args:
         func: Function to retry (when used as decorator)
@@ -72,34 +159,38 @@ def retry_with_exponential_backoff(
                 except Exception as e:
                     last_exception = e
 
-                    # Don't retry on the last attempt
-                    if attempt == max_retries - 1:
-                        logger.error(
-                            f"Function {f.__name__} failed after {max_retries} attempts",
+                    # Don't retry on the last attempt or on non-transient errors
+                    if attempt == max_retries - 1 or not is_retryable_error(e):
+                        if logger.isEnabledFor(logging.ERROR):
+                            logger.error(
+                                "Function %s failed after %d attempts", f.__name__, attempt + 1,
+                                extra={
+                                    "function": f.__name__,
+                                    "attempts": attempt + 1,
+                                    "error": str(e),
+                                    "error_type": type(e).__name__,
+                                },
+                            )
+                        raise
+
+                    # Calculate delay with exponential backoff and full jitter
+                    delay = random.uniform(
+                        0, min(base_delay * (exponential_base**attempt), max_delay)
+                    )
+
+                    if logger.isEnabledFor(logging.WARNING):
+                        logger.warning(
+                            "Attempt %d/%d failed for %s, retrying in %.2fs",
+                            attempt + 1, max_retries, f.__name__, delay,
                             extra={
                                 "function": f.__name__,
-                                "attempts": max_retries,
+                                "attempt": attempt + 1,
+                                "max_retries": max_retries,
+                                "delay": delay,
                                 "error": str(e),
                                 "error_type": type(e).__name__,
                             },
                         )
-                        raise
-
-                    # Calculate delay with exponential backoff
-                    delay = min(base_delay * (exponential_base**attempt), max_delay)
-
-                    logger.warning(
-                        f"Attempt {attempt + 1}/{max_retries} failed for {f.__name__}, "
-                        f"retrying in {delay}s",
-                        extra={
-                            "function": f.__name__,
-                            "attempt": attempt + 1,
-                            "max_retries": max_retries,
-                            "delay": delay,
-                            "error": str(e),
-                            "error_type": type(e).__name__,
-                        },
-                    )
 
                     time.sleep(delay)
 
@@ -158,11 +249,15 @@ def log_error(
 
     Validates: Requirements 11.1
     """
+    # The record is only built and encoded if it will be written
+    if not logger.isEnabledFor(level):
+        return
+
     if context is None:
         context = {}
 
     log_data = {
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
         "component": component,
         "operation": operation,
         "error_type": type(error).__name__,
@@ -177,7 +272,7 @@ def log_error(
             "RequestId"
         )
 
-    logger.log(level, json.dumps(log_data))
+    logger.log(level, dumps_json(log_data))
 
 
 def emit_metric(
@@ -190,8 +285,8 @@ def emit_metric(
     """
     Emit CloudWatch metric for monitoring and alerting.
 
-    Sends custom metrics to CloudWatch for tracking system health,
-    performance, and business metrics.
+    Buffers custom metrics for CloudWatch for tracking system health,
+    performance, and business metrics. They are sent by flush_metrics.
 
     Args:
         metric_name: Name of the metric (e.g., "UploadSuccess", "ProcessingFailure")
@@ -222,12 +317,15 @@ def emit_metric(
 
     Validates: Requirements 11.5
     """
+    if not METRICS_ENABLED:
+        return
+
     try:
         metric_data = {
             "MetricName": metric_name,
             "Value": value,
             "Unit": unit,
-            "Timestamp": datetime.utcnow(),
+            "Timestamp": datetime.now(timezone.utc),
         }
 
         # Add dimensions if provided
@@ -236,21 +334,27 @@ def emit_metric(
                 {"Name": key, "Value": value} for key, value in dimensions.items()
             ]
 
-        cloudwatch.put_metric_data(Namespace=namespace, MetricData=[metric_data])
-
-        logger.debug(
-            f"Emitted metric: {namespace}/{metric_name}={value}",
-            extra={
-                "metric_name": metric_name,
-                "value": value,
-                "unit": unit,
-                "dimensions": dimensions,
-            },
-        )
+        with _metric_lock:
+            _metric_buffer.append((namespace, metric_data))
+            batch_full = len(_metric_buffer) >= METRIC_BATCH_SIZE
+        if batch_full:
+            flush_metrics()
+
+        # The level check skips building the extra fields on every metric
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Buffered metric: %s/%s=%s", namespace, metric_name, value,
+                extra={
+                    "metric_name": metric_name,
+                    "value": value,
+                    "unit": unit,
+                    "dimensions": dimensions,
+                },
+            )
     except Exception as e:
         # Don't fail the operation if metric emission fails
         logger.warning(
-            f"Failed to emit metric {metric_name}: {str(e)}",
+            "Failed to emit metric %s: %s", metric_name, e,
             extra={
                 "metric_name": metric_name,
                 "error": str(e),
@@ -259,6 +363,92 @@ def emit_metric(
         )
 
 
+def _collapse_metrics(metrics: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Merge data with the same name, unit and dimensions into one datum.
+
+    The merged datum carries Values and Counts instead of Value, so
+    CloudWatch still sees every sample and all statistics are unchanged.
+    """
+    entries: List[Tuple[Dict[str, Any], Dict[float, int]]] = []
+    counts_by_key: Dict[Tuple[Any, ...], Dict[float, int]] = {}
+
+    for datum in metrics:
+        key = (
+            datum["MetricName"],
+            datum["Unit"],
+            tuple((d["Name"], d["Value"]) for d in datum.get("Dimensions", ())),
+        )
+        value = datum["Value"]
+        counts = counts_by_key.get(key)
+        if counts is None or (value not in counts and len(counts) >= MAX_VALUES_PER_DATUM):
+            counts = counts_by_key[key] = {}
+            entries.append(({k: v for k, v in datum.items() if k != "Value"}, counts))
+        counts[value] = counts.get(value, 0) + 1
+
+    return [
+        {**datum, "Values": list(counts), "Counts": list(counts.values())}
+        for datum, counts in entries
+    ]
+
+
+def flush_metrics() -> None:
+    """
+    Send buffered metrics to CloudWatch.
+
+    Identical metrics are collapsed first, then sent with one
+    put_metric_data call per namespace and METRIC_BATCH_SIZE data.
+    Failures are logged and the batch dropped, as with emit_metric.
+    """
+    with _metric_lock:
+        if not _metric_buffer:
+            return
+        pending = _metric_buffer[:]
+        del _metric_buffer[:]
+
+    by_namespace: Dict[str, List[Dict[str, Any]]] = {}
+    for namespace, datum in pending:
+        by_namespace.setdefault(namespace, []).append(datum)
+
+    for namespace, metrics in by_namespace.items():
+        metric_data = _collapse_metrics(metrics)
+        try:
+            for start in range(0, len(metric_data), METRIC_BATCH_SIZE):
+                get_cloudwatch_client().put_metric_data(
+                    Namespace=namespace,
+                    MetricData=metric_data[start:start + METRIC_BATCH_SIZE],
+                )
+        except Exception as e:
+            # Don't fail the operation if metric emission fails
+            logger.warning(
+                "Failed to send %d metrics to %s: %s", len(metrics), namespace, e,
+                extra={"error": str(e), "error_type": type(e).__name__},
+            )
+
+
+# Send anything still buffered when the process exits
+atexit.register(flush_metrics)
+
+
+# Response headers shared by every error response
+RESPONSE_HEADERS = {
+    "Content-Type": "application/json",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "Content-Type,x-api-key",
+    "Access-Control-Allow-Methods": "GET,POST,OPTIONS",
+}
+
+# HTTP status returned for AWS error codes; anything else is a 500
+AWS_ERROR_STATUS_CODES = {
+    "AccessDenied": 403,
+    "UnauthorizedException": 403,
+    "ResourceNotFoundException": 404,
+    "NoSuchKey": 404,
+    "ThrottlingException": 429,
+    "TooManyRequestsException": 429,
+}
+
+
 def create_error_response(
     status_code: int,
     error_message: str,
@@ -292,7 +482,7 @@ def create_error_response(
     """
     error_body: Dict[str, Any] = {
         "error": error_message,
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
     }
 
     if error_type:
@@ -303,13 +493,26 @@ def create_error_response(
 
     return {
         "statusCode": status_code,
-        "headers": {
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "Content-Type,x-api-key",
-            "Access-Control-Allow-Methods": "GET,POST,OPTIONS",
-        },
-        "body": json.dumps(error_body),
+        "headers": RESPONSE_HEADERS,
+        "body": dumps_json(error_body),
+    }
+
+
+def _summarize_event(event: Any, context: Any) -> Dict[str, Any]:
+    """
+    Summarize a Lambda event for error logs.
+
+    Only the event's top-level keys and request line are kept. Headers
+    (which carry the API key) and bodies are never logged.
+    """
+    if not isinstance(event, dict):
+        event = {}
+    return {
+        "event_keys": list(event),
+        "path": event.get("path") or event.get("rawPath"),
+        "httpMethod": event.get("httpMethod")
+        or ((event.get("requestContext") or {}).get("http") or {}).get("method"),
+        "request_id": context.aws_request_id if context else None,
     }
 
 
@@ -340,91 +543,51 @@ def handle_lambda_errors(func: Callable) -> Callable:
 
     @wraps(func)
     def wrapper(event, context):
-        component = context.function_name if context else "unknown"
-
         try:
             return func(event, context)
 
-        except ClientError as e:
-            error_code = e.response.get("Error", {}).get("Code", "Unknown")
-
-            log_error(
-                component=component,
-                operation=func.__name__,
-                error=e,
-                context={
-                    "event": event,
-                    "aws_error_code": error_code,
-                    "request_id": context.aws_request_id if context else None,
-                },
-            )
-
-            emit_metric(
-                "LambdaError",
-                dimensions={
-                    "Component": component,
-                    "ErrorType": "ClientError",
-                    "ErrorCode": error_code,
-                },
-            )
-
-            # Map AWS errors to HTTP status codes
-            status_code = 500
-            if error_code in ["AccessDenied", "UnauthorizedException"]:
-                status_code = 403
-            elif error_code in ["ResourceNotFoundException", "NoSuchKey"]:
-                status_code = 404
-            elif error_code in ["ThrottlingException", "TooManyRequestsException"]:
-                status_code = 429
-
-            return create_error_response(
-                status_code=status_code,
-                error_message=f"AWS service error: {error_code}",
-                error_type="AWSError",
-                details={"error_code": error_code},
-            )
-
-        except ValueError as e:
-            log_error(
-                component=component,
-                operation=func.__name__,
-                error=e,
-                context={
-                    "event": event,
-                    "request_id": context.aws_request_id if context else None,
-                },
-            )
-
-            emit_metric(
-                "LambdaError",
-                dimensions={"Component": component, "ErrorType": "ValueError"},
-            )
-
-            return create_error_response(
-                status_code=400, error_message=str(e), error_type="ValidationError"
-            )
-
         except Exception as e:
+            component = context.function_name if context else "unknown"
+            log_context = _summarize_event(event, context)
+            dimensions = {"Component": component, "ErrorType": type(e).__name__}
+            level = logging.ERROR
+
+            if isinstance(e, ClientError):
+                error_code = e.response.get("Error", {}).get("Code", "Unknown")
+                log_context["aws_error_code"] = error_code
+                dimensions["ErrorType"] = "ClientError"
+                dimensions["ErrorCode"] = error_code
+                # Map AWS errors to HTTP status codes
+                response = create_error_response(
+                    status_code=AWS_ERROR_STATUS_CODES.get(error_code, 500),
+                    error_message=f"AWS service error: {error_code}",
+                    error_type="AWSError",
+                    details={"error_code": error_code},
+                )
+            elif isinstance(e, ValueError):
+                dimensions["ErrorType"] = "ValueError"
+                response = create_error_response(
+                    status_code=400, error_message=str(e), error_type="ValidationError"
+                )
+            else:
+                level = logging.CRITICAL
+                response = create_error_response(
+                    status_code=500,
+                    error_message="Internal server error",
+                    error_type="InternalError",
+                )
+
             log_error(
                 component=component,
                 operation=func.__name__,
                 error=e,
-                context={
-                    "event": event,
-                    "request_id": context.aws_request_id if context else None,
-                },
-                level=logging.CRITICAL,
+                context=log_context,
+                level=level,
             )
+            emit_metric("LambdaError", dimensions=dimensions)
+            return response
 
-            emit_metric(
-                "LambdaError",
-                dimensions={"Component": component, "ErrorType": type(e).__name__},
-            )
-
-            return create_error_response(
-                status_code=500,
-                error_message="Internal server error",
-                error_type="InternalError",
-            )
+        finally:
+            flush_metrics()
 
     return wrapper
@@ -4,83 +4,93 @@ Returns current processing status for a job.
 """
 import json
 import os
-import logging
-import functools
+import sys
+import threading
 from datetime import datetime, timezone
-from typing import Dict, Any, Callable
+from typing import Dict, Any
 
 import boto3
+from botocore.config import Config
 
-# Configure logging
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
+# src is importable from the petavatar-shared layer (/opt/python) or
+# PYTHONPATH; in a source checkout it is found in the repository root
+try:
+    import src.utils  # noqa: F401
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils import handle_lambda_errors, create_error_response
+from src.utils.error_handling import dumps_json as error_dumps_json
 
+# orjson is several times faster than json for response bodies;
+# fall back to the standard library where it is not packaged
+try:
+    import orjson
 
-def log_error(component: str, operation: str, error: Exception, context: dict) -> None:
-    """Log error with structured context."""
-    logger.error(json.dumps({
-        "component": component,
-        "operation": operation,
-        "error_type": type(error).__name__,
-        "error_message": str(error),
-        "context": context,
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }))
+    def dumps_json(obj: Any) -> str:
+        """Serialize obj to a JSON string."""
+        return orjson.dumps(obj).decode()
+except ImportError:
+    dumps_json = json.dumps
 
 
-def emit_metric(metric_name: str, value: float = 1.0, dimensions: dict = None) -> None:
-    """Emit CloudWatch metric."""
+# Response headers shared by every API response
+RESPONSE_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
+    'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
+}
+
+# Shared HTTP settings: a larger keep-alive pool so sockets are reused
+# across calls and warm invocations, and botocore's adaptive retries
+# (client-side rate limiting plus jittered backoff) for throttling
+CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 4},
+)
+
+# AWS clients are created on first use and reused across warm invocations.
+# Creation is locked because the default boto3 session is not thread safe
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(service: str) -> Any:
+    """Get a cached boto3 client for a service."""
+    client = _clients.get(service)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(service)
+            if client is None:
+                client = _clients[service] = boto3.client(service, config=CLIENT_CONFIG)
+    return client
+
+
+# Build the DynamoDB client during container init rather than on the first
+# request. Best effort: without configuration it is built lazily as before
+if os.environ.get('DYNAMODB_TABLE_NAME'):
     try:
-        cloudwatch = boto3.client('cloudwatch')
-        metric_data = {
-            'MetricName': metric_name,
-            'Value': value,
-            'Unit': 'Count',
-            'Timestamp': datetime.now(timezone.utc)
-        }
-        if dimensions:
-            metric_data['Dimensions'] = [
-                {'Name': k, 'Value': v} for k, v in dimensions.items()
-            ]
-        cloudwatch.put_metric_data(Namespace='PetAvatar', MetricData=[metric_data])
+        get_client('dynamodb')
     except Exception:
         pass
 
 
-def create_error_response(status_code: int, error_message: str, error_type: str = "Error") -> Dict[str, Any]:
-    """Create standardized error response."""
-    return {
-        'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
-            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
-        },
-        'body': json.dumps({
-            'error': error_message,
-            'error_type': error_type,
-            'timestamp': datetime.now(timezone.utc).isoformat()
-        })
-    }
-
+# Only the attributes reported below are read; completed jobs also hold
+# results that would otherwise be transferred and deserialized.
+# status is a reserved word, so it is aliased
+JOB_STATUS_PROJECTION = '#status, progress, error_message'
+STATUS_ATTR_NAMES = {'#status': 'status'}
 
-def handle_lambda_errors(func: Callable) -> Callable:
-    """Decorator to handle Lambda errors consistently."""
-    @functools.wraps(func)
-    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-        try:
-            return func(event, context)
-        except Exception as e:
-            log_error(
-                component=func.__name__,
-                operation="handler_execution",
-                error=e,
-                context={"event_keys": list(event.keys()) if event else []}
-            )
-            emit_metric("HandlerError", dimensions={"Component": func.__name__})
-            return create_error_response(500, str(e), type(e).__name__)
-    return wrapper
+# Body of the missing job_id response. Only the timestamp varies, so the
+# rest is encoded once, with the serializer create_error_response uses, and
+# the timestamp is spliced in per request
+_TIMESTAMP_PLACEHOLDER = '@timestamp@'
+MISSING_JOB_ID_BODY_PREFIX, _, MISSING_JOB_ID_BODY_SUFFIX = error_dumps_json({
+    'error': 'Missing job_id parameter',
+    'timestamp': _TIMESTAMP_PLACEHOLDER,
+    'error_type': 'ValidationError'
+}).partition(_TIMESTAMP_PLACEHOLDER)
 
 
 @handle_lambda_errors
@@ -91,41 +101,50 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     job_id = path_params.get('job_id')
     
     if not job_id:
-        return create_error_response(400, 'Missing job_id parameter', 'ValidationError')
+        return {
+            'statusCode': 400,
+            'headers': RESPONSE_HEADERS,
+            'body': ''.join((
+                MISSING_JOB_ID_BODY_PREFIX,
+                datetime.now(timezone.utc).isoformat(),
+                MISSING_JOB_ID_BODY_SUFFIX
+            ))
+        }
     
     # Get DynamoDB table name from environment
     table_name = os.environ.get('DYNAMODB_TABLE_NAME')
     if not table_name:
         raise ValueError('DYNAMODB_TABLE_NAME environment variable not set')
     
-    # Query DynamoDB for job status
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table(table_name)
-    
-    response = table.get_item(Key={'job_id': job_id})
+    # Query DynamoDB for job status. The low-level client is used directly,
+    # as the three attributes are cheaper to read by hand than through the
+    # resource layer's type deserializer
+    response = get_client('dynamodb').get_item(
+        TableName=table_name,
+        Key={'job_id': {'S': job_id}},
+        ProjectionExpression=JOB_STATUS_PROJECTION,
+        ExpressionAttributeNames=STATUS_ATTR_NAMES
+    )
     
     if 'Item' not in response:
         return create_error_response(404, f'Job not found: {job_id}', 'NotFoundError')
     
     item = response['Item']
+    status = item.get('status', {}).get('S', 'unknown')
+    progress = item.get('progress', {}).get('N')
     
     # Build response
     result = {
         'job_id': job_id,
-        'status': item.get('status', 'unknown'),
-        'progress': int(item.get('progress', 0)) if item.get('progress') else 0
+        'status': status,
+        'progress': int(float(progress)) if progress else 0
     }
     
-    if item.get('status') == 'failed' and 'error_message' in item:
-        result['error'] = item['error_message']
+    if status == 'failed' and 'error_message' in item:
+        result['error'] = item['error_message'].get('S')
     
     return {
         'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
-            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
-        },
-        'body': json.dumps(result)
+        'headers': RESPONSE_HEADERS,
+        'body': dumps_json(result)
     }
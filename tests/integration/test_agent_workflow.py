@@ -4,9 +4,11 @@ import os
 import sys
 import uuid
 import base64
+import logging
 import importlib.util
 from unittest.mock import MagicMock, patch
 from typing import Any
+from botocore.exceptions import ClientError
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, PROJECT_ROOT)
@@ -21,6 +23,15 @@ def load_handler_module(handler_dir: str) -> Any:
     return module
 
 
+def load_agent_tool(tool_name: str) -> Any:
+    tool_path = os.path.join(PROJECT_ROOT, 'petavatar-agent', 'tools', f'{tool_name}.py')
+    spec = importlib.util.spec_from_file_location(f"{tool_name}_tool", tool_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
 class MockContext:
     def __init__(self, function_name: str = "test-function"):
         self.function_name = function_name
@@ -34,13 +45,9 @@ class TestProcessWorker:
 
     def test_processes_sqs_message_and_invokes_agent(self):
         """Test SQS message processing and agent invocation. Req: 4.5"""
-        with patch('boto3.resource') as mock_boto_resource, \
-             patch('boto3.client') as mock_boto_client:
+        with patch('boto3.client') as mock_boto_client:
             # Mock DynamoDB
-            mock_table = MagicMock()
             mock_dynamodb = MagicMock()
-            mock_dynamodb.Table.return_value = mock_table
-            mock_boto_resource.return_value = mock_dynamodb
 
             # Mock S3 client
             mock_s3 = MagicMock()
@@ -51,9 +58,11 @@ class TestProcessWorker:
             mock_bedrock = MagicMock()
             mock_bedrock.invoke_agent.return_value = {'completion': []}
 
-            def client_factory(service):
+            def client_factory(service, **kwargs):
                 if service == 's3':
                     return mock_s3
+                elif service == 'dynamodb':
+                    return mock_dynamodb
                 elif service == 'bedrock-agent-runtime':
                     return mock_bedrock
                 elif service == 'sqs':
@@ -83,25 +92,23 @@ class TestProcessWorker:
 
             assert response['statusCode'] == 200
             # Verify DynamoDB was updated
-            assert mock_table.update_item.called
+            assert mock_dynamodb.update_item.called
 
     def test_updates_job_status_to_processing(self):
         """Test job status update to processing. Req: 4.5"""
-        with patch('boto3.resource') as mock_boto_resource, \
-             patch('boto3.client') as mock_boto_client:
-            mock_table = MagicMock()
+        with patch('boto3.client') as mock_boto_client:
             mock_dynamodb = MagicMock()
-            mock_dynamodb.Table.return_value = mock_table
-            mock_boto_resource.return_value = mock_dynamodb
 
             mock_s3 = MagicMock()
             mock_s3.get_object.return_value = {'Body': MagicMock(read=lambda: b'fake-image')}
             mock_bedrock = MagicMock()
             mock_bedrock.invoke_agent.return_value = {'completion': []}
 
-            def client_factory(service):
+            def client_factory(service, **kwargs):
                 if service == 's3':
                     return mock_s3
+                elif service == 'dynamodb':
+                    return mock_dynamodb
                 elif service == 'bedrock-agent-runtime':
                     return mock_bedrock
                 return MagicMock()
@@ -126,7 +133,7 @@ class TestProcessWorker:
                 module.handler(event, MockContext('process-worker'))
 
             # Verify status was updated to processing
-            update_calls = mock_table.update_item.call_args_list
+            update_calls = mock_dynamodb.update_item.call_args_list
             assert len(update_calls) > 0
             # First call should set status to processing
             first_call = update_calls[0]
@@ -136,21 +143,19 @@ class TestProcessWorker:
 
     def test_stores_results_in_dynamodb(self):
         """Test results storage in DynamoDB. Req: 4.5"""
-        with patch('boto3.resource') as mock_boto_resource, \
-             patch('boto3.client') as mock_boto_client:
-            mock_table = MagicMock()
+        with patch('boto3.client') as mock_boto_client:
             mock_dynamodb = MagicMock()
-            mock_dynamodb.Table.return_value = mock_table
-            mock_boto_resource.return_value = mock_dynamodb
 
             mock_s3 = MagicMock()
             mock_s3.get_object.return_value = {'Body': MagicMock(read=lambda: b'fake-image')}
             mock_bedrock = MagicMock()
             mock_bedrock.invoke_agent.return_value = {'completion': []}
 
-            def client_factory(service):
+            def client_factory(service, **kwargs):
                 if service == 's3':
                     return mock_s3
+                elif service == 'dynamodb':
+                    return mock_dynamodb
                 elif service == 'bedrock-agent-runtime':
                     return mock_bedrock
                 return MagicMock()
@@ -175,23 +180,19 @@ class TestProcessWorker:
                 module.handler(event, MockContext('process-worker'))
 
             # Verify final update includes identity_package
-            update_calls = mock_table.update_item.call_args_list
+            update_calls = mock_dynamodb.update_item.call_args_list
             assert len(update_calls) > 0
             # Last call should include completed status
             last_call = update_calls[-1]
             expr_values = last_call.kwargs.get('ExpressionAttributeValues', {})
             assert ':status' in expr_values
-            assert expr_values[':status'] == 'completed'
+            assert expr_values[':status'] == {'S': 'completed'}
 
     def test_handles_missing_job_id_gracefully(self):
         """Test handling of invalid SQS messages. Req: 11.2"""
-        with patch('boto3.resource') as mock_boto_resource, \
-             patch('boto3.client') as mock_boto_client:
-            mock_table = MagicMock()
+        with patch('boto3.client') as mock_boto_client:
             mock_dynamodb = MagicMock()
-            mock_dynamodb.Table.return_value = mock_table
-            mock_boto_resource.return_value = mock_dynamodb
-            mock_boto_client.return_value = MagicMock()
+            mock_boto_client.return_value = mock_dynamodb
 
             module = load_handler_module('process-worker')
             with patch.dict(os.environ, {
@@ -210,4 +211,167 @@ class TestProcessWorker:
 
             # Should complete without error but not process
             assert response['statusCode'] == 200
-            mock_table.update_item.assert_not_called()
+            mock_dynamodb.update_item.assert_not_called()
+
+    def test_skips_duplicate_delivery_of_claimed_job(self):
+        """Test a redelivered message for a job already claimed is skipped. Req: 4.5"""
+        with patch('boto3.client') as mock_boto_client:
+            mock_dynamodb = MagicMock()
+            mock_dynamodb.update_item.side_effect = ClientError(
+                {
+                    'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'The conditional request failed'},
+                    'Item': {'job_id': {'S': 'test-job-id'}, 'status': {'S': 'completed'}}
+                },
+                'UpdateItem'
+            )
+            mock_s3 = MagicMock()
+
+            def client_factory(service, **kwargs):
+                if service == 'dynamodb':
+                    return mock_dynamodb
+                elif service == 's3':
+                    return mock_s3
+                return MagicMock()
+
+            mock_boto_client.side_effect = client_factory
+
+            module = load_handler_module('process-worker')
+            with patch.dict(os.environ, {
+                'DYNAMODB_TABLE_NAME': 'test-table',
+                'S3_UPLOAD_BUCKET': 'test-upload-bucket',
+                'S3_GENERATED_BUCKET': 'test-generated-bucket',
+                'AGENT_RUNTIME_ARN': 'arn:aws:bedrock-agentcore:us-east-1:123:runtime/test-agent'
+            }):
+                event = {
+                    'Records': [{
+                        'messageId': 'm1',
+                        'body': json.dumps({
+                            'job_id': 'test-job-id',
+                            's3_upload_key': 'uploads/test-job-id/image.jpg'
+                        })
+                    }]
+                }
+                response = module.handler(event, MockContext('process-worker'))
+
+            # Only the claim is attempted; nothing is uploaded or rewritten
+            assert response['statusCode'] == 200
+            assert response['batchItemFailures'] == []
+            assert mock_dynamodb.update_item.call_count == 1
+            mock_s3.put_object.assert_not_called()
+
+    def test_log_level_is_case_insensitive_with_info_fallback(self):
+        """Test LOG_LEVEL accepts lower case names and ignores unknown ones."""
+        for log_level, expected in (('warning', logging.WARNING), ('verbose', logging.INFO)):
+            with patch('boto3.client'), patch.dict(os.environ, {'LOG_LEVEL': log_level}):
+                module = load_handler_module('process-worker')
+            assert module.logger.level == expected
+
+
+class TestAnalyzePetTool:
+    """Tests for the pet analysis agent tool. Requirements: 4.1, 4.2"""
+
+    def test_partial_analysis_comes_from_the_retried_stream(self):
+        """Test a retried analysis reports the prefix parsed from its own stream only."""
+        with patch('boto3.client'):
+            module = load_agent_tool('analyze_pet')
+
+        prefix = {
+            'species': 'dog',
+            'personality_dimensions': {'energy_level': 80},
+            'dominant_traits': ['playful'],
+            'vibe': 'sunny, loyal, a little chaotic'
+        }
+        document = json.dumps(prefix)[:-1] + ', "breed": "beagle", "expression": "happy", "posture": "sitting"}'
+        attempts = []
+
+        def fake_invoke(image_base64, prompt, max_tokens, output, on_delta):
+            attempts.append(on_delta)
+            if len(attempts) == 1:
+                # Truncated document left behind by the failed attempt
+                on_delta('{"species": "cat", "vibe": "aloof"')
+                raise module.orjson.JSONDecodeError('Unexpected end of input', '', 0)
+            for start in range(0, len(document), 3):
+                on_delta(document[start:start + 3])
+            return json.loads(document)
+
+        partials = []
+        with patch.object(module, 'load_image_base64_from_s3', return_value='aW1n'), \
+                patch.object(module, '_PERSONALITY_HEAD', None), \
+                patch.object(module, 'invoke_claude_vision', side_effect=fake_invoke):
+            result = module.run_pet_analysis('s3://b/k.jpg', on_partial=partials.append)
+
+        assert len(attempts) == 2
+        assert result['breed'] == 'beagle'
+        assert partials == [prefix]
+
+    def test_ranged_image_load_survives_short_reads(self):
+        """Test uneven S3 body reads across parallel ranges still decode to the original image."""
+        with patch('boto3.client'):
+            module = load_agent_tool('analyze_pet')
+
+        image = bytes(range(256)) * 4 + b'tail'
+        read_sizes = [1, 7, 2, 11, 5]
+
+        class ShortReadBody:
+            def __init__(self, data):
+                self.data = data
+                self.reads = 0
+
+            def read(self, size):
+                size = min(size, read_sizes[self.reads % len(read_sizes)])
+                self.reads += 1
+                chunk, self.data = self.data[:size], self.data[size:]
+                return chunk
+
+            def close(self):
+                pass
+
+        def fake_get_object(Bucket, Key, Range, IfMatch=None):
+            start, end = (int(n) for n in Range.removeprefix('bytes=').split('-'))
+            end = min(end, len(image) - 1)
+            return {
+                'Body': ShortReadBody(image[start:end + 1]),
+                'ContentType': 'image/png',
+                'ContentRange': f'bytes {start}-{end}/{len(image)}',
+                'ETag': '"etag"'
+            }
+
+        with patch.object(module, 'S3_READ_CHUNK_BYTES', 12), \
+                patch.object(module, 'S3_RANGE_BYTES', 96), \
+                patch.object(module.s3, 'get_object', side_effect=fake_get_object) as mock_get_object:
+            encoded = module.load_image_base64_from_s3('s3://b/pets/dog.png')
+
+        assert mock_get_object.call_count == 11
+        assert base64.b64decode(encoded, validate=True) == image
+
+    def test_uploaded_image_loads_back_with_detected_content_type(self):
+        """Test an image uploaded by the agent passes the loader's content type check."""
+        with patch('boto3.client'):
+            module = load_agent_tool('analyze_pet')
+
+        image = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 2
+        stored = {}
+
+        def fake_put_object(Bucket, Key, Body, ContentType='binary/octet-stream'):
+            stored[(Bucket, Key)] = (Body, ContentType)
+
+        def fake_get_object(Bucket, Key, Range, IfMatch=None):
+            data, content_type = stored[(Bucket, Key)]
+            start, end = (int(n) for n in Range.removeprefix('bytes=').split('-'))
+            end = min(end, len(data) - 1)
+            body = MagicMock()
+            body.read.side_effect = [data[start:end + 1], b'']
+            return {
+                'Body': body,
+                'ContentType': content_type,
+                'ContentRange': f'bytes {start}-{end}/{len(data)}',
+                'ETag': '"etag"'
+            }
+
+        with patch.object(module.s3, 'put_object', side_effect=fake_put_object), \
+                patch.object(module.s3, 'get_object', side_effect=fake_get_object):
+            image_s3_uri = module.upload_image_to_s3(image, 'job-1', bucket='test-upload-bucket')
+            encoded = module.load_image_base64_from_s3(image_s3_uri)
+
+        assert stored[('test-upload-bucket', 'agent-inputs/job-1/original')][1] == 'image/png'
+        assert base64.b64decode(encoded) == image
@@ -128,7 +128,7 @@ class TestBedrockAPIFailures:
             )
             mock_bedrock.invoke_agent.side_effect = throttle_error
 
-            def client_factory(service):
+            def client_factory(service, **kwargs):
                 if service == 's3':
                     return mock_s3
                 elif service == 'bedrock-agent-runtime':
@@ -184,6 +184,20 @@ class TestErrorLogging:
             # Verify error was logged (logger.error or logger.log was called)
             assert mock_logger.error.called or mock_logger.log.called
 
+    def test_null_request_context_still_returns_structured_error(self):
+        """Test an event with requestContext set to None gets the handler's error response."""
+        from src.utils.error_handling import handle_lambda_errors
+
+        @handle_lambda_errors
+        def failing_handler(event, context):
+            raise ValueError('Invalid job_id')
+
+        with patch('src.utils.error_handling.logger'):
+            response = failing_handler({'requestContext': None}, MockContext('status-handler'))
+
+        assert response['statusCode'] == 400
+        assert json.loads(response['body'])['error'] == 'Invalid job_id'
+
 
 class TestErrorResponses:
     """Tests for descriptive error responses. Req: 11.2"""
@@ -213,12 +227,10 @@ class TestErrorResponses:
 
     def test_returns_descriptive_error_for_job_not_found(self):
         """Test descriptive error for job not found."""
-        with patch('boto3.resource') as mock_boto_resource:
-            mock_table = MagicMock()
-            mock_table.get_item.return_value = {}  # No item
+        with patch('boto3.client') as mock_boto_client:
             mock_dynamodb = MagicMock()
-            mock_dynamodb.Table.return_value = mock_table
-            mock_boto_resource.return_value = mock_dynamodb
+            mock_dynamodb.get_item.return_value = {}  # No item
+            mock_boto_client.return_value = mock_dynamodb
 
             module = load_handler_module('status-handler')
             with patch.dict(os.environ, {'DYNAMODB_TABLE_NAME': 'test-table'}):
@@ -6,6 +6,7 @@ import uuid
 import importlib.util
 from unittest.mock import MagicMock, patch
 from typing import Any
+from botocore.exceptions import ClientError
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, PROJECT_ROOT)
@@ -66,15 +67,46 @@ class TestProcessHandler:
                 response = module.handler(event, MockContext('process-handler'))
             assert response['statusCode'] == 400
 
+    def test_does_not_queue_job_when_record_write_fails(self):
+        with patch('boto3.client') as mock_boto_client:
+            mock_aws = MagicMock()
+            mock_aws.put_item.side_effect = ClientError(
+                {'Error': {'Code': 'ProvisionedThroughputExceededException'}}, 'PutItem'
+            )
+            mock_boto_client.return_value = mock_aws
+            module = load_handler_module('process-handler')
+            env = {'DYNAMODB_TABLE_NAME': 't', 'SQS_QUEUE_URL': 'https://sqs/q', 'S3_UPLOAD_BUCKET': 'b'}
+            with patch.dict(os.environ, env):
+                event = {'headers': {'x-api-key': 'k'}, 'body': json.dumps({'s3_uri': 's3://b/uploads/j1/pet.jpg'})}
+                response = module.handler(event, MockContext('process-handler'))
+            assert response['statusCode'] >= 500
+            mock_aws.send_message.assert_not_called()
+
+    def test_resubmitted_job_reports_existing_status_without_requeue(self):
+        with patch('boto3.client') as mock_boto_client:
+            mock_aws = MagicMock()
+            conditional_error = ClientError(
+                {'Error': {'Code': 'ConditionalCheckFailedException'}}, 'PutItem'
+            )
+            conditional_error.response['Item'] = {'job_id': {'S': 'j1'}, 'status': {'S': 'completed'}}
+            mock_aws.put_item.side_effect = conditional_error
+            mock_boto_client.return_value = mock_aws
+            module = load_handler_module('process-handler')
+            env = {'DYNAMODB_TABLE_NAME': 't', 'SQS_QUEUE_URL': 'https://sqs/q', 'S3_UPLOAD_BUCKET': 'b'}
+            with patch.dict(os.environ, env):
+                event = {'headers': {'x-api-key': 'k'}, 'body': json.dumps({'s3_uri': 's3://b/uploads/j1/pet.jpg'})}
+                response = module.handler(event, MockContext('process-handler'))
+            assert response['statusCode'] == 200
+            assert json.loads(response['body'])['status'] == 'completed'
+            mock_aws.send_message.assert_not_called()
+
 
 class TestStatusHandler:
     def test_returns_job_status(self):
-        with patch('boto3.resource') as mock_boto_resource:
-            mock_table = MagicMock()
-            mock_table.get_item.return_value = {'Item': {'job_id': 'j1', 'status': 'processing', 'progress': 50}}
+        with patch('boto3.client') as mock_boto_client:
             mock_dynamodb = MagicMock()
-            mock_dynamodb.Table.return_value = mock_table
-            mock_boto_resource.return_value = mock_dynamodb
+            mock_dynamodb.get_item.return_value = {'Item': {'status': {'S': 'processing'}, 'progress': {'N': '50'}}}
+            mock_boto_client.return_value = mock_dynamodb
             module = load_handler_module('status-handler')
             with patch.dict(os.environ, {'DYNAMODB_TABLE_NAME': 'test-table'}):
                 event = {'headers': {'x-api-key': 'k'}, 'pathParameters': {'job_id': 'j1'}}
@@ -83,36 +115,52 @@ class TestStatusHandler:
             assert json.loads(response['body'])['status'] == 'processing'
 
     def test_returns_404_for_unknown_job(self):
-        with patch('boto3.resource') as mock_boto_resource:
-            mock_table = MagicMock()
-            mock_table.get_item.return_value = {}
+        with patch('boto3.client') as mock_boto_client:
             mock_dynamodb = MagicMock()
-            mock_dynamodb.Table.return_value = mock_table
-            mock_boto_resource.return_value = mock_dynamodb
+            mock_dynamodb.get_item.return_value = {}
+            mock_boto_client.return_value = mock_dynamodb
             module = load_handler_module('status-handler')
             with patch.dict(os.environ, {'DYNAMODB_TABLE_NAME': 'test-table'}):
                 event = {'headers': {'x-api-key': 'k'}, 'pathParameters': {'job_id': 'unknown'}}
                 response = module.handler(event, MockContext('status-handler'))
             assert response['statusCode'] == 404
 
+    def test_missing_job_id_body_matches_shared_error_response(self):
+        import re
+        import src.utils.error_handling as error_handling
+
+        def stdlib_dumps(obj):
+            return json.dumps(obj, default=str)
+
+        for serializer in (error_handling.dumps_json, stdlib_dumps):
+            with patch('boto3.client'), patch.object(error_handling, 'dumps_json', serializer):
+                module = load_handler_module('status-handler')
+                response = module.handler({'headers': {'x-api-key': 'k'}, 'pathParameters': {}}, MockContext('status-handler'))
+                expected = error_handling.create_error_response(400, 'Missing job_id parameter', 'ValidationError')
+            assert response['statusCode'] == 400
+            timestamp = re.compile(r'"timestamp": ?"[^"]+"')
+            assert timestamp.sub('', response['body']) == timestamp.sub('', expected['body'])
+
 
 
 class TestResultHandler:
     def test_returns_complete_identity_package(self):
-        with patch('boto3.client') as mock_boto_client, patch('boto3.resource') as mock_boto_resource:
-            mock_table = MagicMock()
-            mock_table.get_item.return_value = {
+        with patch('boto3.client') as mock_boto_client:
+            mock_dynamodb = MagicMock()
+            mock_dynamodb.get_item.return_value = {
                 'Item': {
-                    'job_id': 'j1', 'status': 'completed', 's3_avatar_key': 'g/j1/a.png',
-                    'identity_package': {'human_name': 'Greg'}, 'pet_analysis': {'species': 'dog'}
+                    'status': {'S': 'completed'}, 's3_avatar_key': {'S': 'g/j1/a.png'},
+                    'identity_package': {'M': {'human_name': {'S': 'Greg'}, 'similarity_score': {'N': '87.5'}}},
+                    'pet_analysis': {'M': {'species': {'S': 'dog'}}}
                 }
             }
-            mock_dynamodb = MagicMock()
-            mock_dynamodb.Table.return_value = mock_table
-            mock_boto_resource.return_value = mock_dynamodb
             mock_s3 = MagicMock()
             mock_s3.generate_presigned_url.return_value = 'https://url'
-            mock_boto_client.return_value = mock_s3
+
+            def client_factory(service, **kwargs):
+                return mock_dynamodb if service == 'dynamodb' else mock_s3
+
+            mock_boto_client.side_effect = client_factory
             module = load_handler_module('result-handler')
             with patch.dict(os.environ, {'DYNAMODB_TABLE_NAME': 't', 'S3_GENERATED_BUCKET': 'b'}):
                 event = {'headers': {'x-api-key': 'k'}, 'pathParameters': {'job_id': 'j1'}}
@@ -120,15 +168,14 @@ class TestResultHandler:
             assert response['statusCode'] == 200
             body = json.loads(response['body'])
             assert 'avatar_url' in body
-            assert 'identity' in body
+            assert body['identity'] == {'human_name': 'Greg', 'similarity_score': 87.5}
+            assert body['pet_analysis'] == {'species': 'dog'}
 
     def test_returns_409_for_incomplete_job(self):
-        with patch('boto3.resource') as mock_boto_resource:
-            mock_table = MagicMock()
-            mock_table.get_item.return_value = {'Item': {'job_id': 'j1', 'status': 'processing', 'progress': 50}}
+        with patch('boto3.client') as mock_boto_client:
             mock_dynamodb = MagicMock()
-            mock_dynamodb.Table.return_value = mock_table
-            mock_boto_resource.return_value = mock_dynamodb
+            mock_dynamodb.get_item.return_value = {'Item': {'status': {'S': 'processing'}}}
+            mock_boto_client.return_value = mock_dynamodb
             module = load_handler_module('result-handler')
             with patch.dict(os.environ, {'DYNAMODB_TABLE_NAME': 't', 'S3_GENERATED_BUCKET': 'b'}):
                 event = {'headers': {'x-api-key': 'k'}, 'pathParameters': {'job_id': 'j1'}}
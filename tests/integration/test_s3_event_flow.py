@@ -40,6 +40,7 @@ class TestS3EventHandler:
             mock_dynamodb.Table.return_value = mock_table
             mock_boto_resource.return_value = mock_dynamodb
             mock_sqs = MagicMock()
+            mock_sqs.send_message_batch.return_value = {'Successful': [], 'Failed': []}
             mock_boto_client.return_value = mock_sqs
 
             module = load_handler_module('s3-event-handler')
@@ -58,8 +59,8 @@ class TestS3EventHandler:
             body = json.loads(response['body'])
             assert body['processed'] == 1
             assert body['errors'] == 0
-            mock_table.put_item.assert_called_once()
-            mock_sqs.send_message.assert_called_once()
+            mock_table.update_item.assert_called_once()
+            mock_sqs.send_message_batch.assert_called_once()
 
     def test_validates_object_key_pattern(self):
         """Test object key pattern validation. Req: 2.2"""
@@ -69,6 +70,7 @@ class TestS3EventHandler:
             mock_dynamodb.Table.return_value = mock_table
             mock_boto_resource.return_value = mock_dynamodb
             mock_sqs = MagicMock()
+            mock_sqs.send_message_batch.return_value = {'Successful': [], 'Failed': []}
             mock_boto_client.return_value = mock_sqs
 
             module = load_handler_module('s3-event-handler')
@@ -88,8 +90,8 @@ class TestS3EventHandler:
             body = json.loads(response['body'])
             assert body['processed'] == 0
             assert body['errors'] == 1
-            mock_table.put_item.assert_not_called()
-            mock_sqs.send_message.assert_not_called()
+            mock_table.update_item.assert_not_called()
+            mock_sqs.send_message_batch.assert_not_called()
 
     def test_creates_dynamodb_record_if_not_exists(self):
         """Test DynamoDB record creation. Req: 2.3"""
@@ -100,6 +102,7 @@ class TestS3EventHandler:
             mock_dynamodb.Table.return_value = mock_table
             mock_boto_resource.return_value = mock_dynamodb
             mock_sqs = MagicMock()
+            mock_sqs.send_message_batch.return_value = {'Successful': [], 'Failed': []}
             mock_boto_client.return_value = mock_sqs
 
             module = load_handler_module('s3-event-handler')
@@ -114,12 +117,12 @@ class TestS3EventHandler:
                 }
                 module.handler(event, MockContext('s3-event-handler'))
 
-            # Verify put_item was called with correct job_id and status
-            mock_table.put_item.assert_called_once()
-            call_args = mock_table.put_item.call_args
-            item = call_args.kwargs.get('Item', {})
-            assert item['job_id'] == 'new-job-id'
-            assert item['status'] == 'queued'
+            # Verify the record is keyed by job_id and created as "queued"
+            mock_table.update_item.assert_called_once()
+            call_args = mock_table.update_item.call_args
+            assert call_args.kwargs['Key'] == {'job_id': 'new-job-id'}
+            assert 'if_not_exists(#status, :queued)' in call_args.kwargs['UpdateExpression']
+            assert call_args.kwargs['ExpressionAttributeValues'][':queued'] == 'queued'
 
 
     def test_sends_message_to_processing_queue(self):
@@ -131,6 +134,7 @@ class TestS3EventHandler:
             mock_dynamodb.Table.return_value = mock_table
             mock_boto_resource.return_value = mock_dynamodb
             mock_sqs = MagicMock()
+            mock_sqs.send_message_batch.return_value = {'Successful': [], 'Failed': []}
             mock_boto_client.return_value = mock_sqs
 
             module = load_handler_module('s3-event-handler')
@@ -145,9 +149,11 @@ class TestS3EventHandler:
                 }
                 module.handler(event, MockContext('s3-event-handler'))
 
-            mock_sqs.send_message.assert_called_once()
-            call_args = mock_sqs.send_message.call_args
-            message_body = json.loads(call_args.kwargs.get('MessageBody', '{}'))
+            mock_sqs.send_message_batch.assert_called_once()
+            call_args = mock_sqs.send_message_batch.call_args
+            entries = call_args.kwargs.get('Entries', [])
+            assert len(entries) == 1
+            message_body = json.loads(entries[0]['MessageBody'])
             assert message_body['job_id'] == 'job-123'
             assert message_body['s3_upload_key'] == 'uploads/job-123/image.jpg'
 
@@ -159,6 +165,7 @@ class TestS3EventHandler:
             mock_dynamodb.Table.return_value = mock_table
             mock_boto_resource.return_value = mock_dynamodb
             mock_sqs = MagicMock()
+            mock_sqs.send_message_batch.return_value = {'Successful': [], 'Failed': []}
             mock_boto_client.return_value = mock_sqs
 
             module = load_handler_module('s3-event-handler')
@@ -177,3 +184,33 @@ class TestS3EventHandler:
             body = json.loads(response['body'])
             assert body['processed'] == 1
             assert body['errors'] == 1
+
+    def test_does_not_requeue_completed_job(self):
+        """Test a repeated upload for a completed job is recorded but not queued. Req: 2.3, 2.4"""
+        with patch('boto3.resource') as mock_boto_resource, patch('boto3.client') as mock_boto_client:
+            mock_table = MagicMock()
+            mock_table.update_item.return_value = {'Attributes': {'status': 'completed'}}
+            mock_dynamodb = MagicMock()
+            mock_dynamodb.Table.return_value = mock_table
+            mock_boto_resource.return_value = mock_dynamodb
+            mock_sqs = MagicMock()
+            mock_boto_client.return_value = mock_sqs
+
+            module = load_handler_module('s3-event-handler')
+            with patch.dict(os.environ, {'DYNAMODB_TABLE_NAME': 'test-table', 'SQS_QUEUE_URL': 'https://sqs/q'}):
+                event = {
+                    'Records': [{
+                        's3': {
+                            'bucket': {'name': 'petavatar-uploads'},
+                            'object': {'key': 'uploads/done-job/image.jpg'}
+                        }
+                    }]
+                }
+                response = module.handler(event, MockContext('s3-event-handler'))
+
+            body = json.loads(response['body'])
+            assert body['processed'] == 0
+            assert body['skipped'] == 1
+            assert body['errors'] == 0
+            mock_table.update_item.assert_called_once()
+            mock_sqs.send_message_batch.assert_not_called()
@@ -51,7 +51,7 @@ class TestAPIKeyValidation:
 
     def test_status_endpoint_requires_api_key(self):
         """Test status endpoint requires API key."""
-        with patch('boto3.resource'):
+        with patch('boto3.client'):
             module = load_handler_module('status-handler')
             with patch.dict(os.environ, {'DYNAMODB_TABLE_NAME': 'test-table'}):
                 event = {'headers': {}, 'pathParameters': {'job_id': 'test'}}
@@ -68,6 +68,44 @@ class TestAPIKeyValidation:
                 response = module.handler(event, MockContext('result-handler'))
             assert response['statusCode'] == 401
 
+    def test_malformed_key_rejected_without_secret_lookup(self):
+        """Test keys that cannot be valid are rejected before Secrets Manager is called."""
+        from src.security import APIKeyValidator
+
+        valid_key = 'a' * 43
+        mock_secrets = MagicMock()
+        mock_secrets.get_secret_value.return_value = {'SecretString': json.dumps({'api_key': valid_key})}
+        validator = APIKeyValidator(secret_arn='arn:secret', secrets_client=mock_secrets)
+
+        assert validator.validate('short') is False
+        assert validator.validate('a' * 42 + '!') is False
+        mock_secrets.get_secret_value.assert_not_called()
+
+        assert validator.validate(valid_key) is True
+        mock_secrets.get_secret_value.assert_called_once()
+
+    def test_null_request_context_is_rejected_as_unauthorized(self):
+        """Test an event with requestContext set to None still gets the 401."""
+        from src.security import require_api_key
+
+        handler = require_api_key(lambda event, context: {'statusCode': 200})
+        response = handler({'headers': {}, 'requestContext': None}, MockContext())
+
+        assert response['statusCode'] == 401
+
+    def test_preflight_responses_are_not_shared(self):
+        """Test changing one preflight response leaves later ones untouched."""
+        from src.security import require_api_key, add_security_headers
+
+        handler = require_api_key(lambda event, context: {'statusCode': 200})
+        event = {'httpMethod': 'OPTIONS', 'headers': {}}
+
+        first = add_security_headers(handler(event, MockContext()))
+        second = handler(event, MockContext())
+
+        assert first['headers']['X-Frame-Options'] == 'DENY'
+        assert 'X-Frame-Options' not in second['headers']
+
 
 class TestPresignedURLExpiration:
     """Tests for presigned URL expiration. Req: 12.3"""
@@ -94,23 +132,23 @@ class TestPresignedURLExpiration:
 
     def test_download_presigned_url_expires_in_1_hour(self):
         """Test download presigned URL has 1-hour expiration."""
-        with patch('boto3.client') as mock_boto_client, \
-             patch('boto3.resource') as mock_boto_resource:
-            mock_table = MagicMock()
-            mock_table.get_item.return_value = {
+        with patch('boto3.client') as mock_boto_client:
+            mock_dynamodb = MagicMock()
+            mock_dynamodb.get_item.return_value = {
                 'Item': {
-                    'job_id': 'j1', 'status': 'completed',
-                    's3_avatar_key': 'g/j1/a.png',
-                    'identity_package': {}, 'pet_analysis': {}
+                    'status': {'S': 'completed'},
+                    's3_avatar_key': {'S': 'g/j1/a.png'},
+                    'identity_package': {'M': {}}, 'pet_analysis': {'M': {}}
                 }
             }
-            mock_dynamodb = MagicMock()
-            mock_dynamodb.Table.return_value = mock_table
-            mock_boto_resource.return_value = mock_dynamodb
 
             mock_s3 = MagicMock()
             mock_s3.generate_presigned_url.return_value = 'https://presigned'
-            mock_boto_client.return_value = mock_s3
+
+            def client_factory(service, **kwargs):
+                return mock_dynamodb if service == 'dynamodb' else mock_s3
+
+            mock_boto_client.side_effect = client_factory
 
             module = load_handler_module('result-handler')
             with patch.dict(os.environ, {'DYNAMODB_TABLE_NAME': 't', 'S3_GENERATED_BUCKET': 'b'}):
@@ -145,12 +183,10 @@ class TestCORSHeaders:
 
     def test_status_response_includes_cors_headers(self):
         """Test status response includes CORS headers."""
-        with patch('boto3.resource') as mock_boto_resource:
-            mock_table = MagicMock()
-            mock_table.get_item.return_value = {'Item': {'job_id': 'j1', 'status': 'processing', 'progress': 50}}
+        with patch('boto3.client') as mock_boto_client:
             mock_dynamodb = MagicMock()
-            mock_dynamodb.Table.return_value = mock_table
-            mock_boto_resource.return_value = mock_dynamodb
+            mock_dynamodb.get_item.return_value = {'Item': {'status': {'S': 'processing'}, 'progress': {'N': '50'}}}
+            mock_boto_client.return_value = mock_dynamodb
 
             module = load_handler_module('status-handler')
             with patch.dict(os.environ, {'DYNAMODB_TABLE_NAME': 'test-table'}):
@@ -200,3 +236,44 @@ class TestS3SecurityConfiguration:
             # Check for content-length-range condition
             size_conditions = [c for c in conditions if 'content-length-range' in str(c)]
             assert len(size_conditions) > 0
+
+
+class TestRateLimiting:
+    """Tests for per API key token-bucket throttling."""
+
+    def test_throttles_requests_over_bucket_capacity(self):
+        """Test requests beyond the burst capacity get 429 without calling the handler."""
+        from src.security import rate_limit, TokenBucket
+
+        calls = []
+        handler = rate_limit(TokenBucket(capacity=2, refill_per_sec=0.5))(
+            lambda event, context: calls.append(event) or {'statusCode': 200}
+        )
+        event = {'headers': {'x-api-key': 'client-key'}}
+
+        responses = [handler(event, MockContext()) for _ in range(3)]
+
+        assert [r['statusCode'] for r in responses] == [200, 200, 429]
+        assert responses[2]['headers']['Retry-After'] == '2'
+        assert len(calls) == 2
+        # Other keys have their own bucket
+        assert handler({'headers': {'X-API-Key': 'other-key'}}, MockContext())['statusCode'] == 200
+
+    def test_dynamodb_bucket_writes_conditionally_on_last_refill(self):
+        """Test the shared bucket spends a token only if no other request refilled it first."""
+        from src.security import DynamoDBTokenBucket
+
+        mock_dynamodb = MagicMock()
+        mock_dynamodb.get_item.return_value = {
+            'Item': {'tokens': {'N': '0.5'}, 'last_refill': {'N': '1700000000.0'}}
+        }
+        bucket = DynamoDBTokenBucket('rate-limits', capacity=5, refill_per_sec=1, dynamodb_client=mock_dynamodb)
+
+        with patch('time.time', return_value=1700000001.0):
+            assert bucket.acquire('client-key') == 0.0
+
+        call_args = mock_dynamodb.update_item.call_args
+        assert call_args.kwargs['ConditionExpression'] == 'last_refill = :last_refill'
+        assert call_args.kwargs['ExpressionAttributeValues'][':last_refill'] == {'N': '1700000000.0'}
+        assert float(call_args.kwargs['ExpressionAttributeValues'][':tokens']['N']) == 0.5
+        assert 'client-key' not in str(call_args.kwargs['Key'])